@@ -1,12 +1,11 @@
-import openai
-import os
 from dotenv import load_dotenv
 
-# Cargar las variables del archivo .env
+# Cargar las variables del archivo .env (API keys de los proveedores) antes de importar
+# comun/, que lee su configuración (LLM_*, ROUTER_*...) al importarse
 load_dotenv()
 
-# La librería openai buscará esta variable de entorno por defecto
-openai.api_key = os.getenv("OPENAI_API_KEY")
+from comun.llm_client import get_llm_client
+from comun.usage import get_usage_ledger
 
 print("¡Librería configurada!")
 
@@ -19,9 +18,11 @@ class Chatbot:
         """Envía un mensaje de usuario y obtiene una respuesta."""
         self.messages.append({"role": "user", "content": user_message})
 
-        response = openai.chat.completions.create(
+        # Si OpenAI falla o se vuelve lento, el cliente compartido usa otro proveedor
+        response = get_llm_client().chat(
             model="gpt-4o-mini",
-            messages=self.messages
+            messages=self.messages,
+            call_site="Chatbot.talk"
         )
 
         assistant_response = response.choices[0].message.content
@@ -43,4 +44,7 @@ if __name__ == "__main__":
             break
 
         respuesta = mi_chatbot.talk(entrada)
-        print(f"Asistente: {respuesta}")
\ No newline at end of file
+        print(f"Asistente: {respuesta}")
+
+    print(get_llm_client().report())
+    print(get_usage_ledger().report())
\ No newline at end of file
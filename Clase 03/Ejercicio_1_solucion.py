@@ -5,19 +5,19 @@ Ejercicio 1: Sistema de 3 llamadas secuenciales al LLM
 3. Proponer una solución de IA con Agentic
 """
 
-import os
-from openai import OpenAI
 from dotenv import load_dotenv
 
-# Cargar las variables de entorno desde el archivo .env
+# Cargar las variables de entorno desde el archivo .env antes de importar
+# comun/, que lee su configuración (LLM_*, ROUTER_*...) al importarse
 load_dotenv()
 
-# Inicializar el cliente de OpenAI
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+from comun.llm_client import get_llm_client
+from comun.usage import get_usage_ledger
+
 
 def llamar_llm(prompt, contexto_previo=None):
     """
-    Función para hacer una llamada al LLM de OpenAI
+    Función para hacer una llamada al LLM (OpenAI, con conmutación a otros proveedores)
     
     Args:
         prompt: El prompt a enviar al LLM
@@ -36,9 +36,10 @@ def llamar_llm(prompt, contexto_previo=None):
     mensajes.append({"role": "user", "content": prompt})
     
     # Hacer la llamada al LLM
-    response = client.chat.completions.create(
+    response = get_llm_client().chat(
         model="gpt-4.1-mini",
         messages=mensajes,
+        call_site="llamar_llm",
         temperature=0.7,
         max_tokens=500
     )
@@ -102,6 +103,8 @@ el problema que describiste. Explica:
     print(f"✓ Problema específico descrito")
     print(f"✓ Solución de IA con Agentic propuesta")
     print("\nEjercicio completado exitosamente!")
+    print("\n" + get_llm_client().report())
+    print("\n" + get_usage_ledger().report())
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
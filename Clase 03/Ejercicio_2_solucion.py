@@ -9,21 +9,38 @@ Este agente inteligente:
 """
 
 import os
+import re
 import json
+import time
+import uuid
 import requests
 from openai import OpenAI
 from dotenv import load_dotenv
 
-# Cargar las variables de entorno desde el archivo .env
+# Cargar las variables de entorno desde el archivo .env antes de importar
+# comun/, que lee su configuración (LLM_*, ROUTER_*...) al importarse
 load_dotenv()
 
+from comun.task_router import get_task_router
+from comun.usage import get_usage_ledger, usage_scope
+
+
 # Inicializar el cliente de OpenAI
 client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 
 
+def es_respuesta_de_pais(texto):
+    """
+    Control de calidad de extraer_pais: una sola línea con un nombre de país o "NONE".
+    """
+    return bool(re.fullmatch(r"NONE|[A-Z][A-Za-z .'()-]{1,59}", texto.strip()))
+
+
 def extraer_pais(consulta_usuario):
     """
     Usa el LLM para extraer el nombre del país de la consulta del usuario.
+    Es una tarea sencilla: se resuelve con el modelo local (Ollama) si está disponible
+    y solo se usa gpt-4o-mini si la respuesta local no es válida o tarda demasiado.
     
     Args:
         consulta_usuario: La pregunta del usuario en lenguaje natural
@@ -39,9 +56,10 @@ Consulta del usuario: "{consulta_usuario}"
 
 Nombre del país en inglés:"""
     
-    response = client.chat.completions.create(
-        model="gpt-4o-mini",
+    response = get_task_router().chat(
+        "extraer_pais",
         messages=[{"role": "user", "content": prompt}],
+        check=es_respuesta_de_pais,
         temperature=0.3,
         max_tokens=50
     )
@@ -140,12 +158,15 @@ Instrucciones:
 
 Respuesta:"""
     
+    inicio = time.perf_counter()
     response = client.chat.completions.create(
         model="gpt-4o-mini",
         messages=[{"role": "user", "content": prompt}],
         temperature=0.7,
         max_tokens=300
     )
+    get_usage_ledger().record("formatear_respuesta", "gpt-4o-mini", response.usage,
+                              time.perf_counter() - inicio, "openai")
     
     return response.choices[0].message.content.strip()
 
@@ -205,6 +226,8 @@ def main():
         consulta = input("\n👤 Tu consulta: ").strip()
         
         if consulta.lower() in ['salir', 'exit', 'quit']:
+            print("\n" + get_task_router().report())
+            print("\n" + get_usage_ledger().report())
             print("\n👋 ¡Hasta luego!")
             break
         
@@ -212,8 +235,9 @@ def main():
             print("⚠️  Por favor, escribe una consulta.")
             continue
         
-        # Llamar al agente con la consulta
-        respuesta = agente_paises(consulta)
+        # Llamar al agente con la consulta (el consumo de tokens se agrupa por consulta)
+        with usage_scope(request=uuid.uuid4().hex[:12]):
+            respuesta = agente_paises(consulta)
         
         # Mostrar la respuesta
         print(f"\n🤖 Agente: {respuesta}")
@@ -1,18 +1,30 @@
 from dotenv import load_dotenv
-from openai import OpenAI
+import asyncio
 import json
 import os
-import requests
-from pypdf import PdfReader
-import gradio as gr
+import time
+import uuid
 from conf import NOMBRE
 
-
+# Antes de importar comun/, que lee su configuración (LLM_*, ROUTER_*...) al importarse
 load_dotenv(override=True)
+
+from comun.llm_client import get_llm_client
+from comun.startup import profile_startup, wants_profile
+from comun.usage import usage_scope
+from profile_index import ProfileIndex
+from faq_cache import get_faq_cache
+
+
 hf_token = os.getenv("HF_TOKEN")
+# "rag": solo los fragmentos del perfil relevantes para cada pregunta; "full": el perfil completo
+PROFILE_MODE = os.getenv("PROFILE_MODE", "rag")
 #print(hf_token)  # Debe mostrar el token si se cargó correctamente
 
 def push(text):
+    # requests, pypdf y gradio se importan donde se usan: no retrasan el arranque
+    import requests
+
     requests.post(
         "https://api.pushover.net/1/messages.json",
         data={
@@ -29,6 +41,8 @@ def record_user_details(email, name="Nombre no indicado", notes="no proporcionad
 
 def record_unknown_question(question):
     push(f"Registrando {question}")
+    # La pregunta queda en la cola de revisión de la caché de FAQ
+    get_faq_cache().enqueue(question, origin="desconocida")
     return {"recorded": "ok"}
 
 record_user_details_json = {
@@ -76,19 +90,78 @@ tools = [{"type": "function", "function": record_user_details_json},
         {"type": "function", "function": record_unknown_question_json}]
 
 
+class ChatTurn:
+    """
+    Un turno de chat: caché de FAQ, contexto del perfil, herramientas y registro de la respuesta.
+    Solo la llamada al LLM queda fuera, porque es síncrona en `Me.chat` y asíncrona en `Me.achat`.
+    """
+
+    def __init__(self, me, message, history):
+        self.me = me
+        self.message = message
+        self.history = history
+        self.start = time.perf_counter()
+        self.vector = None
+        self.messages = []
+        self.unknown = False
+        self.answer = None
+
+    def begin(self):
+        """Responde desde la caché de FAQ si puede (devuelve True); si no, prepara los mensajes para el LLM"""
+        # La caché solo tiene preguntas sueltas: en un turno de seguimiento la respuesta depende del historial
+        if not self.history:
+            answer, similarity, self.vector = self.me.faq.lookup(self.message)
+            if answer:
+                print(f"FAQ: respuesta desde la caché (similitud {similarity:.2f})", flush=True)
+                self.me.faq.observe(hit=True, seconds=time.perf_counter() - self.start)
+                self.answer = answer
+                return True
+        context = self.me.profile_context(self.message, self.history)
+        self.messages = [{"role": "system", "content": self.me.system_prompt(context)}] + self.history + [{"role": "user", "content": self.message}]
+        return False
+
+    def llm_request(self):
+        return {"model": "gpt-4o-mini", "messages": self.messages, "tools": tools, "call_site": "Me.chat"}
+
+    def handle(self, response):
+        """Ejecuta las herramientas que pidió el LLM (devuelve False) o registra la respuesta final (True)"""
+        if response.choices[0].finish_reason=="tool_calls":
+            reply = response.choices[0].message
+            tool_calls = reply.tool_calls
+            self.unknown = self.unknown or any(call.function.name == "record_unknown_question" for call in tool_calls)
+            results = self.me.handle_tool_call(tool_calls)
+            self.messages.append(reply)
+            self.messages.extend(results)
+            return False
+        self.answer = response.choices[0].message.content
+        # Las respuestas del LLM a preguntas sueltas son candidatas a la caché, pendientes de revisión
+        if not self.history:
+            if not self.unknown:
+                self.me.faq.enqueue(self.message, self.answer, origin="llm", vector=self.vector)
+            self.me.faq.observe(hit=False, seconds=time.perf_counter() - self.start)
+        return True
+
+
 class Me:
 
     def __init__(self):
-        self.openai = OpenAI()
+        self.llm = get_llm_client()
         self.name = NOMBRE
-        reader = PdfReader("doc/linkedin.pdf")
-        self.linkedin = ""
-        for page in reader.pages:
-            text = page.extract_text()
-            if text:
-                self.linkedin += text
-        with open("doc/resumen.txt", "r", encoding="utf-8") as f:
-            self.summary = f.read()
+        self.faq = get_faq_cache()
+        if PROFILE_MODE == "rag":
+            self.index = ProfileIndex()
+            self.index.ensure_current()
+        else:
+            from pypdf import PdfReader
+
+            reader = PdfReader("doc/linkedin.pdf")
+            self.linkedin = ""
+            for page in reader.pages:
+                text = page.extract_text()
+                if text:
+                    self.linkedin += text
+            with open("doc/resumen.txt", "r", encoding="utf-8") as f:
+                self.summary = f.read()
 
 
     def handle_tool_call(self, tool_calls):
@@ -102,35 +175,54 @@ class Me:
             results.append({"role": "tool","content": json.dumps(result),"tool_call_id": tool_call.id})
         return results
     
-    def system_prompt(self):
+    def profile_context(self, message, history):
+        if PROFILE_MODE != "rag":
+            return f"## Resumen:\n{self.summary}\n\n## Perfil de LinkedIn:\n{self.linkedin}"
+        # La pregunta anterior del usuario ayuda con las repreguntas ("¿y antes de eso?")
+        previous = [turn["content"] for turn in history if turn.get("role") == "user" and isinstance(turn.get("content"), str)]
+        query = "\n".join(previous[-1:] + [message])
+        chunks = self.index.search(query)
+        return "## Fragmentos relevantes del perfil:\n" + "\n\n".join(
+            f"[{chunk['source']}]\n{chunk['text']}" for chunk in chunks)
+
+    def system_prompt(self, context):
         system_prompt = f"""Actúas como {self.name}. Respondes preguntas en el sitio web de {self.name}, en particular preguntas relacionadas con la trayectoria profesional, los antecedentes, las habilidades y la experiencia de {self.name}.
             Tu responsabilidad es representar a {self.name} en las interacciones del sitio web con la mayor fidelidad posible.
-            Se te proporciona un resumen de la trayectoria profesional y el perfil de LinkedIn de {self.name} que puedes usar para responder preguntas.
+            Se te proporciona información de la trayectoria profesional y el perfil de LinkedIn de {self.name} que puedes usar para responder preguntas.
             Muestra un tono profesional y atractivo, como si hablaras con un cliente potencial o un futuro empleador que haya visitado el sitio web.
             Si no sabes la respuesta a alguna pregunta, usa la herramienta 'record_unknown_question' para registrar la pregunta que no pudiste responder, incluso si se trata de algo trivial o no relacionado con tu trayectoria profesional.
             Si el usuario participa en una conversación, intenta que se ponga en contacto por correo electrónico; pídele su correo electrónico y regístralo con la herramienta 'record_user_details'."""
         
-        system_prompt += f"\n\n## Resumen:\n{self.summary}\n\n## Perfil de LinkedIn:\n{self.linkedin}\n\n"
+        system_prompt += f"\n\n{context}\n\n"
         system_prompt += f"En este contexto, por favor chatea con el usuario, manteniéndote siempre en el personaje de {self.name}."
         return system_prompt
     
     def chat(self, message, history):
-        messages = [{"role": "system", "content": self.system_prompt()}] + history + [{"role": "user", "content": message}]
-        done = False
-        while not done:
-            response = self.openai.chat.completions.create(model="gpt-4o-mini", messages=messages, tools=tools)
-            if response.choices[0].finish_reason=="tool_calls":
-                message = response.choices[0].message
-                tool_calls = message.tool_calls
-                results = self.handle_tool_call(tool_calls)
-                messages.append(message)
-                messages.extend(results)
-            else:
-                done = True
-        return response.choices[0].message.content
-    
+        # El consumo de tokens de las llamadas de un turno (embeddings y LLM) se agrupa por petición
+        with usage_scope(request=uuid.uuid4().hex[:12]):
+            turn = ChatTurn(self, message, history)
+            done = turn.begin()
+            while not done:
+                done = turn.handle(self.llm.chat(**turn.llm_request()))
+            return turn.answer
+
+    async def achat(self, message, history):
+        """Versión asíncrona de `chat` para el modo de producción (serve.py): no bloquea el event loop"""
+        with usage_scope(request=uuid.uuid4().hex[:12]):
+            # Lo mismo que `chat`, pero la caché, el índice y las herramientas van a un hilo
+            turn = ChatTurn(self, message, history)
+            done = await asyncio.to_thread(turn.begin)
+            while not done:
+                response = await self.llm.achat(**turn.llm_request())
+                done = await asyncio.to_thread(turn.handle, response)
+            return turn.answer
+
 
 if __name__ == "__main__":
+    if wants_profile():
+        profile_startup(["gradio", "app"])
+    import gradio as gr
+
     me = Me()
     gr.ChatInterface(me.chat).launch()
     
@@ -0,0 +1,34 @@
+"""
+Despliegue del bot en Hugging Face Spaces.
+
+El Space solo recibe esta carpeta, pero el bot importa el paquete compartido `comun/` de la
+raíz del repositorio (en local se instala con `pip install -e ../../comun`). Este script copia
+`comun/` junto a app.py, ejecuta `gradio deploy` y borra la copia al terminar, así que la
+copia nunca queda en el repositorio:
+
+    dotenv python deploy.py
+"""
+
+import shutil
+import subprocess
+import sys
+from pathlib import Path
+
+HERE = Path(__file__).resolve().parent
+SOURCE = HERE.parents[1] / "comun"
+COPY = HERE / "comun"
+
+
+def main():
+    if COPY.exists():
+        shutil.rmtree(COPY)
+    shutil.copytree(SOURCE, COPY, ignore=shutil.ignore_patterns("__pycache__", "*.egg-info", "build"))
+    try:
+        # Los argumentos extra se pasan a gradio deploy (ej. --title)
+        subprocess.run(["gradio", "deploy", *sys.argv[1:]], cwd=HERE, check=True)
+    finally:
+        shutil.rmtree(COPY)
+
+
+if __name__ == "__main__":
+    main()
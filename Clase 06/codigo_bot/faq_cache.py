@@ -0,0 +1,191 @@
+"""
+Caché de preguntas frecuentes del bot.
+
+Las preguntas de los reclutadores se repiten ("¿qué stack usas?", "¿estás disponible?").
+Cada pregunta entrante se convierte en embedding y, si se parece lo suficiente a una
+pregunta con respuesta aprobada, se responde desde la caché sin llamar al LLM.
+
+Las preguntas que el bot no supo responder (`record_unknown_question`) y las respuestas que
+dio el LLM entran en una cola de revisión. Se revisan por línea de comandos:
+
+    python faq_cache.py pendientes
+    python faq_cache.py aprobar <id> ["respuesta corregida"]
+    python faq_cache.py rechazar <id>
+"""
+
+import os
+import sqlite3
+import sys
+import threading
+from collections import deque
+from datetime import datetime
+
+import numpy as np
+from openai import OpenAI
+
+from comun.usage import percentile
+from profile_index import embed_texts
+
+FAQ_DB_PATH = os.getenv("FAQ_DB_PATH", "faq.sqlite")
+FAQ_THRESHOLD = float(os.getenv("FAQ_THRESHOLD", "0.9"))
+# Cada cuántos turnos se imprime el informe de la caché
+FAQ_REPORT_EVERY = int(os.getenv("FAQ_REPORT_EVERY", "20"))
+# Latencias recientes recordadas para los percentiles (como METRICS_WINDOW en serve.py)
+FAQ_LATENCY_WINDOW = 1000
+
+
+def normalize_question(question):
+    return " ".join(question.lower().split()).rstrip("?¿ ").lstrip("¿ ")
+
+
+class FaqCache:
+
+    def __init__(self, path=FAQ_DB_PATH, threshold=FAQ_THRESHOLD):
+        self.path = path
+        self.threshold = threshold
+        self.client = OpenAI()
+        self._lock = threading.Lock()
+        self._approved_version = None
+        self._answers = []
+        self._vectors = None
+        self.counts = {"hit": 0, "miss": 0}
+        self.latencies = {"hit": deque(maxlen=FAQ_LATENCY_WINDOW), "miss": deque(maxlen=FAQ_LATENCY_WINDOW)}
+        with self._connect() as conn:
+            conn.execute("""CREATE TABLE IF NOT EXISTS faq (
+                id INTEGER PRIMARY KEY, question TEXT UNIQUE, answer TEXT, status TEXT,
+                origin TEXT, embedding BLOB, hits INTEGER DEFAULT 0, updated_at TEXT)""")
+            # Versión de las respuestas aprobadas: la incrementan los triggers en cada cambio, aunque
+            # lo haga otro proceso (la CLI de revisión) dentro del mismo segundo
+            conn.execute("CREATE TABLE IF NOT EXISTS faq_version (id INTEGER PRIMARY KEY CHECK (id = 0), version INTEGER)")
+            conn.execute("INSERT OR IGNORE INTO faq_version (id, version) VALUES (0, 0)")
+            conn.execute("""CREATE TRIGGER IF NOT EXISTS faq_version_insert AFTER INSERT ON faq
+                WHEN NEW.status = 'approved' BEGIN UPDATE faq_version SET version = version + 1; END""")
+            conn.execute("""CREATE TRIGGER IF NOT EXISTS faq_version_update
+                AFTER UPDATE OF status, answer, embedding ON faq
+                BEGIN UPDATE faq_version SET version = version + 1; END""")
+            conn.execute("""CREATE TRIGGER IF NOT EXISTS faq_version_delete AFTER DELETE ON faq
+                BEGIN UPDATE faq_version SET version = version + 1; END""")
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def embed(self, text):
+        return embed_texts(self.client, [text], call_site="faq_cache")[0]
+
+    def _load_approved(self, conn):
+        """Recarga las respuestas aprobadas si cambiaron (se aprueban desde otro proceso)"""
+        version = conn.execute("SELECT version FROM faq_version").fetchone()[0]
+        if version == self._approved_version:
+            return
+        rows = conn.execute("SELECT id, answer, embedding FROM faq WHERE status = 'approved' AND embedding IS NOT NULL").fetchall()
+        self._answers = [(row[0], row[1]) for row in rows]
+        self._vectors = np.array([np.frombuffer(row[2], dtype=np.float32) for row in rows]) if rows else None
+        self._approved_version = version
+
+    def lookup(self, question):
+        """
+        Busca una respuesta aprobada para la pregunta.
+
+        Devuelve (respuesta, similitud, embedding); la respuesta es None si ninguna pregunta
+        aprobada supera el umbral. El embedding se reutiliza al encolar la pregunta.
+        """
+        vector = self.embed(question)
+        with self._lock, self._connect() as conn:
+            self._load_approved(conn)
+            if self._vectors is None:
+                return None, 0.0, vector
+            scores = self._vectors @ vector
+            best = int(np.argmax(scores))
+            if scores[best] < self.threshold:
+                return None, float(scores[best]), vector
+            faq_id, answer = self._answers[best]
+            conn.execute("UPDATE faq SET hits = hits + 1 WHERE id = ?", (faq_id,))
+        return answer, float(scores[best]), vector
+
+    def enqueue(self, question, answer="", origin="llm", vector=None):
+        """Agrega una pregunta a la cola de revisión (si ya estaba, no hace nada)"""
+        embedding = vector.astype(np.float32).tobytes() if vector is not None else None
+        with self._connect() as conn:
+            conn.execute("INSERT OR IGNORE INTO faq (question, answer, status, origin, embedding, updated_at) "
+                         "VALUES (?, ?, 'pending', ?, ?, ?)",
+                         (normalize_question(question), answer, origin, embedding,
+                          datetime.now().isoformat(timespec="seconds")))
+
+    def pending(self):
+        with self._connect() as conn:
+            return conn.execute("SELECT id, origin, question, answer FROM faq WHERE status = 'pending' ORDER BY id").fetchall()
+
+    def approve(self, faq_id, answer=None):
+        with self._connect() as conn:
+            row = conn.execute("SELECT question, answer, embedding FROM faq WHERE id = ?", (faq_id,)).fetchone()
+            if row is None:
+                raise ValueError(f"No existe la pregunta {faq_id}")
+            answer = answer or row[1]
+            if not answer:
+                raise ValueError("La pregunta no tiene respuesta: indica una al aprobarla")
+            embedding = row[2] or self.embed(row[0]).astype(np.float32).tobytes()
+            conn.execute("UPDATE faq SET status = 'approved', answer = ?, embedding = ?, updated_at = ? WHERE id = ?",
+                         (answer, embedding, datetime.now().isoformat(timespec="seconds"), faq_id))
+
+    def reject(self, faq_id):
+        with self._connect() as conn:
+            conn.execute("UPDATE faq SET status = 'rejected', updated_at = ? WHERE id = ?",
+                         (datetime.now().isoformat(timespec="seconds"), faq_id))
+
+    def observe(self, hit, seconds):
+        """Registra la latencia de un turno respondido desde la caché (hit) o por el LLM (miss)"""
+        key = "hit" if hit else "miss"
+        with self._lock:
+            self.counts[key] += 1
+            self.latencies[key].append(seconds)
+            turns = self.counts["hit"] + self.counts["miss"]
+        if FAQ_REPORT_EVERY and turns % FAQ_REPORT_EVERY == 0:
+            print(self.report(), flush=True)
+
+    def stats(self):
+        hits, misses = self.counts["hit"], self.counts["miss"]
+        return {"hits": hits, "misses": misses, "hit_rate": round(hits / (hits + misses), 3) if hits + misses else None}
+
+    def report(self):
+        with self._lock:
+            hits, misses = self.counts["hit"], self.counts["miss"]
+            latencies = {key: list(values) for key, values in self.latencies.items()}
+        turns = hits + misses
+        if not turns:
+            return "Caché de FAQ: sin turnos todavía"
+        lines = [f"Caché de FAQ: {hits}/{turns} aciertos ({100 * hits / turns:.0f}%)"]
+        for name, values in (("aciertos", latencies["hit"]), ("fallos", latencies["miss"])):
+            if values:
+                lines.append(f"  {name}: p50 {percentile(values, 50):.2f}s, p95 {percentile(values, 95):.2f}s, "
+                             f"máx {max(values):.2f}s")
+        return "\n".join(lines)
+
+
+_cache = None
+
+
+def get_faq_cache():
+    """Devuelve la caché compartida del proceso, creándola la primera vez"""
+    global _cache
+    if _cache is None:
+        _cache = FaqCache()
+    return _cache
+
+
+if __name__ == "__main__":
+    from dotenv import load_dotenv
+
+    load_dotenv(override=True)
+    command, args = (sys.argv[1], sys.argv[2:]) if len(sys.argv) > 1 else ("pendientes", [])
+    cache = get_faq_cache()
+    if command == "pendientes":
+        for faq_id, origin, question, answer in cache.pending():
+            print(f"[{faq_id}] ({origin}) {question}\n    {answer or '(sin respuesta)'}")
+    elif command == "aprobar":
+        cache.approve(int(args[0]), args[1] if len(args) > 1 else None)
+        print(f"Pregunta {args[0]} aprobada")
+    elif command == "rechazar":
+        cache.reject(int(args[0]))
+        print(f"Pregunta {args[0]} rechazada")
+    else:
+        print(__doc__)
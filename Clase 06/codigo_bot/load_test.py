@@ -0,0 +1,148 @@
+"""
+Prueba de carga del modo de producción contra un backend simulado.
+
+Levanta un servidor local compatible con la API de OpenAI (chat y embeddings) que responde
+con una latencia fija y, en parte de las conversaciones, pide usar una herramienta, así que
+se recorre el mismo bucle de tool calls de `Me.achat`. No se llama a ningún proveedor real
+ni se envían notificaciones de Pushover.
+
+Compara dos configuraciones de ConcurrencyGate con los mismos visitantes simultáneos:
+una conversación a la vez (como la cola por defecto de Gradio) y la de producción.
+
+    python load_test.py [visitantes] [turnos por visitante]
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+STUB_LATENCY_SECONDS = float(os.getenv("STUB_LATENCY_SECONDS", "0.5"))
+# Fracción de conversaciones en las que el modelo simulado llama a una herramienta
+STUB_TOOL_RATE = float(os.getenv("STUB_TOOL_RATE", "0.3"))
+EMBEDDING_DIMENSIONS = 64
+
+
+class StubBackend(BaseHTTPRequestHandler):
+
+    def log_message(self, *args):
+        pass
+
+    def reply(self, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        request = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        if self.path.endswith("/embeddings"):
+            inputs = request["input"] if isinstance(request["input"], list) else [request["input"]]
+            self.reply({"object": "list", "model": request["model"],
+                        "data": [{"object": "embedding", "index": i, "embedding": fake_embedding(text)}
+                                 for i, text in enumerate(inputs)],
+                        "usage": {"prompt_tokens": 1, "total_tokens": 1}})
+            return
+
+        time.sleep(STUB_LATENCY_SECONDS)
+        messages = request["messages"]
+        question = messages[-1].get("content") or ""
+        wants_tool = (messages[-1]["role"] == "user" and request.get("tools")
+                      and int(hashlib.sha1(question.encode("utf-8")).hexdigest(), 16) % 100 < STUB_TOOL_RATE * 100)
+        if wants_tool:
+            message = {"role": "assistant", "content": None, "tool_calls": [{
+                "id": f"call_{time.monotonic_ns()}", "type": "function",
+                "function": {"name": "record_user_details", "arguments": json.dumps({"email": "visitante@example.com"})}}]}
+            finish_reason = "tool_calls"
+        else:
+            message = {"role": "assistant", "content": f"Respuesta simulada a: {question[:60]}"}
+            finish_reason = "stop"
+        self.reply({"id": "stub", "object": "chat.completion", "created": int(time.time()), "model": request["model"],
+                    "choices": [{"index": 0, "message": message, "finish_reason": finish_reason}],
+                    "usage": {"prompt_tokens": 100, "completion_tokens": 20, "total_tokens": 120}})
+
+
+def fake_embedding(text):
+    digest = hashlib.sha256(text.encode("utf-8")).digest()
+    return [(digest[i % len(digest)] - 128) / 128 for i in range(EMBEDDING_DIMENSIONS)]
+
+
+def start_backend():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubBackend)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{server.server_address[1]}/v1"
+
+
+async def visitor(me, gate, visitor_id, turns, results):
+    from serve import QueueFull
+
+    history = []
+    for turn in range(turns):
+        message = f"Pregunta {turn} del visitante {visitor_id}: ¿cuál es tu experiencia?"
+        start = time.perf_counter()
+        try:
+            async with gate.slot():
+                answer = await me.achat(message, history)
+        except QueueFull:
+            results["rejected"] += 1
+            continue
+        results["latencies"].append(time.perf_counter() - start)
+        history += [{"role": "user", "content": message}, {"role": "assistant", "content": answer}]
+
+
+async def run(me, gate, visitors, turns):
+    results = {"latencies": [], "rejected": 0}
+    start = time.perf_counter()
+    await asyncio.gather(*(visitor(me, gate, i, turns, results) for i in range(visitors)))
+    results["seconds"] = time.perf_counter() - start
+    results["metrics"] = gate.metrics()
+    return results
+
+
+def main():
+    visitors = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    turns = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    workdir = tempfile.mkdtemp(prefix="bot-load-")
+    # El backend simulado reemplaza a todos los proveedores; la caché y el índice van a un directorio temporal
+    stub_env = {"OPENAI_BASE_URL": start_backend(), "OPENAI_API_KEY": "stub", "LLM_PROVIDERS": "openai",
+                "LLM_HEDGE": "0", "FAQ_DB_PATH": os.path.join(workdir, "faq.sqlite"),
+                "PROFILE_INDEX_DIR": os.path.join(workdir, "index"), "FAQ_REPORT_EVERY": "0"}
+    os.environ.update(stub_env)
+
+    import app
+    from comun.usage import percentile
+    from serve import MAX_CONCURRENCY, MAX_QUEUE, ConcurrencyGate
+
+    # app.py carga el .env con override: se vuelve a apuntar al backend simulado
+    os.environ.update(stub_env)
+    app.push = lambda text: None
+    me = app.Me()
+
+    print(f"{visitors} visitantes x {turns} turnos, latencia del backend {STUB_LATENCY_SECONDS}s\n")
+    print(f"{'modo':<28}{'turnos':>7}{'rechazados':>12}{'total (s)':>11}{'turnos/s':>10}"
+          f"{'p50 (s)':>9}{'p95 (s)':>9}{'espera p95':>12}{'en curso máx':>14}")
+    modes = {"una a la vez (Gradio)": (1, visitors),
+             f"producción ({MAX_CONCURRENCY} a la vez)": (MAX_CONCURRENCY, MAX_QUEUE)}
+
+    async def run_modes():
+        # Un solo bucle de eventos para ambos modos: los clientes asíncronos de `me` quedan ligados al bucle
+        return {name: await run(me, ConcurrencyGate(limit, max_waiting), visitors, turns)
+                for name, (limit, max_waiting) in modes.items()}
+
+    for name, results in asyncio.run(run_modes()).items():
+        latencies, metrics = results["latencies"], results["metrics"]
+        print(f"{name:<28}{len(latencies):>7}{results['rejected']:>12}{results['seconds']:>11.1f}"
+              f"{len(latencies) / results['seconds']:>10.1f}{percentile(latencies, 50):>9.2f}"
+              f"{percentile(latencies, 95):>9.2f}{metrics['queue_wait_seconds']['p95']:>12.2f}"
+              f"{metrics['max_in_flight']:>14}")
+
+
+if __name__ == "__main__":
+    main()
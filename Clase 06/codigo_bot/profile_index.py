@@ -0,0 +1,165 @@
+"""
+Índice vectorial local del perfil.
+
+En lugar de meter el resumen y el PDF de LinkedIn completos en cada system prompt, los
+documentos de `doc/` se dividen en fragmentos una sola vez, se convierten en embeddings y
+se guardan en disco (NumPy). En cada turno solo se incluyen los fragmentos más parecidos
+a la pregunta, así que los tokens de entrada no crecen con la cantidad de documentos.
+El índice se reconstruye únicamente cuando cambia algún archivo de `doc/`.
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+
+import numpy as np
+from openai import OpenAI
+
+from comun.usage import get_usage_ledger
+
+DOC_DIR = "doc"
+INDEX_DIR = os.getenv("PROFILE_INDEX_DIR", ".index")
+EMBEDDING_MODEL = os.getenv("PROFILE_EMBEDDING_MODEL", "text-embedding-3-small")
+TOP_K = int(os.getenv("PROFILE_TOP_K", "4"))
+CHUNK_CHARS = 800
+CHUNK_OVERLAP = 150
+# La API de embeddings limita las entradas por petición (2048 textos y un máximo de tokens)
+EMBEDDING_BATCH_SIZE = int(os.getenv("PROFILE_EMBEDDING_BATCH_SIZE", "256"))
+DOC_EXTENSIONS = (".pdf", ".txt", ".md")
+
+
+def embed_texts(client, texts, call_site="profile_index"):
+    """Embeddings normalizados (norma 1), para comparar con un producto escalar, en lotes de `EMBEDDING_BATCH_SIZE`"""
+    if not texts:
+        return np.zeros((0, 0), dtype=np.float32)
+    batches = []
+    for i in range(0, len(texts), EMBEDDING_BATCH_SIZE):
+        start = time.perf_counter()
+        response = client.embeddings.create(model=EMBEDDING_MODEL, input=texts[i:i + EMBEDDING_BATCH_SIZE])
+        get_usage_ledger().record(call_site, EMBEDDING_MODEL, response.usage, time.perf_counter() - start, "openai")
+        batches.append(np.array([item.embedding for item in response.data], dtype=np.float32))
+    vectors = np.concatenate(batches)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def read_document(path):
+    if path.endswith(".pdf"):
+        # Solo hace falta al reconstruir el índice: cuando está en disco no se importa pypdf
+        from pypdf import PdfReader
+
+        return "".join(page.extract_text() or "" for page in PdfReader(path).pages)
+    with open(path, "r", encoding="utf-8") as f:
+        return f.read()
+
+
+def chunk_text(text, size=CHUNK_CHARS, overlap=CHUNK_OVERLAP):
+    """Divide el texto en fragmentos de hasta `size` caracteres, cortando entre párrafos o frases"""
+    text = re.sub(r"[ \t]+", " ", text).strip()
+    chunks = []
+    start = 0
+    while start < len(text):
+        end = min(start + size, len(text))
+        if end < len(text):
+            # Se corta en el último salto de línea o punto del fragmento, si no queda demasiado corto
+            cut = max(text.rfind("\n", start, end), text.rfind(". ", start, end))
+            if cut > start + size // 2:
+                end = cut + 1
+        chunk = text[start:end].strip()
+        if chunk:
+            chunks.append(chunk)
+        if end >= len(text):
+            break
+        start = max(end - overlap, start + 1)
+    return chunks
+
+
+class ProfileIndex:
+
+    def __init__(self, doc_dir=DOC_DIR, index_dir=INDEX_DIR, top_k=TOP_K):
+        self.doc_dir = doc_dir
+        self.index_dir = index_dir
+        self.top_k = top_k
+        self.client = OpenAI()
+        self.chunks = []       # [{"source": "linkedin.pdf", "text": "..."}]
+        self.vectors = None    # matriz (fragmentos x dimensión), filas normalizadas
+        self._signature = None
+        self._rebuild_lock = threading.Lock()  # una sola reconstrucción a la vez
+        self._lock = threading.Lock()          # protege el par (chunks, vectors)
+
+    def doc_paths(self):
+        if not os.path.isdir(self.doc_dir):
+            return []
+        return sorted(os.path.join(self.doc_dir, name) for name in os.listdir(self.doc_dir)
+                      if name.lower().endswith(DOC_EXTENSIONS))
+
+    def signature(self):
+        """Firma barata de `doc/` (nombre, tamaño y fecha de cada archivo) para detectar cambios"""
+        stats = [(path, os.path.getsize(path), os.path.getmtime(path)) for path in self.doc_paths()]
+        return hashlib.sha256(json.dumps(stats).encode("utf-8")).hexdigest()
+
+    def fingerprint(self):
+        """Huella del contenido de `doc/`: decide si el índice guardado en disco sigue sirviendo"""
+        digest = hashlib.sha256(f"{EMBEDDING_MODEL}:{CHUNK_CHARS}:{CHUNK_OVERLAP}".encode("utf-8"))
+        for path in self.doc_paths():
+            digest.update(os.path.basename(path).encode("utf-8"))
+            with open(path, "rb") as f:
+                digest.update(f.read())
+        return digest.hexdigest()
+
+    def embed(self, texts):
+        return embed_texts(self.client, texts)
+
+    def ensure_current(self):
+        """Carga el índice de disco o lo reconstruye, solo si `doc/` cambió desde la última vez"""
+        signature = self.signature()
+        if signature == self._signature:
+            return
+        # En el modo de producción varias conversaciones pueden detectar el cambio a la vez
+        with self._rebuild_lock:
+            if signature != self._signature:
+                self._rebuild_or_load(signature)
+
+    def _rebuild_or_load(self, signature):
+        fingerprint = self.fingerprint()
+        meta_path = os.path.join(self.index_dir, "chunks.json")
+        vectors_path = os.path.join(self.index_dir, "vectors.npy")
+        if os.path.exists(meta_path) and os.path.exists(vectors_path):
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            if meta.get("fingerprint") == fingerprint:
+                self._swap(meta["chunks"], np.load(vectors_path), signature)
+                print(f"Índice del perfil cargado: {len(meta['chunks'])} fragmentos", flush=True)
+                return
+
+        paths = self.doc_paths()
+        chunks = [{"source": os.path.basename(path), "text": chunk}
+                  for path in paths for chunk in chunk_text(read_document(path))]
+        vectors = self.embed([chunk["text"] for chunk in chunks])
+        os.makedirs(self.index_dir, exist_ok=True)
+        np.save(vectors_path, vectors)
+        with open(meta_path, "w", encoding="utf-8") as f:
+            json.dump({"fingerprint": fingerprint, "model": EMBEDDING_MODEL, "chunks": chunks},
+                      f, ensure_ascii=False)
+        self._swap(chunks, vectors, signature)
+        print(f"Índice del perfil reconstruido: {len(chunks)} fragmentos de {len(paths)} documentos", flush=True)
+
+    def _swap(self, chunks, vectors, signature):
+        """Reemplaza los fragmentos y sus vectores juntos: una búsqueda nunca ve uno nuevo con el otro viejo"""
+        with self._lock:
+            self.chunks, self.vectors = chunks, vectors
+            self._signature = signature
+
+    def search(self, query, k=None):
+        """Los `k` fragmentos más parecidos a la consulta, en el orden en que aparecen en los documentos"""
+        self.ensure_current()
+        with self._lock:
+            chunks, vectors = self.chunks, self.vectors
+        k = min(k or self.top_k, len(chunks))
+        if k == 0:
+            return []
+        scores = vectors @ self.embed([query])[0]
+        best = np.argpartition(-scores, k - 1)[:k]
+        return [chunks[i] for i in sorted(best)]
@@ -0,0 +1,169 @@
+"""
+Modo de producción del bot.
+
+`app.py` lanza un solo proceso con la cola por defecto de Gradio (una conversación a la vez)
+y un cliente síncrono, así que los visitantes simultáneos esperan uno detrás de otro. Aquí:
+
+- Las conversaciones usan `Me.achat` (cliente asíncrono), sin bloquear el event loop.
+- Cada proceso atiende como máximo SERVE_MAX_CONCURRENCY conversaciones a la vez y deja
+  esperar a SERVE_MAX_QUEUE más; por encima de eso rechaza con un mensaje amable.
+- `Me` se construye una sola vez (incluido el índice del perfil) y después se crean
+  SERVE_WORKERS procesos que lo comparten, cada uno en su puerto: SERVE_PORT, SERVE_PORT+1...
+  La cola de Gradio vive en la memoria de cada proceso, así que delante hace falta un
+  balanceador con sesiones persistentes (por ejemplo `ip_hash` en nginx).
+- GET /metrics devuelve, por proceso, las conversaciones en curso y en espera, la
+  distribución del tiempo de espera en la cola y de la duración de las respuestas y los
+  tokens y el costo acumulados (ver comun/usage.py).
+
+    python serve.py
+    python serve.py --profile-startup   # desglose del tiempo de importación
+"""
+
+import asyncio
+import multiprocessing
+import os
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+
+import gradio as gr
+import uvicorn
+from fastapi import FastAPI
+from openai import OpenAI
+
+from app import Me
+from comun.startup import profile_startup, wants_profile
+from comun.usage import get_usage_ledger, percentile
+
+SERVE_HOST = os.getenv("SERVE_HOST", "0.0.0.0")
+SERVE_PORT = int(os.getenv("SERVE_PORT", "7860"))
+SERVE_WORKERS = int(os.getenv("SERVE_WORKERS", "2"))
+MAX_CONCURRENCY = int(os.getenv("SERVE_MAX_CONCURRENCY", "8"))
+MAX_QUEUE = int(os.getenv("SERVE_MAX_QUEUE", "32"))
+# Muestras recordadas para calcular los percentiles de /metrics
+METRICS_WINDOW = 1000
+
+
+class QueueFull(Exception):
+    pass
+
+
+class ConcurrencyGate:
+    """Limita las conversaciones simultáneas de un proceso y mide la espera para entrar"""
+
+    def __init__(self, limit=MAX_CONCURRENCY, max_waiting=MAX_QUEUE):
+        self.limit = limit
+        self.max_waiting = max_waiting
+        self._semaphore = asyncio.Semaphore(limit)
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.waiting = 0
+        self.served = 0
+        self.rejected = 0
+        self.errors = 0
+        self.queue_waits = deque(maxlen=METRICS_WINDOW)
+        self.latencies = deque(maxlen=METRICS_WINDOW)
+
+    @asynccontextmanager
+    async def slot(self):
+        if self.waiting >= self.max_waiting:
+            self.rejected += 1
+            raise QueueFull()
+        self.waiting += 1
+        enqueued = time.perf_counter()
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.waiting -= 1
+        started = time.perf_counter()
+        self.queue_waits.append(started - enqueued)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            yield
+        except Exception:
+            self.errors += 1
+            raise
+        finally:
+            self.in_flight -= 1
+            self.served += 1
+            self.latencies.append(time.perf_counter() - started)
+            self._semaphore.release()
+
+    def metrics(self):
+        def summary(values):
+            values = list(values)
+            if not values:
+                return None
+            return {"p50": round(percentile(values, 50), 3), "p95": round(percentile(values, 95), 3),
+                    "max": round(max(values), 3)}
+
+        return {"in_flight": self.in_flight, "waiting": self.waiting, "max_in_flight": self.max_in_flight,
+                "limit": self.limit, "max_waiting": self.max_waiting, "served": self.served,
+                "rejected": self.rejected, "errors": self.errors,
+                "queue_wait_seconds": summary(self.queue_waits), "latency_seconds": summary(self.latencies)}
+
+
+def build_app(me, gate):
+    async def respond(message, history):
+        try:
+            async with gate.slot():
+                return await me.achat(message, history)
+        except QueueFull:
+            raise gr.Error("Hay muchas conversaciones en curso. Intenta de nuevo en unos segundos.")
+
+    demo = gr.ChatInterface(respond)
+    # Sin límite en la cola de Gradio: la admisión la decide ConcurrencyGate, que mide la espera
+    demo.queue(default_concurrency_limit=None)
+
+    api = FastAPI()
+
+    @api.get("/metrics")
+    def metrics():
+        return {"pid": os.getpid(), **gate.metrics(), "faq": me.faq.stats(), "usage": get_usage_ledger().totals()}
+
+    return gr.mount_gradio_app(api, demo, path="/")
+
+
+def run_worker(worker, me=None):
+    if me is None:
+        # Procesos creados con spawn: el índice del perfil ya está en disco y solo se carga
+        me = Me()
+    else:
+        # Procesos creados con fork: las conexiones HTTP abiertas en el padre no se comparten
+        if hasattr(me, "index"):
+            me.index.client = OpenAI()
+        me.faq.client = OpenAI()
+    port = SERVE_PORT + worker
+    print(f"Proceso {os.getpid()} atendiendo en el puerto {port} "
+          f"({MAX_CONCURRENCY} conversaciones a la vez, {MAX_QUEUE} en espera)", flush=True)
+    uvicorn.run(build_app(me, ConcurrencyGate()), host=SERVE_HOST, port=port, log_level="warning")
+
+
+def main():
+    if wants_profile():
+        profile_startup(["serve"])
+    # Se construye una sola vez: los procesos hijos no vuelven a calcular los embeddings del perfil
+    me = Me()
+    if SERVE_WORKERS == 1:
+        run_worker(0, me)
+        return
+
+    if "fork" in multiprocessing.get_all_start_methods():
+        context, shared = multiprocessing.get_context("fork"), me
+    else:
+        context, shared = multiprocessing.get_context("spawn"), None
+    workers = [context.Process(target=run_worker, args=(worker, shared), name=f"bot-{worker}")
+               for worker in range(SERVE_WORKERS)]
+    for process in workers:
+        process.start()
+    try:
+        for process in workers:
+            process.join()
+    except KeyboardInterrupt:
+        for process in workers:
+            process.terminate()
+
+
+if __name__ == "__main__":
+    main()
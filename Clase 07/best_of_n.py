@@ -0,0 +1,195 @@
+"""
+Módulo del Mejor de N con Salida Temprana.
+
+En el laboratorio 05 los tres agentes de ventas se ejecutan con `asyncio.gather` y luego
+`sales_picker` elige el mejor correo: siempre se paga la latencia del agente más lento más
+una llamada serial al selector. Aquí cada borrador se puntúa en cuanto llega (con
+`asyncio.as_completed` y un evaluador local, sin LLM) y, apenas uno supera el umbral de
+calidad o vence el plazo, se cancelan los agentes que siguen trabajando.
+"""
+
+import asyncio
+import re
+import time
+from dataclasses import dataclass, field
+from typing import Callable
+
+from agents import Agent, Runner
+
+QUALITY_BAR = 0.8
+DEADLINE_SECONDS = 20.0
+
+# Palabras que indican una llamada a la acción en un correo de ventas
+CALL_TO_ACTION = re.compile(r"\b(reuni[oó]n|llamada|demo|demostraci[oó]n|agenda|agendar|conversar|minutos)\b", re.I)
+# Huecos sin rellenar que el agente dejó para el remitente ("[Tu nombre]", "{empresa}")
+PLACEHOLDER = re.compile(r"\[[^\]]{2,40}\]|\{[^}]{2,40}\}")
+
+
+def score_email(text: str) -> float:
+    """
+    Evaluador local y rápido de un correo de ventas en frío.
+
+    Args:
+        text (str): Cuerpo del correo.
+
+    Returns:
+        float: Puntuación entre 0 y 1.
+    """
+    words = len(text.split())
+    checks = [
+        60 <= words <= 220,                                           # breve pero completo
+        bool(re.search(r"^\s*(asunto|subject)\s*:", text, re.I | re.M)),
+        bool(re.search(r"\b(estimad[oa]|hola|buen[oa]s)\b", text, re.I)),
+        bool(re.search(r"complai", text, re.I)),
+        bool(re.search(r"soc ?2|auditor[ií]a|cumplimiento", text, re.I)),
+        bool(CALL_TO_ACTION.search(text)) or "?" in text,
+        not PLACEHOLDER.search(text),
+    ]
+    # Sin llamada a la acción o con huecos sin rellenar, el correo no se puede enviar tal cual
+    weights = [1, 0.5, 0.5, 1, 1, 1.5, 1.5]
+    return round(sum(w for w, ok in zip(weights, checks) if ok) / sum(weights), 3)
+
+
+@dataclass
+class Candidate:
+    """Un borrador terminado, con su puntuación y el tiempo que tardó en llegar."""
+    agent: str
+    output: str
+    score: float
+    seconds: float
+
+
+@dataclass
+class BestOfNResult:
+    """
+    Resultado de una ejecución del mejor de N.
+
+    Atributos:
+        best (Candidate | None): El candidato elegido, o None si ningún agente entregó un borrador.
+        candidates (list[Candidate]): Candidatos recibidos, en orden de llegada.
+        cancelled (list[str]): Agentes cancelados antes de terminar.
+        seconds (float): Tiempo total hasta tener el candidato elegido.
+        reason (str): "umbral", "plazo" o "todos".
+    """
+    best: Candidate | None
+    candidates: list[Candidate] = field(default_factory=list)
+    cancelled: list[str] = field(default_factory=list)
+    seconds: float = 0.0
+    reason: str = "todos"
+
+
+async def _timed_run(agent: Agent, message: str, start: float) -> tuple[Agent, str, float]:
+    result = await Runner.run(agent, message)
+    return agent, result.final_output, time.perf_counter() - start
+
+
+async def best_of_n(agents: list[Agent], message: str, quality_bar: float = QUALITY_BAR,
+                    deadline_seconds: float = DEADLINE_SECONDS,
+                    scorer: Callable[[str], float] = score_email) -> BestOfNResult:
+    """
+    Ejecuta los agentes en paralelo y se queda con el primer borrador suficientemente bueno.
+
+    Args:
+        agents (list[Agent]): Agentes que redactan el correo.
+        message (str): Mensaje que recibe cada agente.
+        quality_bar (float): Puntuación a partir de la cual se deja de esperar.
+        deadline_seconds (float): Plazo máximo; al vencer se usa el mejor candidato recibido.
+        scorer (Callable): Evaluador de cada borrador.
+
+    Returns:
+        BestOfNResult: El candidato elegido y el detalle de la ejecución.
+    """
+    start = time.perf_counter()
+    tasks = [asyncio.create_task(_timed_run(agent, message, start)) for agent in agents]
+    result = BestOfNResult(best=None)
+
+    try:
+        for next_done in asyncio.as_completed(tasks, timeout=deadline_seconds):
+            try:
+                agent, output, seconds = await next_done
+            except asyncio.TimeoutError:
+                raise  # el plazo vencido lo atiende el try exterior
+            except Exception as e:
+                print(f"Un agente falló: {e}")
+                continue
+            candidate = Candidate(agent.name, output, scorer(output), seconds)
+            result.candidates.append(candidate)
+            print(f"{candidate.agent}: {candidate.score:.2f} en {candidate.seconds:.1f}s")
+            if candidate.score >= quality_bar:
+                result.reason = "umbral"
+                break
+    except asyncio.TimeoutError:
+        result.reason = "plazo"
+
+    pending = [task for task in tasks if not task.done()]
+    if result.reason == "plazo" and not result.candidates and pending:
+        # Vencido el plazo sin ningún borrador: se espera solo al primero que termine
+        done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            if not task.exception():
+                agent, output, seconds = task.result()
+                result.candidates.append(Candidate(agent.name, output, scorer(output), seconds))
+        pending = list(pending)
+
+    for task in pending:
+        task.cancel()
+    await asyncio.gather(*pending, return_exceptions=True)
+    result.cancelled = [agent.name for agent, task in zip(agents, tasks) if task.cancelled()]
+    result.best = max(result.candidates, key=lambda c: c.score, default=None)
+    result.seconds = time.perf_counter() - start
+    return result
+
+
+async def gather_and_pick(agents: list[Agent], message: str, picker: Agent) -> tuple[str, float]:
+    """
+    Flujo original del laboratorio: todos los agentes con `gather` y luego el selector.
+
+    Returns:
+        tuple[str, float]: El correo elegido y el tiempo total en segundos.
+    """
+    start = time.perf_counter()
+    results = await asyncio.gather(*(Runner.run(agent, message) for agent in agents))
+    emails = "Emails de ventas en frío:\n\n".join(result.final_output for result in results)
+    best = await Runner.run(picker, emails)
+    return best.final_output, time.perf_counter() - start
+
+
+async def compare_with_gather(agents: list[Agent], message: str, picker: Agent, rounds: int = 3,
+                              **options) -> dict:
+    """
+    Ejecuta ambos modos `rounds` veces y muestra la latencia ahorrada por la salida temprana.
+
+    Args:
+        agents (list[Agent]): Agentes que redactan el correo.
+        message (str): Mensaje que recibe cada agente.
+        picker (Agent): Agente selector del flujo original.
+        rounds (int): Repeticiones de cada modo.
+        **options: Argumentos de `best_of_n` (quality_bar, deadline_seconds, scorer).
+
+    Returns:
+        dict: Tiempos medios de cada modo y latencia ahorrada.
+    """
+    gather_seconds, early_seconds, cancelled, reasons = [], [], 0, {}
+    for i in range(rounds):
+        _, seconds = await gather_and_pick(agents, message, picker)
+        gather_seconds.append(seconds)
+        result = await best_of_n(agents, message, **options)
+        early_seconds.append(result.seconds)
+        cancelled += len(result.cancelled)
+        reasons[result.reason] = reasons.get(result.reason, 0) + 1
+        print(f"Ronda {i + 1}: gather + selector {seconds:.1f}s, salida temprana {result.seconds:.1f}s "
+              f"({result.reason}, {len(result.cancelled)} cancelados)")
+
+    gather_avg = sum(gather_seconds) / rounds
+    early_avg = sum(early_seconds) / rounds
+    summary = {
+        "gather_avg_seconds": round(gather_avg, 2),
+        "early_exit_avg_seconds": round(early_avg, 2),
+        "latency_saved_seconds": round(gather_avg - early_avg, 2),
+        "latency_saved_pct": round(100 * (gather_avg - early_avg) / gather_avg, 1) if gather_avg else 0.0,
+        "cancelled_agents": cancelled,
+        "stop_reasons": reasons,
+    }
+    print(f"Latencia media: {gather_avg:.1f}s -> {early_avg:.1f}s "
+          f"(ahorro {summary['latency_saved_seconds']:.1f}s, {summary['latency_saved_pct']:.0f}%)")
+    return summary
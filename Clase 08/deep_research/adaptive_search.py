@@ -0,0 +1,84 @@
+"""
+Módulo de la Búsqueda Adaptativa.
+
+Este módulo ejecuta un plan de búsquedas en el modo configurado. En el modo fijo se
+lanzan todas las búsquedas del plan a la vez; en el adaptativo se lanzan en olas y se
+deja de buscar cuando la última ola ya no aporta información nueva (ver `coverage.py`).
+
+El `ResearchManager` le pasa su método `perform_searches`, que ejecuta una lista de
+búsquedas en paralelo con sus límites, su caché y sus métricas.
+"""
+
+from typing import Awaitable, Callable
+
+import config
+from coverage import CoverageTracker
+from planner_agent import WebSearchPlan
+
+PerformSearches = Callable[[WebSearchPlan], Awaitable[list[str]]]
+
+
+async def run_search_plan(search_plan: WebSearchPlan, perform_searches: PerformSearches,
+                          adaptive: bool) -> tuple[list[str], dict]:
+    """
+    Ejecuta el plan de búsqueda en el modo configurado (fijo o adaptativo).
+
+    Args:
+        search_plan (WebSearchPlan): El plan que contiene los elementos de búsqueda.
+        perform_searches (Callable): Corrutina que ejecuta en paralelo las búsquedas de un plan.
+        adaptive (bool): Si es True, busca en olas (ver `search_in_waves`).
+
+    Returns:
+        tuple[list[str], dict]: Los resúmenes obtenidos y las búsquedas planificadas,
+        ejecutadas y ahorradas.
+    """
+    if adaptive:
+        return await search_in_waves(search_plan, perform_searches)
+    results = await perform_searches(search_plan)
+    planned = len(search_plan.searches)
+    return results, {"planned": planned, "executed": planned, "saved": 0, "waves": []}
+
+
+async def search_in_waves(search_plan: WebSearchPlan,
+                          perform_searches: PerformSearches) -> tuple[list[str], dict]:
+    """
+    Ejecuta las búsquedas en olas, deteniéndose cuando dejan de aportar información nueva.
+
+    La primera ola lanza `config.ADAPTIVE_INITIAL_WAVE` búsquedas; cada ola siguiente lanza
+    `config.ADAPTIVE_WAVE_SIZE` más, pero solo si la novedad media de la ola anterior
+    (proporción de términos que no aparecían en resúmenes previos) supera
+    `config.ADAPTIVE_NOVELTY_THRESHOLD`. El plan se recorre en orden, por lo que las
+    búsquedas más importantes se ejecutan primero.
+
+    Args:
+        search_plan (WebSearchPlan): El plan que contiene los elementos de búsqueda.
+        perform_searches (Callable): Corrutina que ejecuta en paralelo las búsquedas de un plan.
+
+    Returns:
+        tuple[list[str], dict]: Los resúmenes obtenidos y las búsquedas planificadas,
+        ejecutadas y ahorradas, con la novedad de cada ola.
+    """
+    pending = list(search_plan.searches)
+    tracker = CoverageTracker()
+    results: list[str] = []
+    waves: list[dict] = []
+    wave_size = config.ADAPTIVE_INITIAL_WAVE
+
+    while pending:
+        wave, pending = pending[:wave_size], pending[wave_size:]
+        wave_results = await perform_searches(WebSearchPlan(searches=wave))
+        for summary in wave_results:
+            tracker.add(summary)
+        results.extend(wave_results)
+
+        novelty = tracker.marginal_novelty(len(wave_results))
+        waves.append({"searches": len(wave), "novelty": round(novelty, 3)})
+        print(f"Ola {len(waves)}: {len(wave)} búsquedas, novedad {novelty:.0%}")
+        if novelty < config.ADAPTIVE_NOVELTY_THRESHOLD:
+            break
+        wave_size = config.ADAPTIVE_WAVE_SIZE
+
+    planned = len(search_plan.searches)
+    executed = sum(w["searches"] for w in waves)
+    print(f"Búsqueda adaptativa: {executed}/{planned} búsquedas ejecutadas, {planned - executed} ahorradas")
+    return results, {"planned": planned, "executed": executed, "saved": planned - executed, "waves": waves}
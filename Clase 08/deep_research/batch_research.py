@@ -0,0 +1,263 @@
+"""
+Punto de Entrada para Investigación por Lotes.
+
+Este módulo ejecuta el `ResearchManager` sobre una lista de consultas leída desde un
+archivo de texto (una consulta por línea; se ignoran las líneas vacías y las que
+comienzan con '#'). Está pensado para ejecuciones nocturnas sin interfaz gráfica:
+
+- Limita la concurrencia global de cada etapa (planificador, búsqueda, escritor).
+- Comparte una única caché de búsquedas entre todas las consultas del lote.
+- Guarda cada informe completado en disco, de modo que una nueva ejecución omite
+  las consultas ya resueltas (punto de control).
+- Escribe un resumen de rendimiento y costo en `batch_summary.json`.
+- Opcionalmente envía cada informe por correo, o todos juntos en un único correo resumen.
+
+Uso:
+    $ python batch_research.py temas.txt
+    $ python batch_research.py temas.txt --searches 4 --output-dir informes --max-queries 8
+    $ python batch_research.py temas.txt --email digest
+    $ python batch_research.py --profile-startup   # desglose del tiempo de importación
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import re
+import time
+from datetime import datetime
+
+from dotenv import load_dotenv
+
+import config
+from mail_transport import digest, get_transport
+from metrics import REGISTRY, start_metrics_server
+from research_manager import ResearchManager, StageLimits
+from run_costs import estimate_cost, usage_by_model
+from search_cache import SearchCache
+
+from comun.startup import profile_startup, wants_profile
+from comun.task_router import get_task_router
+from comun.usage import get_usage_ledger
+
+# Cargar variables de entorno desde el archivo .env
+load_dotenv(override=True)
+
+
+def read_queries(path: str) -> list[str]:
+    """
+    Lee las consultas del archivo indicado, sin duplicados y conservando el orden.
+
+    Args:
+        path (str): Ruta del archivo de consultas.
+
+    Returns:
+        list[str]: Las consultas a investigar.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        lines = [line.strip() for line in f]
+    return list(dict.fromkeys(line for line in lines if line and not line.startswith("#")))
+
+
+def report_basename(query: str) -> str:
+    """
+    Genera un nombre de archivo estable y legible para una consulta.
+
+    Args:
+        query (str): La consulta de investigación.
+
+    Returns:
+        str: Nombre base (sin extensión) con un slug y un hash corto de la consulta.
+    """
+    slug = re.sub(r"[^\w]+", "-", query.lower()).strip("-")[:60]
+    query_hash = hashlib.sha1(query.encode("utf-8")).hexdigest()[:10]
+    return f"{slug}-{query_hash}"
+
+
+async def research_query(query: str, num_searches: int, output_dir: str, limits: StageLimits,
+                         search_cache: SearchCache, query_slots: asyncio.Semaphore, email: bool = False,
+                         adaptive: bool = False) -> dict:
+    """
+    Investiga una consulta y guarda el informe, o la omite si ya existe su punto de control.
+
+    Args:
+        query (str): La consulta de investigación.
+        num_searches (int): Cantidad de búsquedas por consulta.
+        output_dir (str): Directorio donde se guardan los informes.
+        limits (StageLimits): Límites de concurrencia compartidos por etapa.
+        search_cache (SearchCache): Caché de búsquedas compartida.
+        query_slots (asyncio.Semaphore): Límite de consultas investigadas en simultáneo.
+        email (bool): Si es True, entrega el informe por correo al terminar.
+        adaptive (bool): Si es True, usa la búsqueda adaptativa por olas.
+
+    Returns:
+        dict: Registro con el estado ("completed", "skipped" o "failed") y sus métricas.
+    """
+    basename = os.path.join(output_dir, report_basename(query))
+    if os.path.exists(f"{basename}.json"):
+        return {"query": query, "status": "skipped"}
+
+    async with query_slots:
+        manager = ResearchManager(limits=limits, search_cache=search_cache, adaptive=adaptive)
+        start = time.perf_counter()
+        try:
+            report = await manager.research(query, num_searches)
+            if email and not report.markdown_report.startswith("# Error de Generación"):
+                await manager.send_email(report)
+        except Exception as e:
+            print(f"Error al investigar '{query}': {e}")
+            return {"query": query, "status": "failed", "error": str(e)}
+        seconds = time.perf_counter() - start
+
+    # write_report devuelve un informe de error en lugar de lanzar: no lo guardamos como completado
+    if report.markdown_report.startswith("# Error de Generación"):
+        return {"query": query, "status": "failed", "error": report.short_summary}
+
+    record = {
+        "query": query,
+        "status": "completed",
+        "seconds": round(seconds, 2),
+        "web_searches": manager.web_searches,
+        "usage": usage_by_model(manager.metrics.run_id),
+        "cost_usd": round(estimate_cost(manager.metrics.run_id, manager.web_searches), 6),
+        "email_savings": manager.email_savings,
+        "search_stats": manager.search_stats,
+        "local_index": manager.local_stats.to_dict(),
+    }
+
+    # El .md se escribe antes que el .json: el .json es la marca de informe completado
+    with open(f"{basename}.md", "w", encoding="utf-8") as f:
+        f.write(report.markdown_report)
+    with open(f"{basename}.json", "w", encoding="utf-8") as f:
+        json.dump({**record, "finished_at": datetime.now().isoformat(), "report": report.model_dump()},
+                  f, ensure_ascii=False, indent=2)
+
+    print(f"Informe completado en {seconds:.1f}s: {query}")
+    return record
+
+
+def summarize(records: list[dict], wall_seconds: float, search_cache: SearchCache) -> dict:
+    """
+    Calcula el resumen de rendimiento y costo del lote.
+
+    Args:
+        records (list[dict]): Registros devueltos por `research_query`.
+        wall_seconds (float): Duración total del lote en segundos.
+        search_cache (SearchCache): La caché compartida (para su tasa de aciertos).
+
+    Returns:
+        dict: El resumen del lote.
+    """
+    completed = [r for r in records if r["status"] == "completed"]
+    input_tokens = sum(t["input_tokens"] for r in completed for t in r["usage"].values())
+    output_tokens = sum(t["output_tokens"] for r in completed for t in r["usage"].values())
+    cost = sum(r["cost_usd"] for r in completed)
+    return {
+        "queries": len(records),
+        "completed": len(completed),
+        "skipped": sum(r["status"] == "skipped" for r in records),
+        "failed": sum(r["status"] == "failed" for r in records),
+        "wall_seconds": round(wall_seconds, 2),
+        "reports_per_hour": round(len(completed) * 3600 / wall_seconds, 2) if wall_seconds else 0.0,
+        "avg_seconds_per_report": round(sum(r["seconds"] for r in completed) / len(completed), 2) if completed else 0.0,
+        "web_searches": sum(r["web_searches"] for r in completed),
+        "local_index_lookups": sum(r["local_index"]["lookups"] for r in completed),
+        "local_index_hit_ratio": round(
+            sum(r["local_index"]["hits"] for r in completed) / max(1, sum(r["local_index"]["lookups"] for r in completed)), 3),
+        "searches_saved": sum(r["search_stats"]["saved"] for r in completed if r["search_stats"]),
+        "search_cache_hits": search_cache.hits,
+        "search_cache_hit_rate": round(search_cache.hit_rate, 3),
+        "input_tokens": input_tokens,
+        "output_tokens": output_tokens,
+        "cost_usd": round(cost, 4),
+        "cost_per_report_usd": round(cost / len(completed), 4) if completed else 0.0,
+        "email_seconds_saved": round(sum(r["email_savings"]["seconds"] for r in completed if r["email_savings"]), 1),
+        "email_tokens_saved": sum(r["email_savings"]["tokens"] for r in completed if r["email_savings"]),
+        "stage_p95_seconds": {stage: round(p95, 2) for stage, p95 in REGISTRY.p95_by_stage().items()},
+        "failures": [{"query": r["query"], "error": r["error"]} for r in records if r["status"] == "failed"],
+    }
+
+
+async def run_batch(queries: list[str], num_searches: int, output_dir: str, max_queries: int,
+                    email: str = "none", adaptive: bool = False) -> dict:
+    """
+    Investiga todas las consultas con límites globales de concurrencia.
+
+    Args:
+        queries (list[str]): Las consultas a investigar.
+        num_searches (int): Cantidad de búsquedas por consulta.
+        output_dir (str): Directorio de salida para informes y resumen.
+        max_queries (int): Máximo de consultas investigadas en simultáneo.
+        email (str): "none" (sin correo), "each" (un correo por informe) o "digest" (un único resumen).
+        adaptive (bool): Si es True, usa la búsqueda adaptativa por olas.
+
+    Returns:
+        dict: El resumen del lote (también se guarda en `batch_summary.json`).
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    limits = StageLimits(
+        planner=config.BATCH_PLANNER_CONCURRENCY,
+        search=config.BATCH_SEARCH_CONCURRENCY,
+        writer=config.BATCH_WRITER_CONCURRENCY,
+    )
+    search_cache = SearchCache()
+    query_slots = asyncio.Semaphore(max_queries)
+
+    start = time.perf_counter()
+    records = await asyncio.gather(*(
+        research_query(query, num_searches, output_dir, limits, search_cache, query_slots, email != "none", adaptive)
+        for query in queries
+    ))
+    summary = summarize(records, time.perf_counter() - start, search_cache)
+
+    if email == "digest":
+        summary["digest_email"] = await digest.flush(get_transport())
+
+    with open(os.path.join(output_dir, "batch_summary.json"), "w", encoding="utf-8") as f:
+        json.dump(summary, f, ensure_ascii=False, indent=2)
+    return summary
+
+
+def main():
+    if wants_profile():
+        profile_startup(["batch_research"])
+    parser = argparse.ArgumentParser(description="Ejecuta la investigación profunda sobre un archivo de consultas.")
+    parser.add_argument("queries_file", help="Archivo de texto con una consulta por línea.")
+    parser.add_argument("--searches", type=int, default=config.DEFAULT_SEARCH_COUNT,
+                        help="Cantidad de búsquedas por consulta.")
+    parser.add_argument("--output-dir", default=config.BATCH_OUTPUT_DIR,
+                        help="Directorio donde guardar los informes y el resumen.")
+    parser.add_argument("--max-queries", type=int, default=config.BATCH_MAX_CONCURRENT_QUERIES,
+                        help="Máximo de consultas investigadas en simultáneo.")
+    parser.add_argument("--email", choices=["none", "each", "digest"], default="none",
+                        help="Entrega por correo: ninguno, uno por informe o un único resumen al final.")
+    parser.add_argument("--adaptive", action="store_true", default=config.ADAPTIVE_SEARCH,
+                        help="Busca en olas y se detiene cuando las búsquedas dejan de aportar información nueva.")
+    args = parser.parse_args()
+
+    if args.email == "digest":
+        config.EMAIL_DELIVERY_MODE = "digest"
+
+    num_searches = max(config.MIN_SEARCH_COUNT, min(config.MAX_SEARCH_COUNT, args.searches))
+    queries = read_queries(args.queries_file)
+    start_metrics_server()
+    print(f"Investigando {len(queries)} consultas con {num_searches} búsquedas cada una...")
+
+    summary = asyncio.run(run_batch(queries, num_searches, args.output_dir, args.max_queries, args.email, args.adaptive))
+
+    print("\n=== Resumen del lote ===")
+    for key, value in summary.items():
+        if key not in ("failures", "digest_email"):
+            print(f"{key:>24}: {value}")
+    for failure in summary["failures"]:
+        print(f"  ❌ {failure['query']}: {failure['error']}")
+    # Un único resumen para todo el lote: `research` no imprime el de cada consulta
+    if router_report := get_task_router().report():
+        print(f"\n{router_report}")
+    print("\n=== Consumo de LLM del lote ===")
+    print(get_usage_ledger().report())
+
+
+if __name__ == "__main__":
+    main()
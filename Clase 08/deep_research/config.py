@@ -29,8 +29,85 @@ EMAIL_RECIPIENT = os.getenv("EMAIL_RECIPIENT", "juangabriel@frogames.es")
 
 SENDGRID_API_KEY = os.getenv('SENDGRID_API_KEY')
 
+# --- Configuración de Entrega de Correo ---
+# Transporte a utilizar: "sendgrid" (por defecto) o "smtp" (ej. un servidor local de pruebas).
+MAIL_BACKEND = os.getenv("MAIL_BACKEND", "sendgrid")
+
+# Host de la API de SendGrid; puede apuntar a un servidor HTTP local que la imite en pruebas.
+SENDGRID_HOST = os.getenv("SENDGRID_HOST", "https://api.sendgrid.com")
+
+# Servidor SMTP usado cuando MAIL_BACKEND="smtp".
+SMTP_HOST = os.getenv("SMTP_HOST", "localhost")
+SMTP_PORT = int(os.getenv("SMTP_PORT", "1025"))
+
+# Máximo de envíos simultáneos compartidos por todo el proceso.
+MAIL_MAX_CONCURRENCY = int(os.getenv("MAIL_MAX_CONCURRENCY", "4"))
+
+# Modo de entrega: "immediate" envía cada informe al terminar; "digest" los agrupa en un único correo.
+EMAIL_DELIVERY_MODE = os.getenv("EMAIL_DELIVERY_MODE", "immediate")
+
+# En la interfaz, cada cuántos segundos se envía el correo resumen con los informes acumulados.
+DIGEST_FLUSH_INTERVAL_SECONDS = float(os.getenv("DIGEST_FLUSH_INTERVAL_SECONDS", "3600"))
+
+# Cómo se da formato al correo: "local" convierte el Markdown a HTML sin llamar a ningún modelo;
+# "llm" usa el Agente de Correo (una generación adicional de varios miles de tokens por informe).
+EMAIL_RENDER_MODE = os.getenv("EMAIL_RENDER_MODE", "local")
+
+# Supuestos para estimar lo que ahorra el renderizado local frente al Agente de Correo.
+CHARS_PER_TOKEN = 4
+EMAIL_LLM_OUTPUT_TOKENS_PER_SECOND = 80
+
+# Buzón de salida en disco para los correos que fallaron, y su política de reintentos.
+OUTBOX_DIR = os.getenv("OUTBOX_DIR", "outbox")
+OUTBOX_MAX_ATTEMPTS = 5
+OUTBOX_RETRY_BASE_SECONDS = 30
+OUTBOX_RETRY_INTERVAL_SECONDS = 60
+
 # --- Configuración de Búsqueda ---
 # Definimos los límites y valores por defecto para la cantidad de fuentes a investigar.
 DEFAULT_SEARCH_COUNT = 6
 MIN_SEARCH_COUNT = 3
 MAX_SEARCH_COUNT = 20
+
+# Búsqueda adaptativa: en lugar de ejecutar todas las búsquedas planificadas, se lanzan en olas
+# y se detiene cuando la novedad (proporción de términos nuevos en los resúmenes) cae por debajo
+# del umbral. Se activa con ADAPTIVE_SEARCH=1 o desde la interfaz.
+ADAPTIVE_SEARCH = os.getenv("ADAPTIVE_SEARCH", "0") == "1"
+ADAPTIVE_INITIAL_WAVE = 3
+ADAPTIVE_WAVE_SIZE = 2
+ADAPTIVE_NOVELTY_THRESHOLD = float(os.getenv("ADAPTIVE_NOVELTY_THRESHOLD", "0.25"))
+
+# Índice local (SQLite FTS5) con los resúmenes de búsquedas anteriores. El Agente de Búsqueda lo
+# consulta primero y solo usa la búsqueda web si los resultados locales son antiguos o insuficientes.
+LOCAL_INDEX_ENABLED = os.getenv("LOCAL_INDEX_ENABLED", "1") == "1"
+LOCAL_INDEX_PATH = os.getenv("LOCAL_INDEX_PATH", "local_index.sqlite")
+LOCAL_INDEX_MAX_AGE_HOURS = float(os.getenv("LOCAL_INDEX_MAX_AGE_HOURS", "72"))
+LOCAL_INDEX_MIN_HITS = 2
+LOCAL_INDEX_MIN_COVERAGE = 0.6
+
+# Reintentos de cada búsqueda individual antes de descartarla.
+SEARCH_MAX_RETRIES = 1
+
+# --- Configuración de Métricas ---
+# Archivo JSON Lines donde se agregan los tramos (spans) de cada ejecución.
+METRICS_JSONL_PATH = os.getenv("METRICS_JSONL_PATH", "metrics.jsonl")
+
+# Puerto del endpoint /metrics en formato Prometheus (0 = deshabilitado).
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))
+
+# --- Configuración de Ejecución por Lotes ---
+# Límites globales de concurrencia por etapa cuando se investigan muchas consultas a la vez
+# (ver batch_research.py). Evitan saturar los límites de tasa de la API de OpenAI.
+BATCH_MAX_CONCURRENT_QUERIES = int(os.getenv("BATCH_MAX_CONCURRENT_QUERIES", "4"))
+BATCH_PLANNER_CONCURRENCY = int(os.getenv("BATCH_PLANNER_CONCURRENCY", "4"))
+BATCH_SEARCH_CONCURRENCY = int(os.getenv("BATCH_SEARCH_CONCURRENCY", "12"))
+BATCH_WRITER_CONCURRENCY = int(os.getenv("BATCH_WRITER_CONCURRENCY", "2"))
+
+# Directorio donde se guardan los informes completados (sirve como punto de control entre ejecuciones)
+BATCH_OUTPUT_DIR = os.getenv("BATCH_OUTPUT_DIR", "reports")
+
+# --- Configuración de Costos ---
+# Los precios de los modelos están en la tabla compartida de comun/usage.py (USAGE_PRICES_PATH
+# para cambiarlos); aquí solo el de la herramienta de búsqueda, que no es un modelo.
+# Costo en USD por cada llamada a la herramienta de búsqueda web alojada (WebSearchTool)
+WEB_SEARCH_PRICE_PER_CALL = 0.025
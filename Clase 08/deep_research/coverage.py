@@ -0,0 +1,102 @@
+"""
+Módulo de Cobertura de Búsquedas.
+
+Este módulo mide cuánta información nueva aporta cada resumen de búsqueda. El modo
+de búsqueda adaptativa del `ResearchManager` lo usa para decidir si vale la pena
+lanzar otra ola de búsquedas o si las anteriores ya cubren el tema.
+
+La novedad de un resumen es la proporción de sus términos (palabras relevantes,
+cifras y entidades con mayúscula inicial) que no aparecían en los resúmenes previos.
+"""
+
+import re
+
+# Palabras frecuentes en español e inglés que no aportan información sobre el tema
+STOPWORDS = frozenset("""
+    algo algunos ante antes aunque cada como con contra cual cuales cuando desde donde durante
+    ella ellas ellos entre esta estas este esto estos hasta hace hacia mediante mientras mismo
+    mucho muchos muy nada ni nos nuestra nuestro otra otras otro otros para pero poco por porque
+    puede pueden que quien segun según sera será sido siendo sobre solo sólo son tambien también
+    tanto tiene tienen todo todos tras una unas uno unos usted esta está están estan fue fueron
+    han hay ser sus les las los del más mas menos mejor entre tras sino
+    about after also among and are been before being between both but can could does doing during
+    each from further have having here into its itself just more most other over same should some
+    such than that their them then there these they this those through under until very was were
+    what when where which while will with would your
+""".split())
+
+_WORD = re.compile(r"[^\W_]+", re.UNICODE)
+_ENTITY = re.compile(r"\b([A-ZÁÉÍÓÚÑ][\w\-]+(?:\s+[A-ZÁÉÍÓÚÑ][\w\-]+)+)")
+
+
+def extract_terms(text: str) -> set[str]:
+    """
+    Extrae los términos informativos de un texto.
+
+    Incluye palabras de 4 o más letras que no son palabras vacías, números (años,
+    cifras) y entidades de varias palabras con mayúscula inicial (ej. "Banco Central").
+
+    Args:
+        text (str): El texto a analizar.
+
+    Returns:
+        set[str]: Los términos normalizados a minúsculas.
+    """
+    terms = {
+        word for word in (w.lower() for w in _WORD.findall(text))
+        if (len(word) >= 4 or word.isdigit()) and word not in STOPWORDS
+    }
+    for entity in _ENTITY.findall(text):
+        # Quitar artículos iniciales de principio de oración ("El Banco Central" -> "banco central")
+        words = entity.lower().split()
+        while words and (words[0] in STOPWORDS or len(words[0]) <= 3):
+            words.pop(0)
+        if len(words) > 1:
+            terms.add(" ".join(words))
+    return terms
+
+
+class CoverageTracker:
+    """
+    Acumula los términos vistos y mide la novedad de cada nuevo resumen.
+
+    Atributos:
+        seen (set[str]): Términos vistos hasta el momento.
+        novelties (list[float]): Novedad de cada resumen agregado, en orden.
+    """
+
+    def __init__(self):
+        self.seen: set[str] = set()
+        self.novelties: list[float] = []
+
+    def add(self, summary: str) -> float:
+        """
+        Agrega un resumen y devuelve su novedad.
+
+        Args:
+            summary (str): El resumen de una búsqueda.
+
+        Returns:
+            float: Proporción (0.0 - 1.0) de términos del resumen que no se habían visto.
+        """
+        terms = extract_terms(summary)
+        novelty = len(terms - self.seen) / len(terms) if terms else 0.0
+        self.seen |= terms
+        self.novelties.append(novelty)
+        return novelty
+
+    def marginal_novelty(self, last: int) -> float:
+        """
+        Novedad media de los últimos `last` resúmenes.
+
+        El primer resumen de la investigación se excluye porque siempre es 100% nuevo y
+        no indica nada sobre la cobertura.
+
+        Args:
+            last (int): Cantidad de resúmenes recientes a considerar.
+
+        Returns:
+            float: La novedad media, o 1.0 si todavía no hay datos suficientes.
+        """
+        recent = self.novelties[1:][-last:] if last else []
+        return sum(recent) / len(recent) if recent else 1.0
@@ -4,23 +4,32 @@ Punto de Entrada de la Aplicación de Investigación Profunda.
 Este módulo inicializa la interfaz Gradio para la aplicación de Investigación Profunda (Deep Research).
 Sirve como punto de entrada principal para que los usuarios interactúen con los agentes de investigación.
 
+El `ResearchManager` (y con él el SDK de agentes y todos los agentes) se importa en segundo
+plano después de lanzar la interfaz, así que la página queda disponible antes.
+
 Uso:
     Ejecute el script para lanzar la interfaz web:
     $ python deep_research.py
+    $ python deep_research.py --profile-startup   # desglose del tiempo de importación
 """
 
+import threading
+
 import gradio as gr
 from dotenv import load_dotenv
 import config
 
 # Importaciones internas
-from research_manager import ResearchManager
+from mail_transport import MailWorker, digest
+from metrics import start_metrics_server
+
+from comun.startup import profile_startup, wants_profile
 
 # Cargar variables de entorno desde el archivo .env
 load_dotenv(override=True)
 
 
-async def run(query: str, num_searches: float):
+async def run(query: str, num_searches: float, adaptive: bool = config.ADAPTIVE_SEARCH):
     """
     Ejecuta el proceso de investigación para una consulta dada.
 
@@ -31,14 +40,17 @@ async def run(query: str, num_searches: float):
     Args:
         query (str): El tema o pregunta de investigación proporcionada por el usuario.
         num_searches (float): El número de fuentes a buscar (Gradio pasa float para sliders numéricos).
+        adaptive (bool): Si es True, las búsquedas se detienen cuando dejan de aportar información nueva.
 
     Yields:
         str: Actualizaciones de estado y el informe final en markdown.
     """
     # Inicializar y ejecutar el Gestor de Investigación (Research Manager)
     try:
+        # Normalmente ya lo importó preload_research_manager; si no, se importa aquí
+        from research_manager import ResearchManager
         # Convertir a int porque ResearchManager espera un entero
-        async for chunk in ResearchManager().run(query, int(num_searches)):
+        async for chunk in ResearchManager(adaptive=adaptive).run(query, int(num_searches)):
             yield chunk
     except Exception as e:
         # Capturar cualquier error no controlado que suba hasta la UI
@@ -46,6 +58,14 @@ async def run(query: str, num_searches: float):
         yield error_message
 
 
+def preload_research_manager() -> None:
+    """
+    Importa `research_manager` en un hilo de fondo para que la primera consulta no pague
+    la importación del SDK de agentes.
+    """
+    threading.Thread(target=lambda: __import__("research_manager"), name="preload", daemon=True).start()
+
+
 # Inicializar la Interfaz de Gradio
 # Usamos un contexto Blocks para definir el diseño de la aplicación web.
 with gr.Blocks(theme=gr.themes.Default(primary_hue="sky")) as ui:
@@ -65,6 +85,14 @@ with gr.Blocks(theme=gr.themes.Default(primary_hue="sky")) as ui:
         info="Selecciona cuántas búsquedas independientes realizar para recopilar información."
     )
     
+    # Casilla para la búsqueda adaptativa
+    # Con ella activada, el slider indica el máximo de fuentes y se detiene al dejar de encontrar información nueva.
+    adaptive_checkbox = gr.Checkbox(
+        value=config.ADAPTIVE_SEARCH,
+        label="Búsqueda adaptativa",
+        info="Busca en olas y se detiene cuando las nuevas fuentes ya no aportan información nueva."
+    )
+    
     # Sección de control
     run_button = gr.Button("Ejecutar", variant="primary")
     
@@ -73,10 +101,21 @@ with gr.Blocks(theme=gr.themes.Default(primary_hue="sky")) as ui:
     
     # Oyentes de eventos (Event listeners)
     # Activar la función run al hacer clic en el botón o enviar texto
-    # Ahora pasamos ambos inputs: el texto y el valor del slider
-    run_button.click(fn=run, inputs=[query_textbox, search_count_slider], outputs=report)
-    query_textbox.submit(fn=run, inputs=[query_textbox, search_count_slider], outputs=report)
+    # Pasamos los inputs: el texto, el valor del slider y el modo adaptativo
+    run_button.click(fn=run, inputs=[query_textbox, search_count_slider, adaptive_checkbox], outputs=report)
+    query_textbox.submit(fn=run, inputs=[query_textbox, search_count_slider, adaptive_checkbox], outputs=report)
 
 # Lanzar la aplicación
 if __name__ == "__main__":
-    ui.launch(inbrowser=True)
+    if wants_profile():
+        profile_startup(["deep_research", "research_manager"])
+    preload_research_manager()
+    # Exponer /metrics en formato Prometheus si METRICS_PORT está configurado
+    start_metrics_server()
+    # Reintentos del buzón de salida y correo resumen mientras la interfaz está abierta
+    mail_worker = MailWorker(digest)
+    mail_worker.start()
+    try:
+        ui.launch(inbrowser=True)
+    finally:
+        mail_worker.stop()
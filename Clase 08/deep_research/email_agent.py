@@ -2,25 +2,25 @@
 Módulo del Agente de Correo Electrónico.
 
 Este módulo define el Agente de Correo, el cual maneja el formato y la entrega
-del informe final por correo electrónico utilizando SendGrid.
+del informe final por correo electrónico utilizando el transporte compartido
+de `mail_transport.py` (SendGrid por defecto).
 """
 
-import os
 import config
 from typing import Dict
 
-import sendgrid
-from sendgrid.helpers.mail import Email, Mail, Content, To
 from agents import Agent, function_tool
+from mail_transport import get_transport, digest
 
 
-@function_tool
-def send_email(subject: str, html_body: str) -> Dict[str, str]:
+async def deliver_email(subject: str, html_body: str) -> Dict[str, str]:
     """
-    Envía un correo electrónico con el asunto y cuerpo HTML proporcionados.
+    Entrega un correo electrónico con el asunto y cuerpo HTML proporcionados.
 
-    Esta función utiliza la API de SendGrid para enviar correos electrónicos. 
-    Los valores de configuración (clave API, remitente, destinatario) se recuperan 
+    El envío lo realiza el transporte de correo compartido (ver `mail_transport.py`),
+    que no bloquea el bucle de eventos. En modo resumen
+    (`EMAIL_DELIVERY_MODE="digest"`) el correo se acumula para enviarse junto a otros.
+    Los valores de configuración (clave API, remitente, destinatario) se recuperan
     del entorno o del módulo de configuración.
 
     Args:
@@ -30,30 +30,26 @@ def send_email(subject: str, html_body: str) -> Dict[str, str]:
     Returns:
         Dict[str, str]: Un diccionario de estado (ej. {"status": "success"}).
     """
-    sg = sendgrid.SendGridAPIClient(api_key=os.environ.get('SENDGRID_API_KEY'))
-    
-    # Configurar remitente y destinatario desde config
-    from_email = Email(config.EMAIL_SENDER) 
-    to_email = To(config.EMAIL_RECIPIENT) 
-    
-    content = Content("text/html", html_body)
-    mail = Mail(from_email, to_email, subject, content).get()
-    
-    try:
-        # Enviar la solicitud de correo electrónico
-        response = sg.client.mail.send.post(request_body=mail)
-        print("Respuesta de correo electrónico", response.status_code)
-        
-        # Validar el código de estado (2xx es éxito)
-        if 200 <= response.status_code < 300:
-            return {"status": "success"}
-        else:
-            return {"status": "error", "message": f"SendGrid returned {response.status_code}"}
-            
-    except Exception as e:
-        # Capturar errores de red o de la API de SendGrid
-        print(f"Error crítico al enviar correo: {e}")
-        return {"status": "error", "message": str(e)}
+    if config.EMAIL_DELIVERY_MODE == "digest":
+        pending = digest.add(subject, html_body)
+        return {"status": "success", "message": f"Agregado al correo resumen ({pending} pendientes)"}
+
+    return await get_transport().send(subject, html_body)
+
+
+@function_tool
+async def send_email(subject: str, html_body: str) -> Dict[str, str]:
+    """
+    Envía un correo electrónico con el asunto y cuerpo HTML proporcionados.
+
+    Args:
+        subject (str): La línea de asunto del correo electrónico.
+        html_body (str): El contenido HTML del correo electrónico.
+
+    Returns:
+        Dict[str, str]: Un diccionario de estado (ej. {"status": "success"}).
+    """
+    return await deliver_email(subject, html_body)
 
 
 # Instrucciones para el Agente de Correo
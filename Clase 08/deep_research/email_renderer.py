@@ -0,0 +1,277 @@
+"""
+Módulo del Renderizador de Correo.
+
+Este módulo convierte el informe en Markdown a un correo HTML de forma local y
+determinista, sin llamar a ningún modelo. Los estilos se escriben en línea
+(atributo `style`) porque muchos clientes de correo ignoran las hojas de estilo.
+
+Soporta el subconjunto de Markdown que produce el Agente Escritor: encabezados,
+párrafos, listas (anidadas, ordenadas y no ordenadas), citas, bloques de código,
+tablas, líneas horizontales y formato en línea (negrita, cursiva, código y enlaces).
+"""
+
+import html
+import re
+from urllib.parse import urlsplit
+
+# Estilos en línea para cada etiqueta del cuerpo del correo
+STYLES = {
+    "h1": "font-size:26px;color:#0c4a6e;margin:24px 0 12px;",
+    "h2": "font-size:21px;color:#0369a1;margin:22px 0 10px;border-bottom:1px solid #e0f2fe;padding-bottom:4px;",
+    "h3": "font-size:18px;color:#0369a1;margin:18px 0 8px;",
+    "h4": "font-size:16px;color:#075985;margin:16px 0 6px;",
+    "h5": "font-size:15px;color:#075985;margin:14px 0 6px;",
+    "h6": "font-size:14px;color:#075985;margin:12px 0 6px;",
+    "p": "margin:0 0 12px;line-height:1.6;",
+    "ul": "margin:0 0 12px;padding-left:24px;line-height:1.6;",
+    "ol": "margin:0 0 12px;padding-left:24px;line-height:1.6;",
+    "li": "margin:0 0 4px;",
+    "blockquote": "margin:0 0 12px;padding:8px 16px;border-left:4px solid #7dd3fc;color:#475569;background:#f0f9ff;",
+    "pre": "margin:0 0 12px;padding:12px;background:#f1f5f9;border-radius:4px;overflow-x:auto;font-size:13px;",
+    "code": "font-family:Consolas,Menlo,monospace;background:#f1f5f9;padding:1px 4px;border-radius:3px;",
+    "table": "border-collapse:collapse;margin:0 0 12px;width:100%;",
+    "th": "border:1px solid #cbd5e1;padding:6px 10px;background:#e0f2fe;text-align:left;",
+    "td": "border:1px solid #cbd5e1;padding:6px 10px;",
+    "hr": "border:none;border-top:1px solid #e2e8f0;margin:20px 0;",
+    "a": "color:#0284c7;",
+}
+
+TEMPLATE = """<!DOCTYPE html>
+<html lang="es">
+<head><meta charset="utf-8"><title>{title}</title></head>
+<body style="margin:0;padding:0;background:#f8fafc;">
+<div style="max-width:720px;margin:0 auto;padding:24px;background:#ffffff;font-family:Arial,Helvetica,sans-serif;font-size:15px;color:#1e293b;">
+<p style="margin:0 0 16px;padding:12px 16px;background:#f0f9ff;border-radius:4px;color:#0c4a6e;">{summary}</p>
+{body}
+</div>
+</body>
+</html>"""
+
+MAX_SUBJECT_LENGTH = 90
+
+
+def _tag(name: str, content: str = "", **attrs: str) -> str:
+    """Genera una etiqueta HTML con su estilo en línea."""
+    attributes = "".join(f' {key}="{html.escape(value, quote=True)}"' for key, value in attrs.items())
+    return f'<{name} style="{STYLES[name]}"{attributes}>{content}</{name}>'
+
+
+# Fragmentos protegidos: código en línea y enlaces. La URL admite paréntesis balanceados
+# (un nivel), como en https://es.wikipedia.org/wiki/Python_(lenguaje)
+_PROTECTED = re.compile(r"(`[^`]+`|\[[^\]]+\]\((?:[^()\s]|\([^()\s]*\))+\))")
+_LINK = re.compile(r"\[([^\]]+)\]\(((?:[^()\s]|\([^()\s]*\))+)\)")
+# Las URLs vienen de texto generado por el LLM y de la web: solo se enlazan estos esquemas
+# (un "javascript:" o "data:" se muestra como texto)
+SAFE_LINK_SCHEMES = {"http", "https", "mailto"}
+
+
+def _is_safe_url(url: str) -> bool:
+    """Indica si la URL usa un esquema permitido en los enlaces del correo."""
+    try:
+        return urlsplit(url).scheme.lower() in SAFE_LINK_SCHEMES
+    except ValueError:
+        return False
+
+
+def _render_emphasis(text: str) -> str:
+    """Escapa el texto y convierte la negrita y la cursiva."""
+    text = html.escape(text, quote=False)
+    text = re.sub(r"(\*\*|__)(.+?)\1", r"<strong>\2</strong>", text)
+    text = re.sub(r"(?<![\w*])\*(?!\s)(.+?)(?<!\s)\*(?![\w*])", r"<em>\1</em>", text)
+    text = re.sub(r"(?<![\w_])_(?!\s)(.+?)(?<!\s)_(?![\w_])", r"<em>\1</em>", text)
+    return text
+
+
+def render_inline(text: str) -> str:
+    """
+    Convierte el formato en línea de Markdown a HTML (escapando el resto del texto).
+
+    Args:
+        text (str): Texto de una línea o párrafo en Markdown.
+
+    Returns:
+        str: El HTML equivalente.
+    """
+    # Separar el código y los enlaces para que el formato de énfasis no altere su contenido
+    # (un "_" o "*" dentro de una URL no debe convertirse en cursiva)
+    rendered = []
+    for part in _PROTECTED.split(text):
+        link = _LINK.fullmatch(part)
+        if part.startswith("`") and part.endswith("`") and len(part) > 1:
+            rendered.append(_tag("code", html.escape(part[1:-1])))
+        elif link and _is_safe_url(link.group(2)):
+            rendered.append(_tag("a", _render_emphasis(link.group(1)), href=link.group(2)))
+        elif link:
+            rendered.append(_render_emphasis(link.group(1)))
+        else:
+            rendered.append(_render_emphasis(part))
+    return "".join(rendered)
+
+
+_LIST_ITEM = re.compile(r"^(\s*)([-*+]|\d+[.)])\s+(.*)$")
+_TABLE_SEPARATOR = re.compile(r"^\s*\|?\s*:?-{3,}:?\s*(\|\s*:?-{3,}:?\s*)*\|?\s*$")
+
+
+def _table_cells(line: str) -> list[str]:
+    return [cell.strip() for cell in line.strip().strip("|").split("|")]
+
+
+def markdown_to_html(markdown: str) -> str:
+    """
+    Convierte un documento Markdown a HTML con estilos en línea.
+
+    Args:
+        markdown (str): El documento en Markdown.
+
+    Returns:
+        str: El cuerpo HTML (sin la plantilla del correo).
+    """
+    lines = markdown.replace("\r\n", "\n").split("\n")
+    output: list[str] = []
+    paragraph: list[str] = []
+    # Pila de listas abiertas: (sangría, etiqueta)
+    lists: list[tuple[int, str]] = []
+
+    def flush_paragraph():
+        if paragraph:
+            output.append(_tag("p", render_inline(" ".join(paragraph))))
+            paragraph.clear()
+
+    def close_lists(indent: int = -1):
+        while lists and lists[-1][0] > indent:
+            output.append(f"</li></{lists.pop()[1]}>")
+
+    i = 0
+    while i < len(lines):
+        line = lines[i]
+        stripped = line.strip()
+
+        # Bloque de código delimitado
+        if stripped.startswith("```"):
+            flush_paragraph()
+            close_lists()
+            code = []
+            i += 1
+            while i < len(lines) and not lines[i].strip().startswith("```"):
+                code.append(lines[i])
+                i += 1
+            output.append(_tag("pre", f'<code style="font-family:Consolas,Menlo,monospace;">{html.escape(chr(10).join(code))}</code>'))
+            i += 1
+            continue
+
+        if not stripped:
+            flush_paragraph()
+            # Una línea vacía no cierra la lista si el siguiente elemento la continúa
+            if lists and not (i + 1 < len(lines) and _LIST_ITEM.match(lines[i + 1])):
+                close_lists()
+            i += 1
+            continue
+
+        heading = re.match(r"^(#{1,6})\s+(.*?)\s*#*$", stripped)
+        if heading:
+            flush_paragraph()
+            close_lists()
+            output.append(_tag(f"h{len(heading.group(1))}", render_inline(heading.group(2))))
+            i += 1
+            continue
+
+        if re.match(r"^([-*_])(\s*\1){2,}$", stripped):
+            flush_paragraph()
+            close_lists()
+            output.append(f'<hr style="{STYLES["hr"]}">')
+            i += 1
+            continue
+
+        if stripped.startswith(">"):
+            flush_paragraph()
+            close_lists()
+            quote = []
+            while i < len(lines) and lines[i].strip().startswith(">"):
+                quote.append(lines[i].strip()[1:].strip())
+                i += 1
+            output.append(_tag("blockquote", render_inline(" ".join(quote))))
+            continue
+
+        if "|" in stripped and i + 1 < len(lines) and _TABLE_SEPARATOR.match(lines[i + 1]):
+            flush_paragraph()
+            close_lists()
+            header = "".join(_tag("th", render_inline(cell)) for cell in _table_cells(stripped))
+            rows = [f"<tr>{header}</tr>"]
+            i += 2
+            while i < len(lines) and "|" in lines[i]:
+                cells = "".join(_tag("td", render_inline(cell)) for cell in _table_cells(lines[i]))
+                rows.append(f"<tr>{cells}</tr>")
+                i += 1
+            output.append(_tag("table", "".join(rows)))
+            continue
+
+        item = _LIST_ITEM.match(line)
+        if item:
+            flush_paragraph()
+            indent = len(item.group(1).expandtabs(4))
+            list_tag = "ul" if item.group(2) in "-*+" else "ol"
+            close_lists(indent)
+            if lists and lists[-1][0] == indent and lists[-1][1] == list_tag:
+                output.append("</li>")
+            else:
+                if lists and lists[-1][0] == indent:
+                    close_lists(indent - 1)
+                output.append(f'<{list_tag} style="{STYLES[list_tag]}">')
+                lists.append((indent, list_tag))
+            output.append(f'<li style="{STYLES["li"]}">{render_inline(item.group(3))}')
+            i += 1
+            continue
+
+        if lists:
+            # Continuación del texto del último elemento de la lista
+            output.append(" " + render_inline(stripped))
+        else:
+            paragraph.append(stripped)
+        i += 1
+
+    flush_paragraph()
+    close_lists()
+    return "\n".join(output)
+
+
+def subject_from_summary(short_summary: str, max_length: int = MAX_SUBJECT_LENGTH) -> str:
+    """
+    Deriva el asunto del correo a partir del resumen corto del informe.
+
+    Usa la primera oración del resumen y la recorta en un límite de palabra si es
+    demasiado larga.
+
+    Args:
+        short_summary (str): El resumen de 2-3 oraciones del informe.
+        max_length (int): Longitud máxima del asunto.
+
+    Returns:
+        str: El asunto del correo.
+    """
+    summary = " ".join(short_summary.split())
+    if not summary:
+        return "Informe de investigación"
+    first_sentence = re.split(r"(?<=[.!?])\s", summary, maxsplit=1)[0].rstrip(".")
+    if len(first_sentence) <= max_length:
+        return first_sentence
+    return first_sentence[:max_length - 1].rsplit(" ", 1)[0].rstrip(",;:") + "…"
+
+
+def render_report_email(short_summary: str, markdown_report: str) -> tuple[str, str]:
+    """
+    Genera el asunto y el cuerpo HTML completo del correo de un informe.
+
+    Args:
+        short_summary (str): El resumen corto del informe.
+        markdown_report (str): El informe completo en Markdown.
+
+    Returns:
+        tuple[str, str]: El asunto y el HTML del correo.
+    """
+    subject = subject_from_summary(short_summary)
+    body = TEMPLATE.format(
+        title=html.escape(subject),
+        summary=render_inline(" ".join(short_summary.split())),
+        body=markdown_to_html(markdown_report),
+    )
+    return subject, body
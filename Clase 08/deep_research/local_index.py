@@ -0,0 +1,210 @@
+"""
+Módulo del Índice Local de Búsqueda.
+
+Este módulo guarda en un índice de texto completo (SQLite FTS5, con ranking BM25)
+los resúmenes que produce el Agente de Búsqueda junto con las fuentes citadas.
+El agente lo consulta primero mediante la herramienta `search_local_index`: si el
+índice tiene resultados suficientes y recientes para la búsqueda, se evita la
+búsqueda web alojada, que es más lenta y tiene un costo por llamada.
+"""
+
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from contextlib import contextmanager
+from typing import Iterator
+
+import config
+from comun.search_cache import normalize_query
+
+_TERM = re.compile(r"[^\W_]+", re.UNICODE)
+_URL = re.compile(r"https?://[^\s)\]>\"']+")
+
+
+def _fold(text: str) -> str:
+    """Convierte a minúsculas y elimina los acentos (igual que el tokenizador del índice)."""
+    decomposed = unicodedata.normalize("NFKD", text.lower())
+    return "".join(c for c in decomposed if not unicodedata.combining(c))
+
+
+def query_terms(query: str) -> list[str]:
+    """
+    Extrae los términos de una consulta (palabras de 3 o más caracteres, sin repetir).
+
+    Args:
+        query (str): La consulta de búsqueda.
+
+    Returns:
+        list[str]: Los términos en minúsculas y sin acentos, en el orden en que aparecen.
+    """
+    return list(dict.fromkeys(_fold(t) for t in _TERM.findall(query) if len(t) >= 3 or t.isdigit()))
+
+
+class LocalLookupStats:
+    """
+    Estadísticas de consultas al índice local durante una ejecución.
+
+    Se pasa como contexto de `Runner.run` para que la herramienta del agente
+    registre en ella cada consulta.
+
+    Atributos:
+        hits (int): Consultas con resultados suficientes y recientes.
+        stale (int): Consultas con resultados, pero antiguos o insuficientes.
+        misses (int): Consultas sin resultados.
+        seconds (list[float]): Latencia de cada consulta.
+    """
+
+    def __init__(self):
+        self.hits = 0
+        self.stale = 0
+        self.misses = 0
+        self.seconds: list[float] = []
+
+    def record(self, status: str, seconds: float) -> None:
+        """Registra el resultado de una consulta al índice."""
+        if status == "hit":
+            self.hits += 1
+        elif status == "stale":
+            self.stale += 1
+        else:
+            self.misses += 1
+        self.seconds.append(seconds)
+
+    @property
+    def lookups(self) -> int:
+        return self.hits + self.stale + self.misses
+
+    @property
+    def hit_ratio(self) -> float:
+        """Proporción de consultas resueltas por el índice local (0.0 - 1.0)."""
+        return self.hits / self.lookups if self.lookups else 0.0
+
+    @property
+    def avg_ms(self) -> float:
+        """Latencia media de las consultas al índice, en milisegundos."""
+        return 1000 * sum(self.seconds) / len(self.seconds) if self.seconds else 0.0
+
+    def to_dict(self) -> dict:
+        return {
+            "lookups": self.lookups,
+            "hits": self.hits,
+            "stale": self.stale,
+            "misses": self.misses,
+            "hit_ratio": round(self.hit_ratio, 3),
+            "avg_ms": round(self.avg_ms, 2),
+        }
+
+
+class LocalIndex:
+    """
+    Índice de texto completo de resúmenes de búsqueda persistido en SQLite.
+
+    Atributos:
+        path (str): Ruta del archivo de base de datos.
+    """
+
+    def __init__(self, path: str = config.LOCAL_INDEX_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        with self._connection() as conn:
+            conn.execute(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS documents USING fts5("
+                "query, summary, sources UNINDEXED, fetched_at UNINDEXED, "
+                "tokenize='unicode61 remove_diacritics 2')"
+            )
+
+    @contextmanager
+    def _connection(self) -> Iterator[sqlite3.Connection]:
+        """Abre una conexión, confirma la transacción al salir y la cierra siempre."""
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def add(self, query: str, summary: str) -> None:
+        """
+        Guarda el resumen de una búsqueda junto con las URLs que cita.
+
+        Args:
+            query (str): La consulta que originó el resumen.
+            summary (str): El resumen producido por el Agente de Búsqueda.
+        """
+        sources = " ".join(dict.fromkeys(url.rstrip(".,;:") for url in _URL.findall(summary)))
+        key = normalize_query(query)
+        terms = query_terms(query)
+        with self._lock, self._connection() as conn:
+            # Reemplaza el resumen anterior de la misma consulta: FTS5 no admite claves únicas,
+            # así que se buscan candidatos por sus términos y se comparan normalizados
+            if terms:
+                match = "query : (" + " AND ".join(f'"{term}"' for term in terms) + ")"
+                candidates = conn.execute("SELECT rowid, query FROM documents WHERE documents MATCH ?", (match,))
+                previous = [(rowid,) for rowid, text in candidates.fetchall() if normalize_query(text) == key]
+                conn.executemany("DELETE FROM documents WHERE rowid = ?", previous)
+            conn.execute(
+                "INSERT INTO documents (query, summary, sources, fetched_at) VALUES (?, ?, ?, ?)",
+                (query, summary, sources, time.time()),
+            )
+
+    def lookup(self, query: str, limit: int = 3) -> dict:
+        """
+        Busca resúmenes relevantes para la consulta y evalúa si son suficientes.
+
+        El resultado es un acierto ("hit") si hay al menos `LOCAL_INDEX_MIN_HITS` resultados
+        con menos de `LOCAL_INDEX_MAX_AGE_HOURS` horas de antigüedad que, en conjunto, cubren
+        al menos `LOCAL_INDEX_MIN_COVERAGE` de los términos de la consulta. Si hay resultados
+        pero no cumplen esas condiciones, es "stale"; si no hay ninguno, "miss".
+
+        Args:
+            query (str): La consulta de búsqueda.
+            limit (int): Máximo de resultados a devolver.
+
+        Returns:
+            dict: Estado ("hit", "stale" o "miss"), resultados y latencia en segundos.
+        """
+        start = time.perf_counter()
+        terms = query_terms(query)
+        fresh, old = [], []
+        if terms:
+            match = " OR ".join(f'"{term}"' for term in terms)
+            cutoff = time.time() - config.LOCAL_INDEX_MAX_AGE_HOURS * 3600
+            select = (
+                "SELECT query, summary, sources, fetched_at, bm25(documents) AS score FROM documents "
+                "WHERE documents MATCH ? AND fetched_at {} ? ORDER BY score LIMIT ?"
+            )
+            with self._connection() as conn:
+                # La antigüedad se filtra antes del LIMIT: un resumen viejo no ocupa el lugar de uno reciente
+                fresh = conn.execute(select.format(">="), (match, cutoff, limit)).fetchall()
+                if len(fresh) < limit:
+                    old = conn.execute(select.format("<"), (match, cutoff, limit - len(fresh))).fetchall()
+
+        now = time.time()
+        results = [
+            {"query": q, "summary": summary, "sources": sources.split(), "age_hours": round((now - fetched_at) / 3600, 1)}
+            for q, summary, sources, fetched_at, _ in fresh + old
+        ]
+        # Cobertura por palabras completas: "arte" no cuenta como presente dentro de "aparte"
+        tokens = {_fold(t) for q, summary, *_ in fresh for t in _TERM.findall(f"{q} {summary}")}
+        coverage = sum(term in tokens for term in terms) / len(terms) if terms else 0.0
+
+        if len(fresh) >= config.LOCAL_INDEX_MIN_HITS and coverage >= config.LOCAL_INDEX_MIN_COVERAGE:
+            status = "hit"
+        elif results:
+            status = "stale"
+        else:
+            status = "miss"
+        return {"status": status, "coverage": round(coverage, 2), "results": results, "seconds": time.perf_counter() - start}
+
+
+_index: LocalIndex | None = None
+
+
+def get_local_index() -> LocalIndex:
+    """Devuelve el índice local compartido, creándolo la primera vez."""
+    global _index
+    if _index is None:
+        _index = LocalIndex()
+    return _index
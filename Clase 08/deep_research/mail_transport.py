@@ -0,0 +1,392 @@
+"""
+Módulo de Transporte de Correo.
+
+Este módulo centraliza la entrega de correos electrónicos de la aplicación:
+
+- `SendGridTransport` envía por la API de SendGrid. El cliente se configura una sola vez,
+  pero cada envío abre su propia conexión HTTPS (el cliente de SendGrid no las reutiliza).
+- `SmtpTransport` envía por SMTP; sirve para usar un servidor local de pruebas
+  (ej. `python -m aiosmtpd -n -l localhost:1025`) en lugar de SendGrid.
+- Los envíos se ejecutan en hilos (`asyncio.to_thread`) para no bloquear el bucle de
+  eventos que está ejecutando el resto de las tareas de investigación.
+- `Outbox` guarda en disco los correos que no se pudieron entregar y los reintenta
+  con espera exponencial.
+- `DigestBuffer` agrupa varios informes terminados en un único correo (modo resumen).
+- `MailWorker` hace ambas cosas en segundo plano mientras la interfaz está abierta: reintenta
+  el buzón de salida, envía el resumen cada `DIGEST_FLUSH_INTERVAL_SECONDS` y, al cerrar,
+  envía lo que quede.
+
+Uso (reintentar los correos pendientes del buzón de salida):
+    $ python mail_transport.py --retry-outbox
+    $ python mail_transport.py --worker
+"""
+
+import abc
+import argparse
+import asyncio
+import atexit
+import html
+import json
+import os
+import smtplib
+import threading
+import time
+import uuid
+from email.mime.text import MIMEText
+
+import config
+
+
+class MailTransport(abc.ABC):
+    """
+    Clase base de los transportes de correo.
+
+    Limita la cantidad de envíos simultáneos y, si un envío falla, lo deja en el
+    buzón de salida para reintentarlo más tarde.
+
+    Métodos:
+        send(subject, html_body): Envía un correo sin bloquear el bucle de eventos.
+        deliver(subject, html_body): Envío síncrono; lo implementa cada transporte.
+    """
+
+    def __init__(self, outbox: "Outbox | None" = None, max_concurrency: int = config.MAIL_MAX_CONCURRENCY):
+        self.outbox = outbox
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+
+    @abc.abstractmethod
+    def deliver(self, subject: str, html_body: str) -> None:
+        """
+        Entrega el correo de forma síncrona. Lanza una excepción si falla.
+
+        Args:
+            subject (str): La línea de asunto.
+            html_body (str): El contenido HTML.
+        """
+
+    def _deliver_limited(self, subject: str, html_body: str) -> None:
+        with self._slots:
+            self.deliver(subject, html_body)
+
+    async def send(self, subject: str, html_body: str) -> dict[str, str]:
+        """
+        Envía un correo en un hilo aparte; si falla, lo guarda en el buzón de salida.
+
+        Args:
+            subject (str): La línea de asunto.
+            html_body (str): El contenido HTML.
+
+        Returns:
+            dict[str, str]: Estado del envío ("success", "queued" o "error").
+        """
+        try:
+            await asyncio.to_thread(self._deliver_limited, subject, html_body)
+            return {"status": "success"}
+        except Exception as e:
+            print(f"Error al enviar correo: {e}")
+            if self.outbox is None:
+                return {"status": "error", "message": str(e)}
+            self.outbox.put(subject, html_body, error=str(e))
+            return {"status": "queued", "message": f"Guardado en el buzón de salida para reintentar: {e}"}
+
+
+class SendGridTransport(MailTransport):
+    """
+    Transporte que usa la API de SendGrid.
+
+    El cliente (API key y host) se crea una vez por proceso. No hay un pool de conexiones:
+    el cliente de SendGrid usa urllib y cada envío abre y cierra su propia conexión HTTPS.
+
+    El host es configurable (`SENDGRID_HOST`) para poder apuntar a un servidor HTTP
+    local que imite la API durante las pruebas.
+    """
+
+    def __init__(self, outbox: "Outbox | None" = None, max_concurrency: int = config.MAIL_MAX_CONCURRENCY):
+        super().__init__(outbox, max_concurrency)
+        # Importación diferida: solo es necesaria si se usa este transporte
+        import sendgrid
+        self.client = sendgrid.SendGridAPIClient(api_key=config.SENDGRID_API_KEY, host=config.SENDGRID_HOST)
+
+    def deliver(self, subject: str, html_body: str) -> None:
+        from sendgrid.helpers.mail import Email, Mail, Content, To
+
+        mail = Mail(Email(config.EMAIL_SENDER), To(config.EMAIL_RECIPIENT), subject, Content("text/html", html_body)).get()
+        response = self.client.client.mail.send.post(request_body=mail)
+        print("Respuesta de correo electrónico", response.status_code)
+        if not 200 <= response.status_code < 300:
+            raise RuntimeError(f"SendGrid returned {response.status_code}")
+
+
+class SmtpTransport(MailTransport):
+    """Transporte que envía por SMTP (ej. a un servidor local de pruebas)."""
+
+    def deliver(self, subject: str, html_body: str) -> None:
+        message = MIMEText(html_body, "html", "utf-8")
+        message["Subject"] = subject
+        message["From"] = config.EMAIL_SENDER
+        message["To"] = config.EMAIL_RECIPIENT
+        with smtplib.SMTP(config.SMTP_HOST, config.SMTP_PORT, timeout=30) as smtp:
+            smtp.send_message(message)
+
+
+class Outbox:
+    """
+    Buzón de salida en disco para correos pendientes de entrega.
+
+    Cada correo se guarda como un archivo JSON con su cantidad de intentos y el
+    momento del próximo reintento (espera exponencial).
+
+    Atributos:
+        directory (str): Directorio donde se guardan los correos pendientes.
+    """
+
+    def __init__(self, directory: str = config.OUTBOX_DIR):
+        self.directory = directory
+
+    def put(self, subject: str, html_body: str, error: str = "", attempts: int = 1) -> str:
+        """
+        Guarda un correo pendiente.
+
+        Args:
+            subject (str): La línea de asunto.
+            html_body (str): El contenido HTML.
+            error (str): El último error de entrega.
+            attempts (int): Intentos realizados hasta ahora.
+
+        Returns:
+            str: Ruta del archivo creado.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, f"{int(time.time())}-{uuid.uuid4().hex[:8]}.json")
+        self._write(path, {
+            "subject": subject,
+            "html_body": html_body,
+            "attempts": attempts,
+            "last_error": error,
+            "next_attempt_at": time.time() + self._backoff(attempts),
+        })
+        return path
+
+    def pending(self) -> list[str]:
+        """Devuelve las rutas de los correos pendientes, del más antiguo al más reciente."""
+        if not os.path.isdir(self.directory):
+            return []
+        return sorted(os.path.join(self.directory, name) for name in os.listdir(self.directory) if name.endswith(".json"))
+
+    async def drain(self, transport: MailTransport, force: bool = False) -> dict[str, int]:
+        """
+        Reintenta los correos pendientes cuyo momento de reintento ya llegó.
+
+        Los que superan `OUTBOX_MAX_ATTEMPTS` se renombran a `.failed` y dejan de reintentarse.
+
+        Args:
+            transport (MailTransport): El transporte con el que reintentar.
+            force (bool): Si es True, reintenta todos sin respetar la espera.
+
+        Returns:
+            dict[str, int]: Cantidad de correos entregados, pendientes y descartados.
+        """
+        stats = {"delivered": 0, "pending": 0, "failed": 0}
+        for path in self.pending():
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+            if not force and entry["next_attempt_at"] > time.time():
+                stats["pending"] += 1
+                continue
+            try:
+                await asyncio.to_thread(transport._deliver_limited, entry["subject"], entry["html_body"])
+            except Exception as e:
+                entry["attempts"] += 1
+                entry["last_error"] = str(e)
+                if entry["attempts"] >= config.OUTBOX_MAX_ATTEMPTS:
+                    os.replace(path, path[:-len(".json")] + ".failed")
+                    stats["failed"] += 1
+                else:
+                    entry["next_attempt_at"] = time.time() + self._backoff(entry["attempts"])
+                    self._write(path, entry)
+                    stats["pending"] += 1
+                continue
+            os.remove(path)
+            stats["delivered"] += 1
+        return stats
+
+    async def run_worker(self, transport: MailTransport, interval: float = config.OUTBOX_RETRY_INTERVAL_SECONDS) -> None:
+        """
+        Bucle infinito que vacía el buzón de salida cada `interval` segundos.
+
+        Args:
+            transport (MailTransport): El transporte con el que reintentar.
+            interval (float): Segundos entre cada revisión del buzón.
+        """
+        while True:
+            stats = await self.drain(transport)
+            if any(stats.values()):
+                print(f"Buzón de salida: {stats}")
+            await asyncio.sleep(interval)
+
+    @staticmethod
+    def _backoff(attempts: int) -> float:
+        return config.OUTBOX_RETRY_BASE_SECONDS * 2 ** (attempts - 1)
+
+    @staticmethod
+    def _write(path: str, entry: dict) -> None:
+        # Escritura atómica para no dejar archivos a medias si el proceso se interrumpe
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(entry, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+
+class DigestBuffer:
+    """
+    Acumula varios correos y los envía juntos como un único correo resumen.
+
+    Útil en ejecuciones por lotes: en lugar de un correo por informe, se envía uno
+    solo con un índice y todos los informes terminados.
+    """
+
+    def __init__(self):
+        self._items: list[tuple[str, str]] = []
+        self._lock = threading.Lock()
+
+    def add(self, subject: str, html_body: str) -> int:
+        """
+        Agrega un correo al resumen.
+
+        Args:
+            subject (str): La línea de asunto del informe.
+            html_body (str): El contenido HTML del informe.
+
+        Returns:
+            int: Cantidad de correos acumulados.
+        """
+        with self._lock:
+            self._items.append((subject, html_body))
+            return len(self._items)
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    async def flush(self, transport: MailTransport) -> dict[str, str] | None:
+        """
+        Envía todos los correos acumulados en uno solo y vacía el buffer.
+
+        Args:
+            transport (MailTransport): El transporte a utilizar.
+
+        Returns:
+            dict[str, str] | None: El estado del envío, o None si no había nada que enviar.
+        """
+        with self._lock:
+            items, self._items = self._items, []
+        if not items:
+            return None
+
+        index = "".join(f'<li><a href="#informe-{i}">{html.escape(subject)}</a></li>' for i, (subject, _) in enumerate(items))
+        sections = "<hr>".join(
+            f'<section id="informe-{i}"><h1>{html.escape(subject)}</h1>{body}</section>'
+            for i, (subject, body) in enumerate(items)
+        )
+        subject = f"Resumen de investigación: {len(items)} informes"
+        return await transport.send(subject, f"<h1>{html.escape(subject)}</h1><ol>{index}</ol><hr>{sections}")
+
+
+class MailWorker:
+    """
+    Tareas de correo en segundo plano para procesos de larga duración (la interfaz Gradio).
+
+    En un hilo aparte, cada `interval` segundos reintenta el buzón de salida y, si hay
+    informes acumulados en modo resumen desde hace al menos `digest_interval` segundos,
+    envía el resumen. Al detenerse (también al salir del proceso) envía lo que quede.
+
+    Atributos:
+        buffer (DigestBuffer): El buffer del modo resumen.
+        transport (MailTransport | None): El transporte con el que enviar; si es None, se usa
+            el compartido (`get_transport`), que se crea en el primer envío y no en el arranque.
+    """
+
+    def __init__(self, buffer: DigestBuffer, transport: MailTransport | None = None,
+                 interval: float = config.OUTBOX_RETRY_INTERVAL_SECONDS,
+                 digest_interval: float = config.DIGEST_FLUSH_INTERVAL_SECONDS):
+        self.transport = transport
+        self.buffer = buffer
+        self.interval = interval
+        self.digest_interval = digest_interval
+        self._stopped = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._last_flush = time.monotonic()
+
+    def start(self) -> None:
+        """Arranca el hilo de fondo y registra el envío final al salir del proceso."""
+        self._thread = threading.Thread(target=self._run, name="mail-worker", daemon=True)
+        self._thread.start()
+        atexit.register(self.stop)
+
+    def _run(self) -> None:
+        while not self._stopped.wait(self.interval):
+            try:
+                asyncio.run(self.tick())
+            except Exception as e:
+                print(f"Error en las tareas de correo de fondo: {e}")
+
+    async def tick(self, final: bool = False) -> None:
+        """Reintenta el buzón de salida y envía el resumen si toca (o siempre, si `final`)."""
+        transport = self.transport or get_transport()
+        if transport.outbox is not None and transport.outbox.pending():
+            stats = await transport.outbox.drain(transport)
+            if stats["delivered"] or stats["failed"]:
+                print(f"Buzón de salida: {stats}")
+        if len(self.buffer) and (final or time.monotonic() - self._last_flush >= self.digest_interval):
+            print(f"Correo resumen: {await self.buffer.flush(transport)}")
+            self._last_flush = time.monotonic()
+
+    def stop(self) -> None:
+        """Detiene el hilo y envía el resumen pendiente (si falla, queda en el buzón de salida)."""
+        if self._stopped.is_set():
+            return
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join(timeout=30)
+        try:
+            asyncio.run(self.tick(final=True))
+        except Exception as e:
+            print(f"No se pudo enviar el correo resumen pendiente: {e}")
+
+
+_transport: MailTransport | None = None
+_transport_lock = threading.Lock()
+digest = DigestBuffer()
+
+
+def get_transport() -> MailTransport:
+    """
+    Devuelve el transporte de correo compartido, creándolo la primera vez.
+
+    El tipo de transporte se elige con `config.MAIL_BACKEND` ("sendgrid" o "smtp").
+
+    Returns:
+        MailTransport: La instancia compartida del transporte.
+    """
+    global _transport
+    # Se llama desde el event loop (vía to_thread) y desde el hilo de MailWorker
+    with _transport_lock:
+        if _transport is None:
+            transport_class = SmtpTransport if config.MAIL_BACKEND == "smtp" else SendGridTransport
+            _transport = transport_class(outbox=Outbox())
+        return _transport
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gestiona el buzón de salida de correos pendientes.")
+    parser.add_argument("--retry-outbox", action="store_true", help="Reintenta una vez todos los correos pendientes.")
+    parser.add_argument("--worker", action="store_true", help="Reintenta los correos pendientes de forma continua.")
+    args = parser.parse_args()
+
+    transport = get_transport()
+    if args.worker:
+        asyncio.run(transport.outbox.run_worker(transport))
+    else:
+        print(asyncio.run(transport.outbox.drain(transport, force=args.retry_outbox)))
+
+
+if __name__ == "__main__":
+    main()
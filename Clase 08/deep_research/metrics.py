@@ -0,0 +1,339 @@
+"""
+Módulo de Métricas.
+
+Este módulo registra la latencia, los tokens, los reintentos y los fallos de cada
+etapa del pipeline de investigación (plan, search, write, email).
+
+- `PipelineMetrics` agrupa los tramos (spans) de una ejecución, los exporta a un
+  archivo JSON Lines y muestra una tabla resumen al terminar.
+- `MetricsRegistry` acumula las métricas de todas las ejecuciones del proceso y las
+  expone en formato de texto de Prometheus, para detectar qué etapa domina la
+  latencia p95 bajo carga.
+
+Uso (exponer las métricas en http://localhost:9100/metrics):
+    $ METRICS_PORT=9100 python deep_research.py
+"""
+
+import json
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import config
+
+from comun.usage import UsageRecord, percentile
+
+STAGES = ("plan", "search", "write", "email")
+
+# Límites superiores (en segundos) de los buckets del histograma de duración
+DURATION_BUCKETS = (0.5, 1, 2.5, 5, 10, 20, 30, 60, 120, 300)
+
+
+class Span:
+    """
+    Un tramo de ejecución de una etapa del pipeline.
+
+    Atributos:
+        stage (str): La etapa ("plan", "search", "write" o "email").
+        wait_seconds (float): Tiempo esperando un turno del límite de concurrencia.
+        seconds (float): Duración total del tramo (incluida la espera).
+        model (str | None): Modelo usado por el agente, si corresponde.
+        requests (int): Peticiones al modelo.
+        input_tokens (int): Tokens de entrada consumidos.
+        output_tokens (int): Tokens de salida generados.
+        cost_usd (float): Costo según la tabla de precios compartida (comun/usage.py).
+        retries (int): Reintentos realizados dentro del tramo.
+        failed (bool): Si el tramo terminó con error.
+        error (str | None): Descripción del error, si lo hubo.
+    """
+
+    def __init__(self, stage: str):
+        self.stage = stage
+        self.wait_seconds = 0.0
+        self.seconds = 0.0
+        self.model: str | None = None
+        self.requests = 0
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self.cost_usd = 0.0
+        self.retries = 0
+        self.failed = False
+        self.error: str | None = None
+        self._start = time.perf_counter()
+
+    def mark_started(self) -> None:
+        """Marca el fin de la espera por el límite de concurrencia."""
+        self.wait_seconds = time.perf_counter() - self._start
+
+    def active_seconds(self) -> float:
+        """Segundos transcurridos en el tramo sin contar la espera por el límite de concurrencia."""
+        return time.perf_counter() - self._start - self.wait_seconds
+
+    def add_usage(self, record: UsageRecord) -> None:
+        """
+        Suma el consumo de una ejecución de agente, tal como quedó en el registro de consumo.
+
+        Args:
+            record (UsageRecord): El registro devuelto por `UsageLedger.record_agent_run`.
+        """
+        self.model = record.model
+        self.requests += record.requests
+        self.input_tokens += record.prompt_tokens
+        self.output_tokens += record.completion_tokens
+        self.cost_usd += record.cost_usd or 0.0
+
+    def fail(self, error: Exception | str) -> None:
+        """Marca el tramo como fallido."""
+        self.failed = True
+        self.error = str(error)
+
+    def to_dict(self) -> dict:
+        return {
+            "stage": self.stage,
+            "seconds": round(self.seconds, 3),
+            "wait_seconds": round(self.wait_seconds, 3),
+            "model": self.model,
+            "requests": self.requests,
+            "input_tokens": self.input_tokens,
+            "output_tokens": self.output_tokens,
+            "retries": self.retries,
+            "failed": self.failed,
+            "error": self.error,
+            "cost_usd": round(self.cost_usd, 6),
+        }
+
+
+class MetricsRegistry:
+    """
+    Acumulador de métricas de todas las ejecuciones del proceso.
+
+    Guarda contadores e histogramas por etapa (para Prometheus) y una ventana de las
+    duraciones más recientes para calcular percentiles.
+    """
+
+    def __init__(self, window: int = 1000):
+        self._lock = threading.Lock()
+        self._window = window
+        self._stages: dict[str, dict] = {}
+        self.in_flight_runs = 0
+
+    def _stage(self, stage: str) -> dict:
+        return self._stages.setdefault(stage, {
+            "count": 0, "failures": 0, "retries": 0,
+            "input_tokens": 0, "output_tokens": 0, "cost_usd": 0.0,
+            "seconds_sum": 0.0, "buckets": [0] * len(DURATION_BUCKETS),
+            "recent": deque(maxlen=self._window),
+        })
+
+    def observe(self, span: Span) -> None:
+        """Registra un tramo terminado."""
+        with self._lock:
+            data = self._stage(span.stage)
+            data["count"] += 1
+            data["failures"] += span.failed
+            data["retries"] += span.retries
+            data["input_tokens"] += span.input_tokens
+            data["output_tokens"] += span.output_tokens
+            data["cost_usd"] += span.cost_usd
+            data["seconds_sum"] += span.seconds
+            data["recent"].append(span.seconds)
+            for i, bound in enumerate(DURATION_BUCKETS):
+                if span.seconds <= bound:
+                    data["buckets"][i] += 1
+
+    def p95_by_stage(self) -> dict[str, float]:
+        """Devuelve la latencia p95 reciente de cada etapa."""
+        with self._lock:
+            return {stage: percentile(list(data["recent"]), 95) for stage, data in self._stages.items()}
+
+    def render_prometheus(self) -> str:
+        """
+        Genera las métricas en el formato de texto de Prometheus.
+
+        Returns:
+            str: El cuerpo de la respuesta para el endpoint `/metrics`.
+        """
+        lines = [
+            "# HELP deep_research_stage_seconds Duración de cada etapa del pipeline.",
+            "# TYPE deep_research_stage_seconds histogram",
+        ]
+        with self._lock:
+            stages = {stage: dict(data, recent=list(data["recent"])) for stage, data in self._stages.items()}
+            in_flight = self.in_flight_runs
+        for stage, data in stages.items():
+            for bound, count in zip(DURATION_BUCKETS, data["buckets"]):
+                lines.append(f'deep_research_stage_seconds_bucket{{stage="{stage}",le="{bound}"}} {count}')
+            lines.append(f'deep_research_stage_seconds_bucket{{stage="{stage}",le="+Inf"}} {data["count"]}')
+            lines.append(f'deep_research_stage_seconds_sum{{stage="{stage}"}} {data["seconds_sum"]:.3f}')
+            lines.append(f'deep_research_stage_seconds_count{{stage="{stage}"}} {data["count"]}')
+
+        counters = [
+            ("failures", "deep_research_stage_failures_total", "Tramos terminados con error."),
+            ("retries", "deep_research_stage_retries_total", "Reintentos realizados."),
+            ("input_tokens", "deep_research_stage_input_tokens_total", "Tokens de entrada consumidos."),
+            ("output_tokens", "deep_research_stage_output_tokens_total", "Tokens de salida generados."),
+            ("cost_usd", "deep_research_stage_cost_usd_total", "Costo estimado en USD."),
+        ]
+        for key, name, help_text in counters:
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} counter"]
+            lines += [f'{name}{{stage="{stage}"}} {data[key]}' for stage, data in stages.items()]
+
+        lines += [
+            "# HELP deep_research_stage_p95_seconds Latencia p95 de las ejecuciones recientes.",
+            "# TYPE deep_research_stage_p95_seconds gauge",
+        ]
+        lines += [f'deep_research_stage_p95_seconds{{stage="{stage}"}} {percentile(data["recent"], 95):.3f}'
+                  for stage, data in stages.items()]
+        lines += [
+            "# HELP deep_research_runs_in_flight Investigaciones en curso.",
+            "# TYPE deep_research_runs_in_flight gauge",
+            f"deep_research_runs_in_flight {in_flight}",
+        ]
+        return "\n".join(lines) + "\n"
+
+
+# Registro compartido por todo el proceso
+REGISTRY = MetricsRegistry()
+
+
+class PipelineMetrics:
+    """
+    Métricas de una ejecución del pipeline de investigación.
+
+    Atributos:
+        run_id (str): Identificador de la ejecución.
+        query (str): La consulta investigada.
+        spans (list[Span]): Los tramos registrados.
+    """
+
+    def __init__(self, query: str = "", run_id: str | None = None, registry: MetricsRegistry = REGISTRY):
+        self.run_id = run_id or uuid.uuid4().hex
+        self.query = query
+        self.spans: list[Span] = []
+        self.registry = registry
+
+    @contextmanager
+    def span(self, stage: str):
+        """
+        Registra un tramo de la etapa indicada mientras dura el bloque `with`.
+
+        Si el bloque lanza una excepción, el tramo se marca como fallido y la excepción
+        se propaga.
+
+        Args:
+            stage (str): La etapa del pipeline.
+
+        Yields:
+            Span: El tramo, para registrar tokens, reintentos o fallos.
+        """
+        span = Span(stage)
+        try:
+            yield span
+        except Exception as e:
+            span.fail(e)
+            raise
+        finally:
+            span.seconds = time.perf_counter() - span._start
+            self.spans.append(span)
+            self.registry.observe(span)
+
+    def summary_rows(self) -> list[dict]:
+        """
+        Agrega los tramos de la ejecución por etapa.
+
+        Returns:
+            list[dict]: Una fila por etapa con conteos, latencias, tokens y costo.
+        """
+        rows = []
+        for stage in STAGES + tuple(sorted({s.stage for s in self.spans} - set(STAGES))):
+            spans = [s for s in self.spans if s.stage == stage]
+            if not spans:
+                continue
+            durations = [s.seconds for s in spans]
+            rows.append({
+                "stage": stage,
+                "count": len(spans),
+                "failures": sum(s.failed for s in spans),
+                "retries": sum(s.retries for s in spans),
+                "p50_s": percentile(durations, 50),
+                "p95_s": percentile(durations, 95),
+                "max_s": max(durations),
+                "wait_s": sum(s.wait_seconds for s in spans),
+                "input_tokens": sum(s.input_tokens for s in spans),
+                "output_tokens": sum(s.output_tokens for s in spans),
+                "cost_usd": sum(s.cost_usd for s in spans),
+            })
+        return rows
+
+    def format_summary(self) -> str:
+        """
+        Genera la tabla resumen de la ejecución en texto plano.
+
+        Returns:
+            str: La tabla con una fila por etapa y una fila de totales.
+        """
+        header = f"{'etapa':<8}{'n':>4}{'fallos':>8}{'reint.':>8}{'p50 s':>8}{'p95 s':>8}{'máx s':>8}{'espera s':>10}{'tok in':>9}{'tok out':>9}{'USD':>9}"
+        lines = [header, "-" * len(header)]
+        rows = self.summary_rows()
+        for r in rows:
+            lines.append(f"{r['stage']:<8}{r['count']:>4}{r['failures']:>8}{r['retries']:>8}{r['p50_s']:>8.2f}{r['p95_s']:>8.2f}"
+                         f"{r['max_s']:>8.2f}{r['wait_s']:>10.2f}{r['input_tokens']:>9}{r['output_tokens']:>9}{r['cost_usd']:>9.4f}")
+        lines.append("-" * len(header))
+        lines.append(f"{'total':<8}{sum(r['count'] for r in rows):>4}{sum(r['failures'] for r in rows):>8}"
+                     f"{sum(r['retries'] for r in rows):>8}{'':>34}{sum(r['input_tokens'] for r in rows):>9}"
+                     f"{sum(r['output_tokens'] for r in rows):>9}{sum(r['cost_usd'] for r in rows):>9.4f}")
+        return "\n".join(lines)
+
+    def export_jsonl(self, path: str = config.METRICS_JSONL_PATH) -> None:
+        """
+        Agrega los tramos de la ejecución al archivo JSON Lines indicado (una línea por tramo).
+
+        Args:
+            path (str): Ruta del archivo JSON Lines.
+        """
+        timestamp = datetime.now().isoformat()
+        with open(path, "a", encoding="utf-8") as f:
+            for span in self.spans:
+                record = {"run_id": self.run_id, "query": self.query, "timestamp": timestamp, **span.to_dict()}
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    registry = REGISTRY
+
+    def do_GET(self):
+        if self.path.rstrip("/") != "/metrics":
+            self.send_error(404)
+            return
+        body = self.registry.render_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Silenciar el registro de cada petición de Prometheus
+        pass
+
+
+def start_metrics_server(port: int = config.METRICS_PORT) -> ThreadingHTTPServer | None:
+    """
+    Inicia el endpoint `/metrics` en un hilo en segundo plano.
+
+    Args:
+        port (int): Puerto donde escuchar. Si es 0, no se inicia el servidor.
+
+    Returns:
+        ThreadingHTTPServer | None: El servidor iniciado, o None si está deshabilitado.
+    """
+    if not port:
+        return None
+    server = ThreadingHTTPServer(("0.0.0.0", port), _MetricsHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    print(f"Métricas disponibles en http://localhost:{port}/metrics")
+    return server
@@ -14,6 +14,7 @@ from agents import Agent
 # por lo que estas instrucciones son generales.
 INSTRUCTIONS = "Eres un asistente de investigación útil. Dado un término de búsqueda y una cantidad objetivo, \
 produce un conjunto de búsquedas web para realizar para responder la consulta. \
+Ordena las búsquedas de la más a la menos importante para responder la consulta. \
 Salida: el número solicitado de términos para consultar."
 
 
@@ -39,6 +40,24 @@ class WebSearchPlan(BaseModel):
     searches: list[WebSearchItem] = Field(description="Una lista de búsquedas web a realizar para responder la consulta.")
 
 
+def is_valid_plan(plan: WebSearchPlan, num_searches: int) -> bool:
+    """
+    Control de calidad de un plan generado por un modelo local.
+
+    Args:
+        plan (WebSearchPlan): El plan a validar.
+        num_searches (int): Cantidad de búsquedas solicitada.
+
+    Returns:
+        bool: True si el plan tiene al menos la mitad de las búsquedas pedidas, sin
+        consultas vacías ni repetidas.
+    """
+    if not isinstance(plan, WebSearchPlan):
+        return False
+    queries = [item.query.strip().lower() for item in plan.searches]
+    return len(queries) >= max(1, num_searches // 2) and all(queries) and len(set(queries)) == len(queries)
+
+
 # Inicializar el Agente Planificador
 planner_agent = Agent(
     name="Agente de planificación",
@@ -7,14 +7,45 @@ Escritor, Correo) para satisfacer la consulta de investigación del usuario.
 """
 
 from agents import Runner, trace, gen_trace_id
+from contextlib import nullcontext
 import asyncio
+import time
 import config
 
+from comun.task_router import get_task_router
+from comun.usage import get_usage_ledger
+
 # Importaciones de agentes
 from search_agent import search_agent
-from planner_agent import planner_agent, WebSearchItem, WebSearchPlan
+from planner_agent import planner_agent, is_valid_plan, WebSearchItem, WebSearchPlan
 from writer_agent import writer_agent, ReportData
-from email_agent import email_agent
+from email_agent import email_agent, INSTRUCTIONS as EMAIL_INSTRUCTIONS, deliver_email
+from email_renderer import render_report_email
+from metrics import PipelineMetrics, REGISTRY
+from search_cache import SearchCache
+from local_index import LocalLookupStats, get_local_index
+from adaptive_search import run_search_plan
+from run_costs import record_agent_usage
+
+
+class StageLimits:
+    """
+    Límites de concurrencia compartidos entre varias instancias de `ResearchManager`.
+
+    Cada etapa (planificación, búsqueda, redacción) tiene su propio semáforo, de modo
+    que al investigar muchas consultas en paralelo la cantidad total de llamadas
+    simultáneas a cada agente no supera el límite configurado.
+
+    Atributos:
+        planner (asyncio.Semaphore): Límite para el Agente Planificador.
+        search (asyncio.Semaphore): Límite para el Agente de Búsqueda.
+        writer (asyncio.Semaphore): Límite para el Agente Escritor.
+    """
+
+    def __init__(self, planner: int, search: int, writer: int):
+        self.planner = asyncio.Semaphore(planner)
+        self.search = asyncio.Semaphore(search)
+        self.writer = asyncio.Semaphore(writer)
 
 
 class ResearchManager:
@@ -24,15 +55,46 @@ class ResearchManager:
     Esta clase coordina la planificación, ejecución, síntesis y entrega
     de un informe de investigación basado en la consulta de un usuario.
 
+    Atributos:
+        limits (StageLimits | None): Límites de concurrencia globales por etapa (opcional).
+        search_cache (SearchCache | None): Caché de búsquedas compartida (opcional).
+        web_searches (int): Cantidad de búsquedas web alojadas realizadas por el Agente de Búsqueda.
+        local_stats (LocalLookupStats): Aciertos y latencia del índice local en esta instancia.
+        email_savings (dict | None): Segundos y tokens ahorrados por el renderizado local del último correo.
+        metrics (PipelineMetrics): Tramos de latencia, tokens, reintentos y fallos de cada etapa.
+        adaptive (bool): Si es True, las búsquedas se lanzan en olas mientras aporten información nueva.
+        search_stats (dict | None): Búsquedas planificadas, ejecutadas y ahorradas en la última ejecución.
+
     Métodos:
         run(query): Punto de entrada principal para iniciar la investigación.
+        research(query, num_searches): Planifica, busca y redacta sin emitir estado ni enviar correo.
         plan_searches(query): Utiliza el Agente Planificador para generar una estrategia de búsqueda.
         perform_searches(search_plan): Ejecuta las búsquedas planificadas en paralelo.
         search(item): Ejecuta una única consulta de búsqueda utilizando el Agente de Búsqueda.
         write_report(query, search_results): Utiliza el Agente Escritor para compilar el informe.
-        send_email(report): Utiliza el Agente de Correo para entregar el informe.
+        send_email(report): Entrega el informe por correo (renderizado local o Agente de Correo).
+        run_report(): Resumen de la última ejecución (etapas, índice local, enrutador y consumo).
     """
 
+    def __init__(self, limits: StageLimits | None = None, search_cache: SearchCache | None = None,
+                 adaptive: bool = config.ADAPTIVE_SEARCH):
+        """
+        Inicializa el gestor.
+
+        Args:
+            limits (StageLimits | None): Semáforos compartidos por etapa. Sin límites si es None.
+            search_cache (SearchCache | None): Caché compartida de búsquedas. Sin caché si es None.
+            adaptive (bool): Activa la búsqueda adaptativa por olas (ver `adaptive_search.py`).
+        """
+        self.limits = limits
+        self.search_cache = search_cache
+        self.web_searches = 0
+        self.local_stats = LocalLookupStats()
+        self.email_savings: dict | None = None
+        self.metrics = PipelineMetrics()
+        self.adaptive = adaptive
+        self.search_stats: dict | None = None
+
     async def run(self, query: str, num_searches: int = config.DEFAULT_SEARCH_COUNT):
         """
         Ejecuta el proceso de investigación profunda, emitiendo actualizaciones de estado.
@@ -52,33 +114,107 @@ class ResearchManager:
             str: Mensajes de estado y finalmente el contenido del informe en markdown.
         """
         trace_id = gen_trace_id()
-        
-        # Iniciar una traza para observabilidad (ej. en el panel de OpenAI)
-        with trace("Ingestigación", trace_id=trace_id):
-            print(f"Ver traza: https://platform.openai.com/traces/trace?trace_id={trace_id}")
-            yield f"Ver traza: https://platform.openai.com/traces/trace?trace_id={trace_id}"
-            
-            print(f"Iniciando investigación con {num_searches} fuentes...")
-            
-            # Paso 1: Planificar
+        self._start_run(query)
+        try:
+            # Iniciar una traza para observabilidad (ej. en el panel de OpenAI)
+            with trace("Ingestigación", trace_id=trace_id):
+                print(f"Ver traza: https://platform.openai.com/traces/trace?trace_id={trace_id}")
+                yield f"Ver traza: https://platform.openai.com/traces/trace?trace_id={trace_id}"
+
+                print(f"Iniciando investigación con {num_searches} fuentes...")
+
+                # Paso 1: Planificar
+                search_plan = await self.plan_searches(query, num_searches)
+                yield "Búsquedas planificadas, iniciando búsqueda..."     
+
+                # Paso 2: Buscar
+                search_results, self.search_stats = await run_search_plan(search_plan, self.perform_searches,
+                                                                          self.adaptive)
+                if self.adaptive:
+                    yield (f"Búsquedas completas ({self.search_stats['executed']} de {self.search_stats['planned']}, "
+                           f"{self.search_stats['saved']} ahorradas por cobertura), escribiendo informe...")
+                else:
+                    yield "Búsquedas completas, escribiendo informe..."
+                if self.local_stats.lookups:
+                    yield (f"Índice local: {self.local_stats.hit_ratio:.0%} de aciertos "
+                           f"({self.local_stats.hits}/{self.local_stats.lookups}), latencia media {self.local_stats.avg_ms:.1f} ms")
+
+                # Paso 3: Escribir
+                report = await self.write_report(query, search_results)
+                yield "Informe escrito, enviando correo electrónico..."
+
+                # Paso 4: Entregar
+                await self.send_email(report)
+                if self.email_savings:
+                    yield (f"Correo electrónico enviado (renderizado local: ahorro estimado de "
+                           f"{self.email_savings['seconds']:.1f}s y {self.email_savings['tokens']} tokens), investigación completa")
+                else:
+                    yield "Correo electrónico enviado, investigación completa"
+
+                # Salida Final
+                yield report.markdown_report
+        finally:
+            # También si la ejecución falla o el consumidor abandona el generador (GeneratorExit)
+            self._finish_run()
+            print(self.run_report())
+
+    async def research(self, query: str, num_searches: int = config.DEFAULT_SEARCH_COUNT) -> ReportData:
+        """
+        Ejecuta planificación, búsqueda y redacción y devuelve el informe.
+
+        A diferencia de `run`, no emite actualizaciones de estado, no envía el correo ni
+        imprime el resumen de la ejecución (se obtiene con `run_report`), lo que lo hace
+        adecuado para ejecuciones no interactivas: el lote muestra un único resumen agregado.
+
+        Args:
+            query (str): El tema de investigación.
+            num_searches (int): Cantidad de búsquedas a realizar.
+
+        Returns:
+            ReportData: El informe generado.
+        """
+        self._start_run(query)
+        try:
             search_plan = await self.plan_searches(query, num_searches)
-            yield "Búsquedas planificadas, iniciando búsqueda..."     
-            
-            # Paso 2: Buscar
-            search_results = await self.perform_searches(search_plan)
-            yield "Búsquedas completas, escribiendo informe..."
-            
-            # Paso 3: Escribir
-            report = await self.write_report(query, search_results)
-            yield "Informe escrito, enviando correo electrónico..."
-            
-            # Paso 4: Entregar
-            await self.send_email(report)
-            yield "Correo electrónico enviado, investigación completa"
-            
-            # Salida Final
-            yield report.markdown_report
-        
+            search_results, self.search_stats = await run_search_plan(search_plan, self.perform_searches,
+                                                                      self.adaptive)
+            return await self.write_report(query, search_results)
+        finally:
+            self._finish_run()
+
+    def _start_run(self, query: str) -> None:
+        """Inicializa las métricas de una nueva ejecución."""
+        self.metrics.query = query
+        REGISTRY.in_flight_runs += 1
+
+    def _finish_run(self) -> None:
+        """Exporta los tramos de la ejecución a JSON Lines."""
+        REGISTRY.in_flight_runs -= 1
+        try:
+            self.metrics.export_jsonl()
+        except OSError as e:
+            print(f"No se pudieron exportar las métricas: {e}")
+
+    def run_report(self) -> str:
+        """
+        Resumen de la última ejecución: tabla por etapa, índice local, enrutador y consumo.
+
+        Returns:
+            str: El resumen, listo para imprimir.
+        """
+        blocks = [self.metrics.format_summary()]
+        if self.local_stats.lookups:
+            blocks.append(f"Índice local: {self.local_stats.to_dict()}")
+        if router_report := get_task_router().report():
+            blocks.append(router_report)
+        blocks.append(get_usage_ledger().report(run=self.metrics.run_id))
+        return "\n".join(blocks)
+
+    def _slot(self, stage: str):
+        """Devuelve el semáforo de la etapa indicada, o un contexto vacío si no hay límites."""
+        if self.limits is None:
+            return nullcontext()
+        return getattr(self.limits, stage)
 
     async def plan_searches(self, query: str, num_searches: int) -> WebSearchPlan:
         """
@@ -92,20 +228,48 @@ class ResearchManager:
             WebSearchPlan: Un plan estructurado que contiene consultas de búsqueda y razones.
         """
         print(f"Planificando {num_searches} búsquedas...")
-        try:
-            result = await Runner.run(
-                planner_agent,
-                f"Consulta: {query}\nGenera {num_searches} búsquedas.",
-            )
-        except Exception as e:
+        with self.metrics.span("plan") as span:
+            try:
+                async with self._slot("planner"):
+                    span.mark_started()
+                    result = await self._run_planner(query, num_searches)
+                record_agent_usage(self.metrics.run_id, result.last_agent, result, span)
+            except Exception as e:
+                span.fail(e)
+        if span.failed:
             # Manejo de errores en caso de fallo del agente planificador
-            print(f"Error al planificar búsquedas: {e}")
+            print(f"Error al planificar búsquedas: {span.error}")
             # Retornar un plan vacío o predeterminado para no romper el flujo
             return WebSearchPlan(searches=[])
 
         print(f"Se realizarán {len(result.final_output.searches)} búsquedas")
         return result.final_output_as(WebSearchPlan)
 
+    async def _run_planner(self, query: str, num_searches: int):
+        """
+        Ejecuta el Agente Planificador, con el modelo local si hay un servidor Ollama disponible.
+
+        Generar las consultas de búsqueda es una tarea sencilla: el enrutador de `comun/`
+        la resuelve en local y solo recurre a `planner_agent` (gpt-4o-mini) si el plan local
+        no es válido o tarda más que el timeout de la clase de tarea.
+
+        Args:
+            query (str): El tema de investigación.
+            num_searches (int): Cantidad de búsquedas a generar.
+
+        Returns:
+            RunResult: El resultado de la ejecución aceptada.
+        """
+        prompt = f"Consulta: {query}\nGenera {num_searches} búsquedas."
+        router = get_task_router()
+        return await router.arun(
+            "planificar_busquedas",
+            local=lambda: Runner.run(planner_agent.clone(model=router.agents_model("planificar_busquedas")), prompt),
+            cloud=lambda: Runner.run(planner_agent, prompt),
+            check=lambda result: is_valid_plan(result.final_output, num_searches),
+            tokens=lambda result: (result.context_wrapper.usage.input_tokens, result.context_wrapper.usage.output_tokens),
+        )
+
     async def perform_searches(self, search_plan: WebSearchPlan) -> list[str]:
         """
         Ejecuta todas las búsquedas definidas en el plan de forma concurrente.
@@ -144,17 +308,47 @@ class ResearchManager:
         Returns:
             str | None: El resumen del resultado de la búsqueda, o None si falló.
         """
+        if self.search_cache is not None:
+            return await self.search_cache.get_or_run(item.query, lambda: self._run_search(item))
+        return await self._run_search(item)
+
+    async def _run_search(self, item: WebSearchItem) -> str | None:
+        """
+        Ejecuta el Agente de Búsqueda para un elemento, respetando el límite de la etapa.
+
+        Reintenta hasta `config.SEARCH_MAX_RETRIES` veces antes de darse por vencido.
+        """
         input_text = f"Término de búsqueda: {item.query}\nRazón para buscar: {item.reason}"
-        try:
-            result = await Runner.run(
-                search_agent,
-                input_text,
-            )
-            return str(result.final_output)
-        except Exception:
+        with self.metrics.span("search") as span:
+            async with self._slot("search"):
+                span.mark_started()
+                for attempt in range(config.SEARCH_MAX_RETRIES + 1):
+                    span.retries = attempt
+                    try:
+                        result = await Runner.run(
+                            search_agent,
+                            input_text,
+                            context=self.local_stats,
+                        )
+                        record_agent_usage(self.metrics.run_id, search_agent, result, span)
+                        summary = str(result.final_output)
+                        if self._used_web_search(result):
+                            self.web_searches += 1
+                            if config.LOCAL_INDEX_ENABLED:
+                                await asyncio.to_thread(get_local_index().add, item.query, summary)
+                        return summary
+                    except Exception as e:
+                        last_error = e
             # Manejar silenciosamente los fallos para búsquedas individuales para evitar bloquear todo el proceso
+            span.fail(last_error)
             return None
 
+    @staticmethod
+    def _used_web_search(result) -> bool:
+        """Indica si la ejecución del agente llamó a la búsqueda web alojada (y no solo al índice local)."""
+        return any(getattr(item.raw_item, "type", None) == "web_search_call"
+                   for item in result.new_items if item.type == "tool_call_item")
+
     async def write_report(self, query: str, search_results: list[str]) -> ReportData:
         """
         Compila los resultados de búsqueda en un informe final utilizando el Agente Escritor.
@@ -169,39 +363,98 @@ class ResearchManager:
         print("Pensando en el informe...")
         input_text = f"Consulta original: {query}\nResultados de búsqueda resumidos: {search_results}"
         
-        try:
-            result = await Runner.run(
-                writer_agent,
-                input_text,
-            )
-            print("Informe escrito")
-            return result.final_output_as(ReportData)
-        except Exception as e:
-            # Manejo de errores al escribir el informe
-            print(f"Error al escribir el informe: {e}")
-            # Retornar un informe de error básico
-            return ReportData(
-                short_summary="Hubo un error al generar el informe.",
-                markdown_report=f"# Error de Generación\n\nNo se pudo generar el informe debido a un error: {str(e)}",
-                follow_up_questions=[]
-            )
+        with self.metrics.span("write") as span:
+            try:
+                async with self._slot("writer"):
+                    span.mark_started()
+                    result = await Runner.run(
+                        writer_agent,
+                        input_text,
+                    )
+                record_agent_usage(self.metrics.run_id, writer_agent, result, span)
+                print("Informe escrito")
+                return result.final_output_as(ReportData)
+            except Exception as e:
+                span.fail(e)
+
+        # Manejo de errores al escribir el informe
+        print(f"Error al escribir el informe: {span.error}")
+        # Retornar un informe de error básico
+        return ReportData(
+            short_summary="Hubo un error al generar el informe.",
+            markdown_report=f"# Error de Generación\n\nNo se pudo generar el informe debido a un error: {span.error}",
+            follow_up_questions=[]
+        )
     
     async def send_email(self, report: ReportData) -> None:
         """
-        Envía el informe generado por correo electrónico utilizando el Agente de Correo.
+        Envía el informe generado por correo electrónico.
+
+        En modo "local" (`config.EMAIL_RENDER_MODE`) el HTML y el asunto se generan de forma
+        determinista a partir del informe, sin llamar a ningún modelo, y se registra en
+        `email_savings` una estimación del tiempo y los tokens ahorrados. En modo "llm" se
+        utiliza el Agente de Correo.
 
         Args:
             report (ReportData): Los datos del informe que contienen el informe en markdown.
         """
+        if config.EMAIL_RENDER_MODE == "llm":
+            await self._send_email_with_agent(report)
+            return
+
+        print("Renderizando correo electrónico...")
+        with self.metrics.span("email") as span:
+            start = time.perf_counter()
+            subject, html_body = render_report_email(report.short_summary, report.markdown_report)
+            render_seconds = time.perf_counter() - start
+            status = await deliver_email(subject, html_body)
+            if status["status"] == "error":
+                span.fail(status.get("message", "error"))
+        print(f"Correo electrónico: {status['status']}")
+
+        self.email_savings = self._estimate_email_savings(report, html_body, render_seconds)
+        print(f"Renderizado local: ahorro estimado de {self.email_savings['seconds']:.1f}s "
+              f"y {self.email_savings['tokens']} tokens frente al Agente de Correo")
+
+    async def _send_email_with_agent(self, report: ReportData) -> None:
+        """Envía el informe usando el Agente de Correo (modo "llm")."""
         print("Escribiendo correo electrónico...")
-        try:
-            result = await Runner.run(
-                email_agent,
-                report.markdown_report,
-            )
-            print("Correo electrónico enviado")
-        except Exception as e:
-            # Manejo de errores al enviar el correo
-            print(f"Error al enviar el correo electrónico: {e}")
-        
-        return report
\ No newline at end of file
+        with self.metrics.span("email") as span:
+            try:
+                result = await Runner.run(
+                    email_agent,
+                    report.markdown_report,
+                )
+                record_agent_usage(self.metrics.run_id, email_agent, result, span)
+                print("Correo electrónico enviado")
+            except Exception as e:
+                # Manejo de errores al enviar el correo
+                span.fail(e)
+                print(f"Error al enviar el correo electrónico: {e}")
+
+    @staticmethod
+    def _estimate_email_savings(report: ReportData, html_body: str, render_seconds: float) -> dict:
+        """
+        Estima lo que habría costado dar formato al correo con el Agente de Correo.
+
+        El agente hace dos peticiones (la llamada a la herramienta y la respuesta final), ambas
+        con las instrucciones y el informe como entrada, y genera el HTML completo como salida.
+
+        Args:
+            report (ReportData): El informe enviado.
+            html_body (str): El HTML generado localmente (aproxima el tamaño de la salida del agente).
+            render_seconds (float): Lo que tardó el renderizado local.
+
+        Returns:
+            dict: Segundos y tokens (de entrada, de salida y totales) ahorrados.
+        """
+        prompt_tokens = (len(EMAIL_INSTRUCTIONS) + len(report.markdown_report)) // config.CHARS_PER_TOKEN
+        output_tokens = len(html_body) // config.CHARS_PER_TOKEN
+        input_tokens = 2 * prompt_tokens + output_tokens
+        seconds = output_tokens / config.EMAIL_LLM_OUTPUT_TOKENS_PER_SECOND - render_seconds
+        return {
+            "seconds": max(seconds, 0.0),
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "tokens": input_tokens + output_tokens,
+        }
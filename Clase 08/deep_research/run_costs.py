@@ -0,0 +1,67 @@
+"""
+Módulo del Consumo y Costo por Ejecución.
+
+Este módulo anota en el registro de consumo compartido (`comun/usage.py`) cada ejecución
+de agente de una investigación, con el identificador de la ejecución, y calcula a partir
+de ese registro el consumo por modelo y el costo estimado. Así las métricas por etapa,
+el resumen del lote y el informe de consumo usan la misma tabla de precios.
+"""
+
+import config
+from metrics import Span
+
+from comun.usage import UsageRecord, get_usage_ledger, summarize
+
+
+def record_agent_usage(run_id: str, agent, result, span: Span | None = None) -> UsageRecord:
+    """
+    Añade el consumo de una ejecución de agente al registro (punto de llamada
+    `research_manager.<etapa>`) y lo suma al tramo de métricas.
+
+    Args:
+        run_id (str): Identificador de la ejecución de investigación.
+        agent (Agent): El agente ejecutado.
+        result (RunResult): El resultado devuelto por `Runner.run`.
+        span (Span | None): Tramo de métricas al que sumar el consumo (opcional).
+
+    Returns:
+        UsageRecord: El registro añadido.
+    """
+    record = get_usage_ledger().record_agent_run(f"research_manager.{span.stage if span else agent.name}", agent,
+                                                 result, span.active_seconds() if span else 0.0, run=run_id)
+    if span is not None:
+        span.add_usage(record)
+    return record
+
+
+def usage_by_model(run_id: str) -> dict[str, dict]:
+    """
+    Peticiones, tokens y costo de una ejecución por modelo.
+
+    Args:
+        run_id (str): Identificador de la ejecución de investigación.
+
+    Returns:
+        dict[str, dict]: Por modelo, requests, input_tokens, output_tokens y cost_usd.
+    """
+    rows = summarize(get_usage_ledger().select(run=run_id), by=("model",))
+    return {row["model"]: {"requests": row["requests"], "input_tokens": row["prompt_tokens"],
+                           "output_tokens": row["completion_tokens"], "cost_usd": row["cost_usd"]}
+            for row in rows if row["calls"]}
+
+
+def estimate_cost(run_id: str, web_searches: int) -> float:
+    """
+    Estima el costo en USD de una ejecución.
+
+    Suma el costo de sus registros de consumo (los modelos sin precio en la tabla
+    compartida no suman) y el de las búsquedas web alojadas.
+
+    Args:
+        run_id (str): Identificador de la ejecución de investigación.
+        web_searches (int): Búsquedas web alojadas realizadas en la ejecución.
+
+    Returns:
+        float: Costo estimado en USD.
+    """
+    return web_searches * config.WEB_SEARCH_PRICE_PER_CALL + get_usage_ledger().totals(run=run_id)["cost_usd"]
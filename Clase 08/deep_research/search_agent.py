@@ -2,10 +2,42 @@
 Módulo del Agente de Búsqueda.
 
 Este módulo define el Agente de Búsqueda, el cual es responsable de ejecutar
-búsquedas web y resumir los resultados de manera concisa.
+búsquedas web y resumir los resultados de manera concisa. Antes de buscar en la
+web, el agente consulta el índice local de búsquedas anteriores (ver `local_index.py`).
 """
 
-from agents import Agent, WebSearchTool, ModelSettings
+import asyncio
+from typing import Any
+
+from agents import Agent, WebSearchTool, ModelSettings, RunContextWrapper, function_tool
+
+import config
+from local_index import LocalLookupStats, get_local_index
+
+
+@function_tool
+async def search_local_index(ctx: RunContextWrapper[Any], query: str) -> dict:
+    """
+    Busca el término en el índice local de investigaciones anteriores.
+
+    Args:
+        query (str): El término de búsqueda.
+
+    Returns:
+        dict: "status" es "hit" si los resultados son suficientes y recientes, "stale" si son
+        antiguos o parciales, o "miss" si no hay resultados; "results" contiene los resúmenes.
+    """
+    # La consulta FTS a SQLite es bloqueante: se ejecuta en un hilo para no frenar el event loop
+    lookup = await asyncio.to_thread(get_local_index().lookup, query)
+    if isinstance(ctx.context, LocalLookupStats):
+        ctx.context.record(lookup["status"], lookup["seconds"])
+    return {
+        "status": lookup["status"],
+        "results": [
+            {"summary": r["summary"], "sources": r["sources"], "age_hours": r["age_hours"]}
+            for r in lookup["results"]
+        ],
+    }
 
 
 # Instrucciones para el Agente de Búsqueda
@@ -18,12 +50,25 @@ INSTRUCTIONS = (
     "esencia y ignores cualquier fluff. No incluyas ningún comentario adicional más que el resumen en sí."
 )
 
+# Instrucciones adicionales cuando el índice local está habilitado
+LOCAL_INDEX_INSTRUCTIONS = (
+    " Primero usa siempre la herramienta search_local_index con el término de búsqueda. Si devuelve "
+    "status 'hit', escribe el resumen a partir de esos resultados sin buscar en la web. Si devuelve "
+    "'stale' o 'miss', busca en la web. Incluye en el resumen las URLs de las fuentes principales."
+)
+
+tools = [WebSearchTool(search_context_size="low")]
+if config.LOCAL_INDEX_ENABLED:
+    INSTRUCTIONS += LOCAL_INDEX_INSTRUCTIONS
+    tools.insert(0, search_local_index)
+
 # Inicializar el Agente de Búsqueda
-# Utiliza la herramienta WebSearchTool proporcionada por la librería openai-agents.
+# Utiliza la herramienta WebSearchTool proporcionada por la librería openai-agents,
+# precedida por el índice local si está habilitado.
 search_agent = Agent(
     name="Agente de búsqueda",
     instructions=INSTRUCTIONS,
-    tools=[WebSearchTool(search_context_size="low")],
+    tools=tools,
     model="gpt-4o-mini",
     model_settings=ModelSettings(tool_choice="required"),
 )
\ No newline at end of file
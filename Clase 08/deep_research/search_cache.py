@@ -0,0 +1,70 @@
+"""
+Módulo de Caché de Búsquedas.
+
+Este módulo define la clase `SearchCache`, una caché en memoria compartida entre
+varias ejecuciones del `ResearchManager`. Cuando muchas consultas se investigan en
+lote, es habitual que el planificador genere búsquedas idénticas o casi idénticas;
+la caché evita repetir la llamada al Agente de Búsqueda para cada una de ellas.
+"""
+
+import asyncio
+from typing import Awaitable, Callable
+
+from comun.search_cache import normalize_query
+
+
+class SearchCache:
+    """
+    Caché de resúmenes de búsqueda con coalescencia de peticiones en vuelo.
+
+    Si dos tareas solicitan la misma búsqueda al mismo tiempo, solo la primera
+    ejecuta el Agente de Búsqueda y la segunda espera su resultado. Los fallos
+    (resultado None) no se guardan para que puedan reintentarse más tarde.
+
+    Atributos:
+        hits (int): Cantidad de búsquedas servidas desde la caché.
+        misses (int): Cantidad de búsquedas que tuvieron que ejecutarse.
+    """
+
+    def __init__(self):
+        self._entries: dict[str, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+
+    async def get_or_run(self, query: str, producer: Callable[[], Awaitable[str | None]]) -> str | None:
+        """
+        Devuelve el resumen cacheado para la consulta o lo produce con `producer`.
+
+        Args:
+            query (str): La consulta de búsqueda.
+            producer (Callable): Corrutina que ejecuta la búsqueda real.
+
+        Returns:
+            str | None: El resumen de la búsqueda, o None si falló.
+        """
+        key = normalize_query(query)
+        entry = self._entries.get(key)
+        if entry is not None:
+            self.hits += 1
+            return await asyncio.shield(entry)
+
+        self.misses += 1
+        entry = asyncio.get_running_loop().create_future()
+        self._entries[key] = entry
+        try:
+            result = await producer()
+        except BaseException:
+            # Liberar la entrada y despertar a las tareas en espera con un fallo (None)
+            del self._entries[key]
+            entry.set_result(None)
+            raise
+        if result is None:
+            del self._entries[key]
+        entry.set_result(result)
+        return result
+
+    @property
+    def hit_rate(self) -> float:
+        """Proporción de búsquedas servidas desde la caché (0.0 - 1.0)."""
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
@@ -0,0 +1,206 @@
+"""
+Módulo del Filtro Local de Nombres.
+
+El guardrail `guardrail_against_name` del laboratorio 6 hacía una llamada al LLM por cada
+mensaje. Aquí se resuelven primero los casos claros con un detector local, que tarda
+microsegundos, y el resto se escala al LLM:
+
+- Un nombre de pila del nomenclátor escrito con mayúscula es un nombre: veredicto local.
+- Un mensaje en el que todas las palabras son de un vocabulario conocido (palabras
+  funcionales y vocabulario habitual de estos pedidos) no puede tener un nombre:
+  veredicto local.
+- Cualquier otra palabra podría ser un nombre que no está en el nomenclátor, incluso
+  al inicio de una frase o en minúsculas ("roxana gómez"): decide el LLM.
+
+Solo se guardan en caché (por hash del mensaje) los veredictos del LLM; los locales se
+recalculan, porque cuestan menos que la búsqueda en la caché.
+"""
+
+import hashlib
+import json
+import re
+import time
+import unicodedata
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable
+
+CACHE_SIZE = 1024
+
+
+def fold(word: str) -> str:
+    """ "Fernández" -> "fernandez" """
+    return "".join(c for c in unicodedata.normalize("NFKD", word.lower()) if not unicodedata.combining(c))
+
+
+# Nombres de pila frecuentes (sin tildes ni mayúsculas). Se excluyen los que también son
+# palabras comunes ("Rosa", "Luz", "Paz", "Mercedes"): esos casos los decide el LLM.
+GIVEN_NAMES = frozenset("""
+    adrian agustin alberto alejandra alejandro alfonso alicia alvaro ana andrea andres angel angela antonio
+    beatriz camila carla carlos carmen carolina catalina claudia cristina daniel daniela david diana diego
+    eduardo elena emilio enrique esteban eva fernanda fernando francisco gabriel gabriela gonzalo guillermo
+    gustavo hector ignacio ines isabel jaime javier jimena jorge jose josefina juan julia julian laura
+    leonardo lucia luis manuel marcela marcos maria mariana mario marta martin matias miguel monica natalia
+    nicolas oscar pablo patricia paula pedro rafael ramon raul ricardo roberto rodrigo sandra santiago
+    sebastian sergio silvia sofia susana teresa tomas valentina valeria veronica vicente ximena
+    alice amanda amy andrew anna anthony barbara benjamin brian charles christopher deborah
+    donald edward elizabeth emily emma eric george james jennifer jessica john joseph joshua karen kevin
+    linda lisa mark mary matthew michael nancy olivia paul rachel richard robert ryan sarah steven susan
+    thomas william
+""".split())
+
+# Vocabulario que no puede ser el nombre de una persona: palabras funcionales y el
+# vocabulario habitual de los pedidos de correos de ventas. Un mensaje formado solo por
+# estas palabras se resuelve en local; cualquier otra palabra la evalúa el LLM.
+KNOWN_WORDS = frozenset(fold(word) for word in """
+    a al algo algun alguna como con contra cual cuando de del desde donde el ella ellos en entre es esa
+    ese esta este esto estos esas estas hacia hasta la las le les lo los mas me mi mis muy nos nuestro
+    nuestra o para pero por que quien se segun sin sobre su sus te tu tus un una uno unos unas y ya yo
+    usted ustedes no si tambien sobre todo toda todos todas cada otro otra
+    hola estimado estimada estimados estimadas querido querida saludos gracias favor por
+    envia enviar envie escribe escribir escriba redacta redactar redacte manda mandar mande prepara
+    preparar genera generar crea crear haz hacer necesito necesita necesitamos quiero queremos puedes
+    podrias dirigido dirigida dirigidos
+    correo correos electronico electronicos email emails mail mensaje mensajes carta borrador borradores frio fria frios
+    ventas venta comercial comerciales propuesta oferta presentacion seguimiento reunion demo llamada
+    director directora ejecutivo ejecutiva gerente jefe jefa presidente presidenta responsable ceo cto
+    desarrollo marketing finanzas operaciones tecnologia recursos humanos cliente clientes posible
+    posibles potencial potenciales equipo empresa empresas compania producto productos servicio
+    servicios herramienta plataforma solucion cumplimiento normativo normativa auditoria auditorias
+    seguridad soc2 ia inteligencia artificial agente agentes software startup nueva nuevo corto corta
+    breve profesional formal amable serio seria divertido divertida conciso concisa
+    señor señora señores sr sra srs don doña
+    the an and or of to for in on at by with from about this that these those is are be my our your
+    their his her its it we you they i me us them please
+    dear hi hello mr mrs ms send write draft create make prepare email cold sales emails message
+    company team client customer ceo cto manager director head
+""".split())
+
+# Palabras (con o sin tildes); "CEO" o "ComplAI" cuentan como palabras
+WORD = re.compile(r"[A-Za-zÁÉÍÓÚÑÜáéíóúñü]+")
+CAPITALIZED = re.compile(r"[A-ZÁÉÍÓÚÑÜ][a-záéíóúñü]+")
+SURNAME = re.compile(r" ([A-ZÁÉÍÓÚÑÜ][a-záéíóúñü]+)\b")
+
+
+def message_text(message: Any) -> str:
+    """Texto de un mensaje de guardrail (una cadena o una lista de items de entrada)."""
+    if isinstance(message, str):
+        return message
+    parts = []
+    for item in message:
+        content = item.get("content") if isinstance(item, dict) else None
+        if isinstance(content, str):
+            parts.append(content)
+        elif isinstance(content, list):
+            parts.extend(part.get("text", "") for part in content if isinstance(part, dict))
+    return "\n".join(parts)
+
+
+@dataclass
+class NameVerdict:
+    """
+    Veredicto del guardrail.
+
+    Atributos:
+        is_name_in_message (bool): Si el mensaje incluye el nombre de una persona.
+        name (str): El nombre detectado ("" si no hay).
+        source (str): Quién decidió: "local", "llm" o "cache".
+    """
+    is_name_in_message: bool
+    name: str = ""
+    source: str = "local"
+
+
+def detect_name(text: str) -> NameVerdict | None:
+    """
+    Detector local de nombres propios.
+
+    Args:
+        text (str): Mensaje del usuario.
+
+    Returns:
+        NameVerdict | None: El veredicto si el caso es claro, o None si hay que consultar al LLM.
+    """
+    unknown = False
+    for match in WORD.finditer(text):
+        word = fold(match.group())
+        if word in GIVEN_NAMES and CAPITALIZED.fullmatch(match.group()):
+            # Nombre de pila conocido con mayúscula, seguido de un apellido si lo hay
+            surname = SURNAME.match(text, match.end())
+            return NameVerdict(True, match.group() + (f" {surname.group(1)}" if surname else ""))
+        if word not in KNOWN_WORDS:
+            # Cualquier palabra desconocida puede ser un nombre fuera del nomenclátor
+            unknown = True
+    return None if unknown else NameVerdict(False)
+
+
+class TieredNameGuardrail:
+    """
+    Guardrail de nombres en tres niveles: caché de veredictos del LLM, detector local y LLM.
+
+    Atributos:
+        checks (int): Mensajes verificados.
+        cache_hits (int): Veredictos servidos desde la caché.
+        local_decisions (int): Veredictos del detector local.
+        llm_calls (int): Mensajes escalados al LLM.
+    """
+
+    def __init__(self, cache_size: int = CACHE_SIZE):
+        self.cache_size = cache_size
+        self._cache: OrderedDict[str, NameVerdict] = OrderedDict()
+        self.checks = 0
+        self.cache_hits = 0
+        self.local_decisions = 0
+        self.llm_calls = 0
+        self.local_seconds = 0.0
+
+    @staticmethod
+    def message_hash(message: Any) -> str:
+        text = message if isinstance(message, str) else json.dumps(message, sort_keys=True, default=str)
+        return hashlib.sha256(" ".join(text.split()).encode("utf-8")).hexdigest()
+
+    async def check(self, message: Any, llm_check: Callable[[], Awaitable[Any]]) -> NameVerdict:
+        """
+        Verifica un mensaje.
+
+        Args:
+            message (Any): Mensaje que recibe el guardrail.
+            llm_check (Callable): Corrutina que consulta al LLM; su resultado debe tener
+                `is_name_in_message` y `name` (como `NameCheckOutput`).
+
+        Returns:
+            NameVerdict: El veredicto, con el nivel que lo decidió.
+        """
+        self.checks += 1
+        key = self.message_hash(message)
+        if key in self._cache:
+            self.cache_hits += 1
+            self._cache.move_to_end(key)
+            cached = self._cache[key]
+            return NameVerdict(cached.is_name_in_message, cached.name, "cache")
+
+        start = time.perf_counter()
+        verdict = detect_name(message_text(message))
+        self.local_seconds += time.perf_counter() - start
+        if verdict is not None:
+            self.local_decisions += 1
+            return verdict
+
+        self.llm_calls += 1
+        output = await llm_check()
+        verdict = NameVerdict(output.is_name_in_message, output.name, "llm")
+        self._cache[key] = verdict
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return verdict
+
+    def report(self) -> str:
+        """Fracción de llamadas al LLM que se evitaron."""
+        if not self.checks:
+            return "Sin verificaciones de nombres todavía."
+        avoided = self.checks - self.llm_calls
+        local_us = 1e6 * self.local_seconds / max(self.checks - self.cache_hits, 1)
+        return (f"Verificaciones de nombres: {self.checks} "
+                f"(caché {self.cache_hits}, detector local {self.local_decisions}, LLM {self.llm_calls}). "
+                f"Llamadas al LLM evitadas: {avoided}/{self.checks} ({100 * avoided / self.checks:.0f}%), "
+                f"detector local: {local_us:.0f} µs por mensaje")
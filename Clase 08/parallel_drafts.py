@@ -0,0 +1,137 @@
+"""
+Módulo de Borradores en Paralelo para el Manager de Ventas.
+
+En el laboratorio 6 el `sales_manager` recibe a los tres agentes de ventas como herramientas
+(`sales_agentN.as_tool(...)`) y se le pide probarlos todos. El modelo suele llamarlos en
+turnos separados: los tres sub-agentes se ejecutan uno detrás de otro y cada uno cuesta un
+viaje de ida y vuelta más del manager. Aquí los sub-agentes se agrupan en una sola
+herramienta que el manager está obligado a llamar en su primer turno; la herramienta los
+ejecuta a la vez y devuelve todos los borradores en un único resultado, antes de la
+transferencia a `emailer_agent`.
+"""
+
+import asyncio
+import json
+import time
+from collections import Counter
+from dataclasses import replace
+
+from agents import Agent, RunHooks, Runner, function_tool
+
+DRAFTS_TOOL_NAME = "generar_borradores"
+
+PARALLEL_MANAGER_INSTRUCTIONS = f"Eres un gerente de ventas que trabaja para ComplAI. \
+Nunca generas correos electrónicos de ventas tú mismo. \
+Llamas una sola vez a la herramienta {DRAFTS_TOOL_NAME}, que redacta a la vez un borrador con cada agente de ventas. \
+Seleccionas el mejor correo electrónico usando tu propio criterio sobre cuál será más efectivo. \
+Después de elegir el correo electrónico, transfieres al agente Email Manager para formatear y enviar el correo."
+
+
+def drafts_tool(sales_agents: list[Agent], tool_name: str = DRAFTS_TOOL_NAME):
+    """
+    Herramienta que ejecuta todos los agentes de ventas en paralelo.
+
+    Args:
+        sales_agents (list[Agent]): Agentes que redactan los borradores.
+        tool_name (str): Nombre de la herramienta.
+
+    Returns:
+        FunctionTool: Devuelve un JSON con el borrador (o el error) de cada agente.
+    """
+    async def run_all(message: str) -> str:
+        start = time.perf_counter()
+
+        async def draft(agent: Agent) -> dict:
+            try:
+                result = await Runner.run(agent, message)
+            except Exception as e:
+                return {"agente": agent.name, "error": str(e)}
+            return {"agente": agent.name, "borrador": result.final_output,
+                    "segundos": round(time.perf_counter() - start, 1)}
+
+        drafts = await asyncio.gather(*(draft(agent) for agent in sales_agents))
+        return json.dumps(drafts, ensure_ascii=False)
+
+    return function_tool(
+        run_all,
+        name_override=tool_name,
+        description_override="Escribe a la vez un correo electrónico de ventas en frío con cada agente de ventas. "
+                             "Recibe el mensaje con el pedido y devuelve todos los borradores.",
+    )
+
+
+def parallel_manager(manager: Agent, sales_agents: list[Agent]) -> Agent:
+    """
+    Copia del manager que obtiene todos los borradores en un solo turno.
+
+    Args:
+        manager (Agent): El `sales_manager` original (se conservan su modelo y transferencias).
+        sales_agents (list[Agent]): Agentes de ventas que antes eran herramientas separadas.
+
+    Returns:
+        Agent: El manager con la herramienta de borradores en paralelo como única herramienta.
+    """
+    tool = drafts_tool(sales_agents)
+    # tool_choice obliga a llamar a la herramienta en el primer turno; como reset_tool_choice
+    # está activo, en el turno siguiente el modelo ya puede elegir y transferir
+    return manager.clone(
+        name=f"{manager.name} (paralelo)",
+        instructions=PARALLEL_MANAGER_INSTRUCTIONS,
+        tools=[tool],
+        model_settings=replace(manager.model_settings, tool_choice=tool.name),
+        reset_tool_choice=True,
+    )
+
+
+class TurnCounter(RunHooks):
+    """Cuenta las llamadas al modelo de cada agente durante una ejecución."""
+
+    def __init__(self):
+        self.turns: Counter = Counter()
+
+    async def on_llm_start(self, context, agent, system_prompt, input_items) -> None:
+        self.turns[agent.name] += 1
+
+
+def without_handoff(manager: Agent) -> Agent:
+    """Copia del manager sin transferencias, para medir sin enviar correos."""
+    return manager.clone(
+        handoffs=[],
+        instructions=manager.instructions + " En esta prueba no hay transferencia: "
+                                            "responde solo con el correo electrónico elegido.",
+    )
+
+
+async def compare_managers(sequential: Agent, parallel: Agent, message: str, rounds: int = 3) -> dict:
+    """
+    Compara turnos del manager y tiempo total de ambos modos, sin la transferencia final.
+
+    Args:
+        sequential (Agent): Manager original, con una herramienta por agente de ventas.
+        parallel (Agent): Manager de `parallel_manager`.
+        message (str): Pedido del usuario.
+        rounds (int): Repeticiones de cada modo.
+
+    Returns:
+        dict: Turnos y segundos medios de cada modo, y lo ahorrado.
+    """
+    modes = {"secuencial": without_handoff(sequential), "paralelo": without_handoff(parallel)}
+    stats = {mode: {"turns": [], "seconds": []} for mode in modes}
+    for i in range(rounds):
+        for mode, manager in modes.items():
+            hooks = TurnCounter()
+            start = time.perf_counter()
+            await Runner.run(manager, message, hooks=hooks)
+            seconds = time.perf_counter() - start
+            stats[mode]["turns"].append(hooks.turns[manager.name])
+            stats[mode]["seconds"].append(seconds)
+            print(f"Ronda {i + 1}, {mode}: {hooks.turns[manager.name]} turnos del manager, {seconds:.1f}s")
+
+    summary = {mode: {"avg_turns": round(sum(s["turns"]) / rounds, 1),
+                      "avg_seconds": round(sum(s["seconds"]) / rounds, 2)} for mode, s in stats.items()}
+    summary["turns_saved"] = round(summary["secuencial"]["avg_turns"] - summary["paralelo"]["avg_turns"], 1)
+    summary["seconds_saved"] = round(summary["secuencial"]["avg_seconds"] - summary["paralelo"]["avg_seconds"], 2)
+    print(f"Turnos del manager: {summary['secuencial']['avg_turns']} -> {summary['paralelo']['avg_turns']}, "
+          f"tiempo: {summary['secuencial']['avg_seconds']:.1f}s -> {summary['paralelo']['avg_seconds']:.1f}s "
+          f"(ahorro {summary['seconds_saved']:.1f}s)")
+    return summary
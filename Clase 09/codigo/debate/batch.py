@@ -0,0 +1,79 @@
+import asyncio
+import hashlib
+import re
+import time
+from collections import Counter
+
+from debate.cascade import judge_outcome, print_cascade_stats
+from debate.timing import TaskTimer
+
+from comun.usage import get_usage_ledger, percentile
+
+
+def read_motions(path: str) -> list[str]:
+    """Lee las mociones del archivo (una por línea), sin duplicados ni comentarios (#)"""
+    with open(path, "r", encoding="utf-8") as f:
+        lines = [line.strip() for line in f]
+    return list(dict.fromkeys(line for line in lines if line and not line.startswith("#")))
+
+
+def motion_slug(motion: str) -> str:
+    """Nombre estable para los archivos de una moción: slug legible + hash corto"""
+    slug = re.sub(r"[^\w]+", "-", motion.lower()).strip("-")[:40]
+    return f"{slug}-{hashlib.sha1(motion.encode('utf-8')).hexdigest()[:8]}"
+
+
+async def debate_motion(motion: str, semaphore: asyncio.Semaphore, timer: TaskTimer) -> dict:
+    """Debate una moción con su propia crew, respetando el límite de concurrencia"""
+    from debate.crew import Debate
+
+    async with semaphore:
+        # Una crew nueva por moción (barato frente a la ejecución de los LLM): copy() de una plantilla
+        # comparte los LLM de los agentes, y con ellos los contadores de tokens que leen
+        # record_crew y judge_outcome, así que mezclaría el consumo de los debates en curso
+        crew = Debate().crew()
+        inputs = {"motion": motion, "motion_slug": motion_slug(motion)}
+        start = time.perf_counter()
+        try:
+            result = await crew.kickoff_async(inputs=inputs)
+        except Exception as e:
+            print(f"Error en la moción '{motion}': {e}")
+            return {"motion": motion, "seconds": time.perf_counter() - start, "verdict": "ERROR", "error": str(e)}
+        seconds = time.perf_counter() - start
+        get_usage_ledger().record_crew("debate", crew, seconds, run=inputs["motion_slug"])
+        durations = timer.durations(crew.tasks)
+        outcome = judge_outcome(crew, durations)
+        print(f"[{seconds:6.1f}s] {outcome['verdict']:<13} {motion}")
+        return {"motion": motion, "seconds": seconds, "verdict": outcome["verdict"], "tasks": durations, "judge": outcome}
+
+
+async def run_motions(motions: list[str], max_concurrent: int = 3) -> list[dict]:
+    """Debate todas las mociones con como máximo `max_concurrent` debates a la vez"""
+    timer = TaskTimer()
+    semaphore = asyncio.Semaphore(max_concurrent)
+    return await asyncio.gather(*(debate_motion(motion, semaphore, timer) for motion in motions))
+
+
+def print_summary(results: list[dict], wall_seconds: float) -> None:
+    """Muestra el rendimiento del lote, la latencia de cada moción y la distribución de veredictos"""
+    latencies = [r["seconds"] for r in results if r["verdict"] != "ERROR"]
+    print("\n=== RESUMEN DEL LOTE ===")
+    print(f"Mociones: {len(results)} en {wall_seconds:.1f}s "
+          f"({len(results) / wall_seconds * 60 if wall_seconds else 0:.1f} mociones/min)")
+    print(f"Latencia por moción: p50 {percentile(latencies, 50):.1f}s | "
+          f"p95 {percentile(latencies, 95):.1f}s | máx {max(latencies, default=0):.1f}s")
+    print(f"Suma de latencias: {sum(latencies):.1f}s (lo que tardaría el lote en secuencia)")
+
+    print("\nVeredictos:")
+    for verdict, count in Counter(r["verdict"] for r in results).most_common():
+        print(f"  {verdict:<13} {count:3d} ({count / len(results):.0%})")
+
+    print("\nPor moción:")
+    for r in results:
+        judge = "juez caro" if r.get("judge", {}).get("escalated") else "juez rápido"
+        print(f"  {r['seconds']:6.1f}s  {r['verdict']:<13} {judge:<11} output/{motion_slug(r['motion'])}/  {r['motion']}")
+
+    print_cascade_stats([r["judge"] for r in results if "judge" in r])
+
+    print("\nConsumo de LLM:")
+    print(get_usage_ledger().report())
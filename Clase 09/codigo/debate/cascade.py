@@ -0,0 +1,107 @@
+import re
+
+from comun.usage import get_usage_ledger, token_counts
+
+VERDICT = re.compile(r"VEREDICTO:\s*\**\s*(A FAVOR|EN CONTRA)", re.IGNORECASE)
+
+
+def parse_verdict(decision: str) -> str:
+    """Extrae el veredicto del juez ("A FAVOR", "EN CONTRA" o "INDETERMINADO")"""
+    match = VERDICT.search(decision or "")
+    return match.group(1).upper() if match else "INDETERMINADO"
+
+
+def _normalize_verdict(verdict: str) -> str:
+    verdict = (verdict or "").upper()
+    if "CONTRA" in verdict:
+        return "EN CONTRA"
+    if "FAVOR" in verdict:
+        return "A FAVOR"
+    return "INDETERMINADO"
+
+
+def agent_cost(agent) -> tuple[str, int, float]:
+    """
+    Consumo real del LLM de un agente (lo que contó crewAI), con el precio de su modelo.
+
+    Cada agente de la crew tiene su propio LLM, así que el juez rápido y el juez caro se
+    miden por separado aunque el juez rápido comparta modelo con los debatientes.
+
+    Returns:
+        tuple[str, int, float]: modelo, tokens totales y costo en USD según la tabla de
+        precios del registro de consumo (0.0 si el modelo no tiene precio)
+    """
+    llm = agent.llm
+    model = getattr(llm, "model", None) or str(llm)
+    prompt, completion, cached, _ = token_counts(llm.get_token_usage_summary())
+    return model, prompt + completion, get_usage_ledger().cost(model, prompt, completion, cached) or 0.0
+
+
+def judge_outcome(crew, durations: dict) -> dict:
+    """
+    Resume cómo se juzgó un debate: veredicto final, si se escaló al juez caro,
+    latencia, tokens y costo de cada juez.
+
+    Args:
+        crew: La crew ya ejecutada.
+        durations (dict): Segundos por tarea (ver TaskTimer.durations).
+    """
+    tasks = {task.name: task for task in crew.tasks}
+    pre_task, judge_task = tasks["pre_decide"], tasks["decide"]
+    preliminary = pre_task.output.pydantic if pre_task.output else None
+    escalated = bool(judge_task.output and judge_task.output.raw)
+
+    if escalated:
+        verdict = parse_verdict(judge_task.output.raw)
+    else:
+        verdict = _normalize_verdict(getattr(preliminary, "verdict", ""))
+
+    _, pre_tokens, pre_cost = agent_cost(pre_task.agent)
+    _, judge_tokens, judge_cost = agent_cost(judge_task.agent) if escalated else (None, 0, 0.0)
+
+    return {
+        "verdict": verdict,
+        "confidence": getattr(preliminary, "confidence", None),
+        "escalated": escalated,
+        "pre_judge_seconds": durations.get("pre_decide", 0.0),
+        "judge_seconds": durations.get("decide", 0.0) if escalated else 0.0,
+        "pre_judge_tokens": pre_tokens,
+        "judge_tokens": judge_tokens,
+        "pre_judge_cost_usd": pre_cost,
+        "judge_cost_usd": judge_cost,
+        "cost_usd": pre_cost + judge_cost,
+    }
+
+
+def print_cascade_stats(outcomes: list[dict]) -> None:
+    """
+    Muestra la tasa de escalado, la latencia y el costo de los jueces por debate.
+
+    El costo de "siempre con el juez caro" usa el costo real medio del juez caro en los
+    debates que sí se escalaron; sin ninguno escalado no hay con qué comparar.
+    """
+    if not outcomes:
+        return
+    escalated = [o for o in outcomes if o["escalated"]]
+    n = len(outcomes)
+    judging = [o["pre_judge_seconds"] + o["judge_seconds"] for o in outcomes]
+    cost = sum(o["cost_usd"] for o in outcomes)
+
+    print("\n=== JUEZ EN CASCADA ===")
+    print(f"Escalados al juez caro: {len(escalated)}/{n} ({len(escalated) / n:.0%})")
+    print(f"Latencia media del juez rápido: {sum(o['pre_judge_seconds'] for o in outcomes) / n:.1f}s "
+          f"({sum(o['pre_judge_tokens'] for o in outcomes) / n:.0f} tokens)")
+    if escalated:
+        print(f"Latencia media del juez caro (cuando se escala): "
+              f"{sum(o['judge_seconds'] for o in escalated) / len(escalated):.1f}s "
+              f"({sum(o['judge_tokens'] for o in escalated) / len(escalated):.0f} tokens)")
+    print(f"Latencia media de juicio por debate: {sum(judging) / n:.1f}s")
+    print(f"Costo de los jueces por debate (tokens reales): ${cost / n:.4f}")
+    if escalated:
+        judge_avg = sum(o["judge_cost_usd"] for o in escalated) / len(escalated)
+        always_cost = sum(o["judge_cost_usd"] for o in escalated) + judge_avg * (n - len(escalated))
+        print(f"Siempre con el juez caro: ${always_cost / n:.4f} por debate "
+              f"(costo medio real del juez caro en {len(escalated)} debates escalados), "
+              f"ahorro {1 - cost / always_cost if always_cost else 0:.0%}")
+    else:
+        print("Ningún debate se escaló: no hay costo real del juez caro con el que comparar el ahorro")
@@ -1,5 +1,17 @@
+import os
+
 from crewai import Agent, Crew, Process, Task
 from crewai.project import CrewBase, agent, crew, task
+from crewai.tasks.conditional_task import ConditionalTask
+from crewai.tasks.task_output import TaskOutput
+from pydantic import BaseModel, Field
+
+
+class PreVerdict(BaseModel):
+    """ Veredicto preliminar del juez rápido """
+    verdict: str = Field(description='Lado más convincente: "A FAVOR" o "EN CONTRA"')
+    confidence: float = Field(description="Confianza en el veredicto, de 0 (empate) a 1 (un lado es claramente superior)")
+    reasoning: str = Field(description="Justificación breve del veredicto")
 
 
 @CrewBase
@@ -10,6 +22,14 @@ class Debate():
     agents_config = 'config/agents.yaml'
     tasks_config = 'config/tasks.yaml'
 
+    # "parallel": propose y oppose se ejecutan a la vez y decide espera a ambos
+    # "sequential": las tres tareas se ejecutan una detrás de otra
+    mode = os.getenv("DEBATE_MODE", "parallel")
+
+    # El juez caro (judge) solo interviene si la confianza del juez rápido es menor que este umbral.
+    # 0 = nunca se escala; un valor mayor que 1 = siempre se escala
+    escalation_threshold = float(os.getenv("JUDGE_ESCALATION_THRESHOLD", "0.75"))
+
     @agent
     def debater(self) -> Agent:
         return Agent(
@@ -17,6 +37,22 @@ class Debate():
             verbose=True
         )
 
+    @agent
+    def opponent(self) -> Agent:
+        # Mismo perfil que debater, pero otra instancia: así propose y oppose
+        # pueden ejecutarse en paralelo sin compartir el estado del agente
+        return Agent(
+            config=self.agents_config['debater'],
+            verbose=True
+        )
+
+    @agent
+    def pre_judge(self) -> Agent:
+        return Agent(
+            config=self.agents_config['pre_judge'],
+            verbose=True
+        )
+
     @agent
     def judge(self) -> Agent:
         return Agent(
@@ -31,20 +67,37 @@ class Debate():
     def propose(self) -> Task:
         return Task(
             config=self.tasks_config['propose'],
+            async_execution=self.mode == "parallel",
         )
 
     @task
     def oppose(self) -> Task:
         return Task(
             config=self.tasks_config['oppose'],
+            async_execution=self.mode == "parallel",
         )
 
     @task
-    def decide(self) -> Task:
+    def pre_decide(self) -> Task:
         return Task(
+            config=self.tasks_config['pre_decide'],
+            output_pydantic=PreVerdict,
+        )
+
+    @task
+    def decide(self) -> Task:
+        return ConditionalTask(
             config=self.tasks_config['decide'],
+            condition=self.is_close_call,
         )
 
+    def is_close_call(self, output: TaskOutput) -> bool:
+        """Decide si el veredicto preliminar es lo bastante dudoso para escalarlo al juez caro"""
+        preliminary = output.pydantic
+        if not isinstance(preliminary, PreVerdict):
+            return True
+        return preliminary.confidence < self.escalation_threshold
+
 
 
 
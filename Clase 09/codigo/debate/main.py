@@ -1,29 +1,80 @@
 #!/usr/bin/env python
+import asyncio
+import os
 import sys
+import time
 import warnings
 
 from datetime import datetime
-
-from debate.crew import Debate
+from pathlib import Path
 
 warnings.filterwarnings("ignore", category=SyntaxWarning, module="pysbd")
 
+from comun.usage import get_usage_ledger
+
 # This main file is intended to be a way for you to run your
 # crew locally, so refrain from adding unnecessary logic into this file.
 # Replace with inputs you want to test with, it will automatically
 # interpolate any tasks and agents information
 
+# crewAI se importa dentro de cada comando: cargarlo cuesta varios segundos
+
+
+def profile_startup():
+    """
+    Print the import-time breakdown of the crew (--profile-startup) and exit.
+    """
+    from comun.startup import profile_startup as print_startup
+
+    print_startup(["debate.main", "debate.crew", "debate.batch"], cwd=Path(__file__).resolve().parents[1])
+
+
 def run():
     """
     Run the crew.
     """
-    
+    if "--profile-startup" in sys.argv:
+        profile_startup()
+    from debate.batch import motion_slug
+    from debate.cascade import judge_outcome, print_cascade_stats
+    from debate.crew import Debate
+    from debate.timing import TaskTimer, print_timings
+
+    motion = 'Hay una necesidad de crear leyes estrictas para regular los LLMs'
     inputs = {
-        'motion': 'Hay una necesidad de crear leyes estrictas para regular los LLMs',
+        'motion': motion,
+        'motion_slug': motion_slug(motion),
     }
     
+    timer = TaskTimer()
     try:
-        result = Debate().crew().kickoff(inputs=inputs)
+        crew = Debate().crew()
+        start = time.perf_counter()
+        result = crew.kickoff(inputs=inputs)
+        wall_seconds = time.perf_counter() - start
         print(result.raw)
     except Exception as e:
-        raise Exception(f"An error occurred while running the crew: {e}")
\ No newline at end of file
+        raise Exception(f"An error occurred while running the crew: {e}")
+
+    durations = timer.durations(crew.tasks)
+    print_timings(durations, wall_seconds)
+    print_cascade_stats([judge_outcome(crew, durations)])
+    get_usage_ledger().record_crew("debate", crew, wall_seconds, run=inputs['motion_slug'])
+    print(get_usage_ledger().report())
+
+
+def run_batch():
+    """
+    Run the crew for every motion in a file (one per line).
+    Usage: run_batch <motions_file> [max_concurrent]
+    """
+    from debate.batch import print_summary, read_motions, run_motions
+
+    if len(sys.argv) < 2:
+        raise Exception("Usage: run_batch <motions_file> [max_concurrent]")
+    motions = read_motions(sys.argv[1])
+    max_concurrent = int(sys.argv[2]) if len(sys.argv) > 2 else int(os.getenv("DEBATE_MAX_CONCURRENT", "3"))
+
+    start = time.perf_counter()
+    results = asyncio.run(run_motions(motions, max_concurrent))
+    print_summary(results, time.perf_counter() - start)
@@ -0,0 +1,52 @@
+import threading
+
+from crewai.events import BaseEventListener, TaskCompletedEvent, TaskFailedEvent, TaskStartedEvent
+
+
+class TaskTimer(BaseEventListener):
+    """Registra el inicio y el fin de cada tarea a partir de los eventos de crewAI"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._starts = {}
+        self._ends = {}
+        super().__init__()
+
+    def setup_listeners(self, crewai_event_bus):
+        @crewai_event_bus.on(TaskStartedEvent)
+        def on_task_started(source, event):
+            with self._lock:
+                self._starts[str(event.task.id)] = event.timestamp
+
+        @crewai_event_bus.on(TaskCompletedEvent)
+        def on_task_completed(source, event):
+            with self._lock:
+                self._ends[str(event.task.id)] = event.timestamp
+
+        @crewai_event_bus.on(TaskFailedEvent)
+        def on_task_failed(source, event):
+            with self._lock:
+                self._ends[str(event.task.id)] = event.timestamp
+
+    def durations(self, tasks) -> dict:
+        """Devuelve {nombre de tarea: segundos} para las tareas indicadas (ej. crew.tasks)"""
+        result = {}
+        with self._lock:
+            for task in tasks:
+                start, end = self._starts.get(str(task.id)), self._ends.get(str(task.id))
+                if start and end:
+                    result[task.name] = (end - start).total_seconds()
+        return result
+
+
+def print_timings(durations: dict, wall_seconds: float) -> None:
+    """Muestra el tiempo de cada tarea y lo compara con el camino crítico del debate"""
+    print("\n=== TIEMPOS POR TAREA ===")
+    for name, seconds in durations.items():
+        print(f"{name:>10}: {seconds:6.1f}s")
+    if {"propose", "oppose", "decide"} <= durations.keys():
+        sequential = durations["propose"] + durations["oppose"] + durations["decide"]
+        critical_path = max(durations["propose"], durations["oppose"]) + durations["decide"]
+        print(f"{'secuencial':>10}: {sequential:6.1f}s (propose + oppose + decide)")
+        print(f"{'paralelo':>10}: {critical_path:6.1f}s (max(propose, oppose) + decide)")
+    print(f"{'total':>10}: {wall_seconds:6.1f}s")
@@ -1,27 +1,63 @@
 #!/usr/bin/env python
 # src/financial_researcher/main.py
 import os
-from financial_researcher.crew import ResearchCrew
+import sys
+import time
+from pathlib import Path
+# crewAI y crewai_tools se importan dentro de run(); el scheduler los carga solo en sus procesos hijos
+from financial_researcher.scheduler import company_slug, report_path, run_scheduler, run_watchlist
+
+from comun.usage import get_usage_ledger
 
 # Create output directory if it doesn't exist
 os.makedirs('output', exist_ok=True)
 
+def profile_startup():
+    """
+    Muestra el desglose del tiempo de importación de la crew (--profile-startup) y termina.
+    """
+    from comun.startup import profile_startup as print_startup
+
+    print_startup(["financial_researcher.main", "financial_researcher.crew"], cwd=Path(__file__).resolve().parents[1])
+
 def run():
     """
     Ejecuta la crew para investigación financiera y creación de informes.
     """
+    if "--profile-startup" in sys.argv:
+        profile_startup()
+    from financial_researcher.crew import ResearchCrew
+
     inputs = {
-        'company': 'Tesla'
+        'company': 'Tesla',
+        'company_slug': company_slug('Tesla'),
     }
 
     # Create and run the crew
-    result = ResearchCrew().crew().kickoff(inputs=inputs)
+    start = time.perf_counter()
+    crew = ResearchCrew().crew()
+    result = crew.kickoff(inputs=inputs)
+    get_usage_ledger().record_crew("financial_researcher", crew, time.perf_counter() - start,
+                                   run=inputs['company_slug'])
 
     # Print the result
     print("\n\n=== INFORME FINAL ===\n\n")
     print(result.raw)
 
-    print("\n\nEl informe ha sido guardado en output/report.md")
+    print(f"\n\nEl informe ha sido guardado en {report_path(inputs['company'])}")
+    print("\n" + get_usage_ledger().report())
+
+def run_once():
+    """
+    Investiga una vez todas las empresas de la watchlist (las que no cambiaron se omiten).
+    """
+    run_watchlist()
+
+def schedule():
+    """
+    Investiga la watchlist periódicamente según el cron SCHEDULE_CRON.
+    """
+    run_scheduler()
 
 if __name__ == "__main__":
     run()
\ No newline at end of file
@@ -0,0 +1,164 @@
+# src/financial_researcher/scheduler.py
+"""
+Ejecuta la ResearchCrew para una lista de empresas (watchlist) según un cron.
+
+Cada empresa se investiga en un proceso aparte (como máximo SCHEDULER_MAX_WORKERS a la vez),
+para que el estado de crewAI de una ejecución no se filtre a la siguiente. Antes de lanzarla
+se calcula una huella de las entradas de la investigación (empresa, configuración de la crew y
+titulares recientes); si no cambió desde el último informe, la empresa se salta.
+"""
+import hashlib
+import json
+import multiprocessing
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import date, datetime
+
+WATCHLIST_PATH = os.getenv("WATCHLIST_PATH", "watchlist.txt")
+SCHEDULE_CRON = os.getenv("SCHEDULE_CRON", "0 7 * * 1-5")  # días hábiles a las 7:00
+MAX_WORKERS = int(os.getenv("SCHEDULER_MAX_WORKERS", "2"))
+STATE_PATH = os.path.join("output", "state.json")
+CONFIG_FILES = [os.path.join(os.path.dirname(__file__), name) for name in ("agents.yaml", "tasks.yaml")]
+
+
+def company_slug(company: str) -> str:
+    return re.sub(r"[^\w]+", "-", company.lower()).strip("-") or "empresa"
+
+
+def report_path(company: str) -> str:
+    return os.path.join("output", company_slug(company), "report.md")
+
+
+def read_watchlist(path: str = WATCHLIST_PATH) -> list[str]:
+    """Una empresa por línea; se ignoran las líneas vacías, los comentarios (#) y los duplicados"""
+    with open(path, "r", encoding="utf-8") as f:
+        lines = [line.strip() for line in f]
+    return list(dict.fromkeys(line for line in lines if line and not line.startswith("#")))
+
+
+def recent_headlines(company: str) -> list[str]:
+    """Titulares recientes de la empresa (vía la búsqueda de noticias de Serper, con caché)"""
+    # Cliente directo de la API: el proceso padre no carga crewAI ni crewai_tools (solo los hijos)
+    from comun.search_cache import search_news
+
+    try:
+        results = search_news(company, n_results=10)
+    except Exception as e:
+        print(f"No se pudieron obtener noticias de {company}: {e}")
+        return []
+    return sorted(f"{item.get('title', '')} {item.get('link', '')}" for item in results.get("news", []))
+
+
+def input_fingerprint(company: str) -> str:
+    """Huella de todo lo que alimenta la investigación de una empresa"""
+    digest = hashlib.sha256(company.encode("utf-8"))
+    for path in CONFIG_FILES:
+        with open(path, "rb") as f:
+            digest.update(f.read())
+    headlines = recent_headlines(company)
+    # Sin noticias no hay forma de saber si algo cambió: se investiga como mucho una vez por día
+    for line in headlines or [date.today().isoformat()]:
+        digest.update(line.encode("utf-8"))
+    return digest.hexdigest()
+
+
+def load_state() -> dict:
+    if not os.path.exists(STATE_PATH):
+        return {}
+    with open(STATE_PATH, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_state(state: dict) -> None:
+    os.makedirs("output", exist_ok=True)
+    tmp_path = STATE_PATH + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, STATE_PATH)
+
+
+def research_company(company: str) -> dict:
+    """Investiga una empresa. Se ejecuta en un proceso del pool, con su propia crew"""
+    from comun.usage import get_usage_ledger
+    from .crew import ResearchCrew
+
+    start = time.perf_counter()
+    try:
+        crew = ResearchCrew().crew()
+        crew.kickoff(inputs={'company': company, 'company_slug': company_slug(company)})
+    except Exception as e:
+        return {"company": company, "ok": False, "seconds": time.perf_counter() - start, "error": str(e)}
+    seconds = time.perf_counter() - start
+    # El consumo se añade al JSONL desde el proceso hijo; al padre solo vuelve el costo
+    records = get_usage_ledger().record_crew("financial_researcher", crew, seconds, run=company_slug(company))
+    return {"company": company, "ok": True, "seconds": seconds, "report": report_path(company),
+            "cost_usd": sum(r.cost_usd or 0.0 for r in records)}
+
+
+def _new_pool() -> ProcessPoolExecutor:
+    options = {"max_workers": MAX_WORKERS, "mp_context": multiprocessing.get_context("spawn")}
+    if sys.version_info >= (3, 11):
+        # Un proceso nuevo por empresa: nada del estado de crewAI pasa de una ejecución a otra
+        options["max_tasks_per_child"] = 1
+    return ProcessPoolExecutor(**options)
+
+
+def run_watchlist(companies: list[str] | None = None) -> list[dict]:
+    """Investiga las empresas de la watchlist cuyas entradas cambiaron desde el último informe"""
+    companies = companies if companies is not None else read_watchlist()
+    state = load_state()
+    print(f"\n=== Ciclo de investigación {datetime.now():%Y-%m-%d %H:%M} ({len(companies)} empresas) ===")
+
+    pending = {}
+    results = []
+    for company in companies:
+        fingerprint = input_fingerprint(company)
+        previous = state.get(company, {})
+        if previous.get("fingerprint") == fingerprint and os.path.exists(report_path(company)):
+            print(f"Sin cambios, se omite: {company}")
+            results.append({"company": company, "ok": True, "skipped": True})
+        else:
+            pending[company] = fingerprint
+
+    start = time.perf_counter()
+    if pending:
+        with _new_pool() as pool:
+            futures = {pool.submit(research_company, company): company for company in pending}
+            for future in as_completed(futures):
+                company = futures[future]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    result = {"company": company, "ok": False, "error": str(e)}
+                if result["ok"]:
+                    print(f"Informe de {company} listo en {result['seconds']:.1f}s: {result['report']}")
+                    state[company] = {"fingerprint": pending[company], "report": result["report"],
+                                      "updated_at": datetime.now().isoformat(timespec="seconds")}
+                    save_state(state)
+                else:
+                    print(f"Error al investigar {company}: {result.get('error')}")
+                results.append(result)
+
+    researched = sum(1 for r in results if r["ok"] and not r.get("skipped"))
+    skipped = sum(1 for r in results if r.get("skipped"))
+    failed = sum(1 for r in results if not r["ok"])
+    print(f"Ciclo terminado en {time.perf_counter() - start:.1f}s: "
+          f"{researched} investigadas, {skipped} sin cambios, {failed} con error, "
+          f"costo estimado ${sum(r.get('cost_usd', 0.0) for r in results):.4f}")
+    return results
+
+
+def run_scheduler() -> None:
+    """Programa run_watchlist con el cron SCHEDULE_CRON y bloquea el proceso"""
+    from apscheduler.schedulers.blocking import BlockingScheduler
+    from apscheduler.triggers.cron import CronTrigger
+
+    scheduler = BlockingScheduler()
+    # coalesce + max_instances=1: si un ciclo se atrasa, no se acumulan ejecuciones superpuestas
+    scheduler.add_job(run_watchlist, CronTrigger.from_crontab(SCHEDULE_CRON),
+                      max_instances=1, coalesce=True, misfire_grace_time=3600)
+    print(f"Watchlist programada con cron '{SCHEDULE_CRON}' ({WATCHLIST_PATH}, {MAX_WORKERS} procesos)")
+    scheduler.start()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python
+"""
+Compara el tiempo total y el uso de tokens de la crew en sus tres modos: secuencial (el
+modo por defecto), jerárquico y fan-out (una investigación por empresa en paralelo).
+
+Cada ejecución registra su elección en una copia temporal del almacén de empresas elegidas:
+todos los modos parten de las mismas empresas ya elegidas (y, por lo tanto, investigan el mismo
+conjunto) y el benchmark no deja sus elecciones en memory/picks.sqlite.
+
+Uso: benchmark [repeticiones]
+"""
+import asyncio
+import os
+import shutil
+import sys
+import tempfile
+import time
+import warnings
+from datetime import datetime
+
+from stock_picker.crew import StockPicker
+from stock_picker.picks_store import PICKS_DB_PATH, PicksStore, use_picks_store
+
+warnings.filterwarnings("ignore", category=SyntaxWarning, module="pysbd")
+
+MODES = ["sequential", "hierarchical", "fanout"]
+
+
+def run_once(mode: str, inputs: dict, store_path: str) -> dict:
+    use_picks_store(PicksStore(store_path))
+    picker = StockPicker()
+    start = time.perf_counter()
+    if mode == "fanout":
+        asyncio.run(picker.run_fan_out(inputs))
+        # Tres etapas (y una crew por empresa): se suman los tokens de todos los kickoffs
+        usages = [crew.usage_metrics for _, crew, _ in picker.kickoffs]
+    else:
+        picker.process_mode = mode
+        usages = [picker.crew().kickoff(inputs=inputs).token_usage]
+    return {
+        "seconds": time.perf_counter() - start,
+        "total_tokens": sum(usage.total_tokens for usage in usages),
+        "prompt_tokens": sum(usage.prompt_tokens for usage in usages),
+        "completion_tokens": sum(usage.completion_tokens for usage in usages),
+        "requests": sum(usage.successful_requests for usage in usages),
+    }
+
+
+def main():
+    repetitions = int(sys.argv[1]) if len(sys.argv) > 1 else 1
+    inputs = {
+        'sector': 'Tecnología Informática',
+        "current_date": str(datetime.now())
+    }
+
+    runs = {mode: [] for mode in MODES}
+    workdir = tempfile.mkdtemp(prefix="stock-picker-benchmark-")
+    try:
+        for i in range(repetitions):
+            # Rotar el orden para no favorecer siempre al mismo modo (caché de búsquedas, carga de la API)
+            for mode in MODES[i % len(MODES):] + MODES[:i % len(MODES)]:
+                print(f"\n=== {mode} (ejecución {i + 1}/{repetitions}) ===")
+                # Copia del almacén real tal como estaba antes del benchmark
+                store_path = os.path.join(workdir, f"picks-{mode}-{i}.sqlite")
+                if os.path.exists(PICKS_DB_PATH):
+                    shutil.copyfile(PICKS_DB_PATH, store_path)
+                runs[mode].append(run_once(mode, inputs, store_path))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print("\n\n=== BENCHMARK (promedio por ejecución) ===\n")
+    print(f"{'modo':<14}{'tiempo (s)':>12}{'tokens':>10}{'prompt':>10}{'completion':>12}{'llamadas':>10}")
+    averages = {}
+    for mode, results in runs.items():
+        averages[mode] = {key: sum(r[key] for r in results) / len(results) for key in results[0]}
+        a = averages[mode]
+        print(f"{mode:<14}{a['seconds']:>12.1f}{a['total_tokens']:>10.0f}{a['prompt_tokens']:>10.0f}"
+              f"{a['completion_tokens']:>12.0f}{a['requests']:>10.1f}")
+
+    # Todo se compara con el modo por defecto (sequential)
+    seq = averages["sequential"]
+    for mode in ("hierarchical", "fanout"):
+        other = averages[mode]
+        if seq["seconds"] and seq["total_tokens"]:
+            print(f"\n{mode} vs sequential: {other['seconds'] / seq['seconds'] - 1:+.0%} tiempo, "
+                  f"{other['total_tokens'] / seq['total_tokens'] - 1:+.0%} tokens")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,14 @@
+import asyncio
+import os
+import time
+
 from crewai import Agent, Crew, Process, Task
 from crewai.project import CrewBase, agent, crew, task
-from crewai_tools import SerperDevTool
+from crewai.tasks.task_output import TaskOutput
+from comun.cached_search import CachedSerperDevTool
+from .picks_store import PickDecision, PickedCompaniesTool, get_picks_store, record_pick
 from pydantic import BaseModel, Field
-from typing import List
+from typing import Any, List, Tuple
 #from .tools.push_tool import PushNotificationTool
 # from crewai.memory import LongTermMemory, ShortTermMemory, EntityMemory
 # from crewai.memory.storage.rag_storage import RAGStorage
@@ -30,6 +36,26 @@ class TrendingCompanyResearchList(BaseModel):
     research_list: List[TrendingCompanyResearch] = Field(description="Investigación exhaustiva sobre todas las empresas en tendencia")
 
 
+def skip_picked_companies(output: TaskOutput) -> Tuple[bool, Any]:
+    """
+    Guardrail de find_trending_companies: quita de la lista las empresas ya elegidas antes,
+    para no gastar tiempo de investigación en ellas. Si no queda ninguna, pide otra búsqueda
+    (hasta `StockPicker.find_max_retries` veces).
+    """
+    found = output.pydantic
+    if not isinstance(found, TrendingCompanyList):
+        return True, output
+    store = get_picks_store()
+    new = [company for company in found.companies if not store.is_picked(company.ticker)]
+    skipped = [company.ticker for company in found.companies if store.is_picked(company.ticker)]
+    if skipped:
+        print(f"Empresas ya elegidas antes, descartadas: {', '.join(skipped)}")
+    if not new:
+        return False, (f"Todas las empresas encontradas ya fueron elegidas antes ({', '.join(skipped)}). "
+                       f"Encuentra otras empresas en tendencia distintas de: {', '.join(sorted(store.tickers))}")
+    return True, TrendingCompanyList(companies=new).model_dump_json()
+
+
 @CrewBase
 class StockPicker():
     """Crew para seleccionar la mejor empresa para inversión"""
@@ -37,16 +63,31 @@ class StockPicker():
     agents_config = 'config/agents.yaml'
     tasks_config = 'config/tasks.yaml'
 
+    # "single" (por defecto): un solo investigador analiza todas las empresas dentro de la crew,
+    #   que se ejecuta según process_mode
+    # "fanout" (opcional): una tarea de investigación por empresa, todas en paralelo (ver
+    #   run_fan_out); no usa process_mode. `benchmark` compara los tres modos
+    research_mode = os.getenv("STOCK_PICKER_RESEARCH", "single")
+
+    # Solo con research_mode="single":
+    # "sequential": find -> research -> pick encadenadas directamente (sin manager)
+    # "hierarchical": un manager con gpt-4o delega cada tarea en los agentes
+    process_mode = os.getenv("STOCK_PICKER_PROCESS", "sequential")
+
+    # Búsquedas de empresas que puede rechazar skip_picked_companies antes de que la crew falle:
+    # cuantas más empresas ya elegidas, más probable es que una búsqueda solo encuentre repetidas
+    find_max_retries = int(os.getenv("STOCK_PICKER_FIND_RETRIES", "6"))
+
     @agent
     def trending_company_finder(self) -> Agent:
         return Agent(config=self.agents_config['trending_company_finder'],
-                     tools=[SerperDevTool()]) #, 
+                     tools=[CachedSerperDevTool(), PickedCompaniesTool()]) #, 
                      #memory = True)
     
     @agent
     def financial_researcher(self) -> Agent:
         return Agent(config=self.agents_config['financial_researcher'], 
-                     tools=[SerperDevTool()])
+                     tools=[CachedSerperDevTool()])
 
     @agent
     def stock_picker(self) -> Agent:
@@ -59,6 +100,8 @@ class StockPicker():
         return Task(
             config=self.tasks_config['find_trending_companies'],
             output_pydantic=TrendingCompanyList,
+            guardrail=skip_picked_companies,
+            guardrail_max_retries=self.find_max_retries,
         )
 
     @task
@@ -70,8 +113,11 @@ class StockPicker():
 
     @task
     def pick_best_company(self) -> Task:
+        # La empresa elegida se registra desde la salida estructurada (callback), no con una herramienta
         return Task(
             config=self.tasks_config['pick_best_company'],
+            output_pydantic=PickDecision,
+            callback=record_pick,
         )
     
 
@@ -81,6 +127,15 @@ class StockPicker():
     def crew(self) -> Crew:
         """Crea la crew para seleccionar la mejor empresa para inversión"""
 
+        if self.process_mode == "sequential":
+            # El flujo es fijo, así que cada tarea ya sabe qué agente la ejecuta y
+            # de qué tarea recibe el contexto: no hacen falta las llamadas del manager
+            return Crew(
+                agents=self.agents,
+                tasks=self.tasks,
+                process=Process.sequential,
+                verbose=True)
+
         manager = Agent(
             config=self.agents_config['manager'],
             allow_delegation=True # Permite que los agentes deleguen tareas al manager  
@@ -132,4 +187,87 @@ class StockPicker():
             # long_term_memory = long_term_memory,
             # short_term_memory = short_term_memory,            
             # entity_memory = entity_memory,
-        #)
\ No newline at end of file
+        #)
+
+    # --- Modo fan-out: encontrar -> investigar cada empresa en paralelo -> elegir ---
+
+    def find_crew(self) -> Crew:
+        """Crew que solo encuentra las empresas en tendencia"""
+        return Crew(
+            agents=[self.trending_company_finder()],
+            tasks=[self.find_trending_companies()],
+            process=Process.sequential,
+            verbose=True)
+
+    def research_crew(self) -> Crew:
+        """Crew que investiga una sola empresa, con su propio investigador para poder correr en paralelo"""
+        researcher = Agent(config=self.agents_config['financial_researcher'],
+                           tools=[CachedSerperDevTool()])
+        research = Task(
+            config=self.tasks_config['research_company'],
+            agent=researcher,
+            output_pydantic=TrendingCompanyResearch,
+        )
+        return Crew(agents=[researcher], tasks=[research], process=Process.sequential, verbose=True)
+
+    def pick_crew(self) -> Crew:
+        """Crew que elige la mejor empresa a partir de la investigación recibida en el input {research}"""
+        config = {key: value for key, value in self.tasks_config['pick_best_company'].items() if key != 'context'}
+        pick = Task(
+            config=config,
+            description=config['description'] + "\nInvestigación de las empresas:\n{research}\n",
+            output_pydantic=PickDecision,
+            callback=record_pick,
+        )
+        return Crew(agents=[self.stock_picker()], tasks=[pick], process=Process.sequential, verbose=True)
+
+    async def research_one_company(self, company: TrendingCompany, inputs: dict) -> TrendingCompanyResearch:
+        start = time.perf_counter()
+        crew = self.research_crew()
+        result = await crew.kickoff_async(inputs={
+            **inputs,
+            'company_name': company.name,
+            'company_ticker': company.ticker,
+            'company_reason': company.reason,
+        })
+        seconds = time.perf_counter() - start
+        self.kickoffs.append(("research", crew, seconds))
+        print(f"Investigación de {company.name} ({company.ticker}): {seconds:.1f}s")
+        return result.pydantic
+
+    async def run_fan_out(self, inputs: dict):
+        """
+        Ejecuta el flujo encontrar -> investigar -> elegir investigando cada empresa en paralelo,
+        de modo que la investigación tarda lo que la empresa más lenta y no la suma de todas.
+
+        Cada kickoff queda en `self.kickoffs` como (etapa, crew, segundos), para contabilizar
+        sus tokens.
+        """
+        self.kickoffs = []
+        start = time.perf_counter()
+        crew = self.find_crew()
+        found = await crew.kickoff_async(inputs=inputs)
+        self.kickoffs.append(("find", crew, time.perf_counter() - start))
+        companies = found.pydantic.companies
+
+        start = time.perf_counter()
+        results = await asyncio.gather(*(self.research_one_company(company, inputs) for company in companies),
+                                       return_exceptions=True)
+        research_list = []
+        for company, result in zip(companies, results):
+            if isinstance(result, TrendingCompanyResearch):
+                research_list.append(result)
+            else:
+                print(f"No se pudo investigar {company.name}: {result}")
+        print(f"Investigación de {len(companies)} empresas en paralelo: {time.perf_counter() - start:.1f}s")
+
+        research = TrendingCompanyResearchList(research_list=research_list)
+        os.makedirs("output", exist_ok=True)
+        with open("output/research_report.json", "w", encoding="utf-8") as f:
+            f.write(research.model_dump_json(indent=2))
+
+        start = time.perf_counter()
+        crew = self.pick_crew()
+        result = await crew.kickoff_async(inputs={**inputs, 'research': research.model_dump_json(indent=2)})
+        self.kickoffs.append(("pick", crew, time.perf_counter() - start))
+        return result
\ No newline at end of file
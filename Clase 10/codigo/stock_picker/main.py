@@ -1,29 +1,60 @@
 #!/usr/bin/env python
+import asyncio
 import sys
+import time
+import uuid
 import warnings
 import os
 from datetime import datetime
-
-from stock_picker.crew import StockPicker
+from pathlib import Path
 
 warnings.filterwarnings("ignore", category=SyntaxWarning, module="pysbd")
 
+from comun.usage import get_usage_ledger
+
+# crewAI y crewai_tools se importan dentro de run(): cargarlos cuesta varios segundos
+
+
+def profile_startup():
+    """
+    Muestra el desglose del tiempo de importación de la crew (--profile-startup) y termina.
+    """
+    from comun.startup import profile_startup as print_startup
+
+    print_startup(["stock_picker.main", "stock_picker.crew"], cwd=Path(__file__).resolve().parents[1])
+
 
 def run():
     """
     Ejecuta la crew para seleccionar la mejor empresa para inversión.
     """
+    if "--profile-startup" in sys.argv:
+        profile_startup()
+    from stock_picker.crew import StockPicker
+
     inputs = {
         'sector': 'Tecnología Informática',
         "current_date": str(datetime.now())
     }
 
     # Create and run the crew
-    result = StockPicker().crew().kickoff(inputs=inputs)
+    picker = StockPicker()
+    run_id = uuid.uuid4().hex[:12]
+    ledger = get_usage_ledger()
+    if picker.research_mode == "fanout":
+        result = asyncio.run(picker.run_fan_out(inputs))
+        for stage, crew, seconds in picker.kickoffs:
+            ledger.record_crew(f"stock_picker.{stage}", crew, seconds, run=run_id)
+    else:
+        start = time.perf_counter()
+        crew = picker.crew()
+        result = crew.kickoff(inputs=inputs)
+        ledger.record_crew("stock_picker", crew, time.perf_counter() - start, run=run_id)
 
     # Print the result
     print("\n\n=== DECISION FINAL ===\n\n")
-    print(result.raw)
+    print(result.pydantic.report if result.pydantic else result.raw)
+    print("\n" + ledger.report(run=run_id))
 
 
 if __name__ == "__main__":
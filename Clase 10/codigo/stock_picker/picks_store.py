@@ -0,0 +1,116 @@
+from crewai.tools import BaseTool
+from typing import Type
+from pydantic import BaseModel, Field
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime
+
+PICKS_DB_PATH = os.getenv("PICKS_DB_PATH", "memory/picks.sqlite")
+
+
+def normalize_ticker(ticker: str) -> str:
+    """ "nasdaq: nvda " -> "NVDA" """
+    return (ticker or "").split(":")[-1].strip().upper()
+
+
+class PicksStore:
+    """Empresas ya elegidas en ejecuciones anteriores: SQLite por ticker + un set en memoria para consultarlas sin I/O"""
+
+    def __init__(self, path: str = PICKS_DB_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS picks (ticker TEXT PRIMARY KEY, name TEXT, reason TEXT, picked_at TEXT)")
+            self._tickers = {row[0] for row in conn.execute("SELECT ticker FROM picks")}
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=30)
+
+    def is_picked(self, ticker: str) -> bool:
+        return normalize_ticker(ticker) in self._tickers
+
+    @property
+    def tickers(self) -> set[str]:
+        return set(self._tickers)
+
+    def add(self, ticker: str, name: str, reason: str = "") -> bool:
+        """Registra una elección. Devuelve False si la empresa ya había sido elegida"""
+        ticker = normalize_ticker(ticker)
+        with self._lock:
+            if ticker in self._tickers:
+                return False
+            with self._connect() as conn:
+                conn.execute("INSERT OR IGNORE INTO picks (ticker, name, reason, picked_at) VALUES (?, ?, ?, ?)",
+                             (ticker, name, reason, datetime.now().isoformat(timespec="seconds")))
+            self._tickers.add(ticker)
+        return True
+
+
+_store: PicksStore | None = None
+_store_lock = threading.Lock()
+
+
+def get_picks_store() -> PicksStore:
+    """Devuelve el almacén compartido, cargándolo la primera vez"""
+    global _store
+    # En el modo fan-out cada kickoff_async corre en su propio hilo y todos lo usan
+    with _store_lock:
+        if _store is None:
+            _store = PicksStore()
+        return _store
+
+
+def use_picks_store(store: PicksStore) -> None:
+    """Reemplaza el almacén compartido (el benchmark usa uno temporal en cada ejecución)"""
+    global _store
+    with _store_lock:
+        _store = store
+
+
+class PickedCompanyQuery(BaseModel):
+    """Consulta sobre empresas ya elegidas"""
+
+    ticker: str = Field("", description="Símbolo de la acción a consultar. Vacío para listar todas las empresas ya elegidas.")
+
+class PickedCompaniesTool(BaseTool):
+    """Herramienta para saber si una empresa ya fue elegida antes"""
+
+    name: str = "Consultar empresas ya elegidas"
+    description: str = (
+        "Esta herramienta indica si una empresa (por su ticker) ya fue elegida en una ejecución anterior, "
+        "o lista todas las empresas ya elegidas si no se indica ticker."
+    )
+    args_schema: Type[BaseModel] = PickedCompanyQuery
+
+    def _run(self, ticker: str = "") -> str:
+        store = get_picks_store()
+        if not ticker:
+            return json.dumps({"picked": sorted(store.tickers)})
+        return json.dumps({"ticker": normalize_ticker(ticker), "already_picked": store.is_picked(ticker)})
+
+
+class PickDecision(BaseModel):
+    """Decisión del seleccionador: salida estructurada de la tarea pick_best_company"""
+
+    ticker: str = Field(..., description="Símbolo de la acción elegida.")
+    name: str = Field(..., description="Nombre de la empresa elegida.")
+    reason: str = Field(..., description="Razón de la elección en una frase.")
+    report: str = Field(..., description="Informe detallado: por qué se eligió esta empresa y por qué no las demás.")
+
+
+def record_pick(output) -> None:
+    """
+    Callback de la tarea pick_best_company: registra la empresa elegida a partir de la salida
+    estructurada de la tarea, sin depender de que el LLM decida llamar a una herramienta
+    """
+    decision = output.pydantic
+    if not isinstance(decision, PickDecision):
+        print("La decisión no tiene el formato esperado: no se registra la empresa elegida")
+        return
+    if get_picks_store().add(decision.ticker, decision.name, decision.reason):
+        print(f"Empresa elegida registrada: {decision.name} ({normalize_ticker(decision.ticker)})")
+    else:
+        print(f"{decision.name} ({normalize_ticker(decision.ticker)}) ya estaba registrada")
@@ -1,13 +1,132 @@
 from crewai.tools import BaseTool
 from typing import Type
 from pydantic import BaseModel, Field
+import asyncio
+import concurrent.futures
+import json
 import os
-import requests
+import threading
+import time
+
+import httpx
+
+PUSHOVER_URL = "https://api.pushover.net/1/messages.json"
+PUSHOVER_MAX_LENGTH = 1024
+REQUEST_TIMEOUT_SECONDS = float(os.getenv("PUSH_TIMEOUT_SECONDS", "10"))
+MAX_ATTEMPTS = int(os.getenv("PUSH_MAX_ATTEMPTS", "3"))
+RETRY_BASE_SECONDS = float(os.getenv("PUSH_RETRY_BASE_SECONDS", "1"))
+# Las notificaciones que llegan dentro de esta ventana se envían juntas en un solo mensaje
+COALESCE_SECONDS = float(os.getenv("PUSH_COALESCE_SECONDS", "2"))
+# Intervalo mínimo entre dos envíos a Pushover
+MIN_INTERVAL_SECONDS = float(os.getenv("PUSH_MIN_INTERVAL_SECONDS", "5"))
+
+
+def merge_messages(messages: list[str]) -> str:
+    """Une varias notificaciones en un solo mensaje, respetando el límite de longitud de Pushover"""
+    if len(messages) == 1:
+        merged = messages[0]
+    else:
+        merged = f"{len(messages)} notificaciones:\n" + "\n".join(f"- {m}" for m in messages)
+    return merged if len(merged) <= PUSHOVER_MAX_LENGTH else merged[:PUSHOVER_MAX_LENGTH - 1] + "…"
+
+
+class PushDispatcher:
+    """
+    Cola de notificaciones con su propio event loop en un hilo aparte.
+
+    Comparte un único cliente HTTP (con pool de conexiones) entre todos los agentes, agrupa
+    las notificaciones que llegan en ráfaga, limita la frecuencia de envío y reintenta con
+    espera exponencial. Cada llamador recibe el estado real de la entrega.
+    """
+
+    def __init__(self):
+        self._loop = asyncio.new_event_loop()
+        threading.Thread(target=self._loop.run_forever, name="push-dispatcher", daemon=True).start()
+        self._pending: list[tuple[str, asyncio.Future]] = []
+        self._send_lock: asyncio.Lock | None = None
+        self._client: httpx.AsyncClient | None = None
+        self._last_sent = 0.0
+
+    def submit(self, message: str) -> concurrent.futures.Future:
+        """Encola una notificación desde cualquier hilo o event loop"""
+        return asyncio.run_coroutine_threadsafe(self._enqueue(message), self._loop)
+
+    async def _enqueue(self, message: str) -> dict:
+        future = self._loop.create_future()
+        self._pending.append((message, future))
+        if len(self._pending) == 1:
+            self._loop.create_task(self._flush_after_window())
+        return await future
+
+    async def _flush_after_window(self) -> None:
+        await asyncio.sleep(COALESCE_SECONDS)
+        if self._send_lock is None:
+            self._send_lock = asyncio.Lock()
+        async with self._send_lock:
+            wait = self._last_sent + MIN_INTERVAL_SECONDS - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            # Lo que llegó mientras se esperaba también viaja en este envío
+            batch, self._pending = self._pending, []
+            self._last_sent = time.monotonic()
+            try:
+                status = await self._deliver(merge_messages([message for message, _ in batch]))
+            except Exception as e:
+                status = {"notification": "failed", "error": str(e)}
+            for _, future in batch:
+                if not future.done():
+                    future.set_result({**status, "merged": len(batch)})
+
+    async def _deliver(self, message: str) -> dict:
+        user, token = os.getenv("PUSHOVER_USER"), os.getenv("PUSHOVER_TOKEN")
+        if not user or not token:
+            return {"notification": "failed", "error": "Faltan PUSHOVER_USER o PUSHOVER_TOKEN"}
+        if self._client is None:
+            self._client = httpx.AsyncClient(timeout=REQUEST_TIMEOUT_SECONDS,
+                                             limits=httpx.Limits(max_connections=4, max_keepalive_connections=2))
+
+        print(f"Push: {message}")
+        payload = {"user": user, "token": token, "message": message}
+        error = None
+        for attempt in range(1, MAX_ATTEMPTS + 1):
+            try:
+                response = await self._client.post(PUSHOVER_URL, data=payload)
+                if response.status_code == 200:
+                    return {"notification": "sent", "status_code": 200, "attempts": attempt,
+                            "request": response.json().get("request")}
+                error = f"HTTP {response.status_code}: {response.text[:200]}"
+                # Los errores 4xx (salvo 429) son de la petición: reintentar no sirve
+                if 400 <= response.status_code < 500 and response.status_code != 429:
+                    return {"notification": "failed", "status_code": response.status_code,
+                            "attempts": attempt, "error": error}
+            except httpx.HTTPError as e:
+                error = f"{type(e).__name__}: {e}"
+            if attempt < MAX_ATTEMPTS:
+                await asyncio.sleep(RETRY_BASE_SECONDS * 2 ** (attempt - 1))
+        return {"notification": "failed", "attempts": MAX_ATTEMPTS, "error": error}
+
+    def max_wait_seconds(self) -> float:
+        """Cota de lo que puede tardar una notificación en entregarse (o fallar definitivamente)"""
+        retries = sum(RETRY_BASE_SECONDS * 2 ** i for i in range(MAX_ATTEMPTS - 1))
+        return COALESCE_SECONDS + MIN_INTERVAL_SECONDS + MAX_ATTEMPTS * REQUEST_TIMEOUT_SECONDS + retries
+
+
+_dispatcher: PushDispatcher | None = None
+_dispatcher_lock = threading.Lock()
+
+
+def get_dispatcher() -> PushDispatcher:
+    """Devuelve el despachador compartido del proceso, creándolo la primera vez"""
+    global _dispatcher
+    with _dispatcher_lock:
+        if _dispatcher is None:
+            _dispatcher = PushDispatcher()
+        return _dispatcher
 
 
 class PushNotification(BaseModel):
     """Un mensaje a ser enviado al usuario"""
-    
+
     message: str = Field(..., description="El mensaje a ser enviado al usuario.")
 
 class PushNotificationTool(BaseTool):
@@ -20,11 +139,18 @@ class PushNotificationTool(BaseTool):
     args_schema: Type[BaseModel] = PushNotification
 
     def _run(self, message: str) -> str:
-        pushover_user = os.getenv("PUSHOVER_USER")
-        pushover_token = os.getenv("PUSHOVER_TOKEN")
-        pushover_url = "https://api.pushover.net/1/messages.json"
+        dispatcher = get_dispatcher()
+        try:
+            status = dispatcher.submit(message).result(timeout=dispatcher.max_wait_seconds())
+        except concurrent.futures.TimeoutError:
+            status = {"notification": "pending", "error": "La entrega sigue en curso"}
+        return json.dumps(status)
 
-        print(f"Push: {message}")
-        payload = {"user": pushover_user, "token": pushover_token, "message": message}
-        requests.post(pushover_url, data=payload)
-        return '{"notification": "ok"}'
\ No newline at end of file
+    async def _arun(self, message: str) -> str:
+        dispatcher = get_dispatcher()
+        try:
+            status = await asyncio.wait_for(asyncio.wrap_future(dispatcher.submit(message)),
+                                            timeout=dispatcher.max_wait_seconds())
+        except asyncio.TimeoutError:
+            status = {"notification": "pending", "error": "La entrega sigue en curso"}
+        return json.dumps(status)
@@ -0,0 +1,3 @@
+"""
+Utilidades compartidas por los scripts del curso.
+"""
@@ -0,0 +1,23 @@
+"""
+Módulo de la Herramienta de Búsqueda con Caché.
+
+`CachedSerperDevTool` es un `SerperDevTool` de crewai_tools que sirve desde la caché de
+`search_cache.py` las búsquedas repetidas. Lo usan las crews de `Clase 10/codigo`
+(stock_picker y financial_researcher), que comparten la misma caché entre ellas y entre
+ejecuciones.
+"""
+
+from crewai_tools import SerperDevTool
+
+from comun.search_cache import get_search_cache, normalize_query
+
+
+class CachedSerperDevTool(SerperDevTool):
+    """SerperDevTool que sirve desde la caché las búsquedas repetidas (mismo uso para los agentes)"""
+
+    def _run(self, **kwargs):
+        query = kwargs.get("search_query") or kwargs.get("query") or ""
+        options = [getattr(self, name, None) for name in ("search_type", "n_results", "country", "location", "locale")]
+        key = "|".join([normalize_query(query)] + ["" if option is None else str(option) for option in options])
+        search = super()._run
+        return get_search_cache().get_or_run(key, lambda: search(**kwargs))
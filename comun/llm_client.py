@@ -0,0 +1,404 @@
+"""
+Módulo del Cliente LLM Multiproveedor.
+
+Este módulo reúne en un solo cliente los proveedores compatibles con la API de OpenAI
+que se usan en el curso (OpenAI, Groq, Gemini, DeepSeek y Ollama). Para cada proveedor
+mantiene una ventana móvil con la latencia y los errores de sus últimas llamadas y la
+usa para:
+
+- Conmutar por error: si un proveedor falla, la llamada se repite en el siguiente, y
+  los proveedores con una tasa de error alta pasan al final de la lista. Pasado un tiempo
+  de espera, un proveedor degradado recibe una llamada de prueba: si responde, vuelve a
+  su lugar; si falla, espera otro periodo.
+- Enviar peticiones de respaldo ("hedging"): si el proveedor principal tarda más que su
+  p95, se lanza la misma petición en el siguiente proveedor y se usa la primera respuesta.
+
+El orden de preferencia se configura con la variable de entorno LLM_PROVIDERS
+(ej. "openai,groq,gemini"). Solo se usan los proveedores que tienen su API key definida.
+
+Los tokens, la latencia y el costo de cada llamada (incluidas las de respaldo que pierden)
+quedan en el registro de consumo compartido (`comun/usage.py`) bajo su `call_site`.
+"""
+
+import asyncio
+import contextvars
+import os
+import threading
+import time
+import weakref
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+
+from openai import AsyncOpenAI, OpenAI
+
+from comun.usage import get_usage_ledger, percentile
+
+DEFAULT_PROVIDERS = "openai,groq,gemini,deepseek"
+WINDOW_SIZE = int(os.getenv("LLM_WINDOW_SIZE", "50"))
+# Muestras mínimas antes de confiar en el p95 de un proveedor para decidir el hedging
+MIN_SAMPLES = int(os.getenv("LLM_MIN_SAMPLES", "10"))
+MAX_ERROR_RATE = float(os.getenv("LLM_MAX_ERROR_RATE", "0.5"))
+# Segundos que un proveedor degradado espera antes de recibir una llamada de prueba
+RETRY_AFTER_SECONDS = float(os.getenv("LLM_RETRY_AFTER_SECONDS", "30"))
+TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", "60"))
+HEDGE_ENABLED = os.getenv("LLM_HEDGE", "1") == "1"
+
+
+@dataclass
+class Endpoint:
+    """
+    Un proveedor compatible con la API de OpenAI.
+
+    Atributos:
+        name (str): Nombre del proveedor (clave del registro).
+        base_url (str | None): URL base de la API (None para OpenAI).
+        api_key_env (str | None): Variable de entorno con la API key.
+        model (str): Modelo por defecto del proveedor.
+        api_key_default (str | None): API key fija para servidores locales (Ollama).
+    """
+    name: str
+    base_url: str | None
+    api_key_env: str | None
+    model: str
+    api_key_default: str | None = None
+
+    @property
+    def api_key(self) -> str | None:
+        return os.getenv(self.api_key_env) if self.api_key_env else self.api_key_default
+
+    @property
+    def default_model(self) -> str:
+        # Permite cambiar el modelo de un proveedor sin tocar el código (ej. LLM_MODEL_GROQ)
+        return os.getenv(f"LLM_MODEL_{self.name.upper()}", self.model)
+
+
+# Registro de proveedores conocidos
+ENDPOINTS: dict[str, Endpoint] = {
+    "openai": Endpoint("openai", None, "OPENAI_API_KEY", "gpt-4o-mini"),
+    "groq": Endpoint("groq", "https://api.groq.com/openai/v1", "GROQ_API_KEY", "llama-3.3-70b-versatile"),
+    "gemini": Endpoint("gemini", "https://generativelanguage.googleapis.com/v1beta/openai/", "GOOGLE_API_KEY", "gemini-2.5-flash"),
+    "deepseek": Endpoint("deepseek", "https://api.deepseek.com/v1", "DEEPSEEK_API_KEY", "deepseek-chat"),
+    "ollama": Endpoint("ollama", os.getenv("OLLAMA_BASE_URL", "http://localhost:11434/v1"), None, "llama3.1", api_key_default="ollama"),
+}
+
+
+def register_endpoint(endpoint: Endpoint) -> None:
+    """Agrega (o reemplaza) un proveedor en el registro."""
+    ENDPOINTS[endpoint.name] = endpoint
+
+
+class EndpointStats:
+    """
+    Ventana móvil de las últimas llamadas a un proveedor.
+
+    Atributos:
+        calls (int): Llamadas totales.
+        errors (int): Llamadas fallidas totales.
+        hedges (int): Veces que se lanzó una petición de respaldo por su lentitud.
+        hedge_wins (int): Veces que respondió antes como proveedor de respaldo.
+        probes (int): Llamadas de prueba recibidas mientras estaba degradado.
+        model_swaps (int): Llamadas en las que usó su modelo por defecto en lugar del pedido.
+    """
+
+    def __init__(self, window: int = WINDOW_SIZE):
+        self._lock = threading.Lock()
+        self._samples: deque[tuple[float, bool]] = deque(maxlen=window)
+        # Momento (time.monotonic) a partir del cual se permite la próxima llamada de prueba
+        self._retry_at: float | None = None
+        self.calls = 0
+        self.errors = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.probes = 0
+        self.model_swaps = 0
+
+    def record(self, seconds: float, ok: bool) -> None:
+        with self._lock:
+            if ok and self._retry_at is not None:
+                # Respondió estando degradado: se olvidan los errores anteriores y vuelve a su lugar
+                self._samples.clear()
+                self._retry_at = None
+            self._samples.append((seconds, ok))
+            self.calls += 1
+            self.errors += 0 if ok else 1
+
+    def available(self) -> bool:
+        """
+        Indica si el proveedor puede ir en su lugar de preferencia.
+
+        Un proveedor con una tasa de error mayor que MAX_ERROR_RATE queda degradado; cada
+        RETRY_AFTER_SECONDS se le concede una llamada de prueba (estado "semiabierto").
+        """
+        with self._lock:
+            if self._error_rate() <= MAX_ERROR_RATE:
+                return True
+            now = time.monotonic()
+            if self._retry_at is None:
+                self._retry_at = now + RETRY_AFTER_SECONDS
+                return False
+            if now < self._retry_at:
+                return False
+            # Una sola prueba por periodo: la siguiente, como pronto, dentro de RETRY_AFTER_SECONDS
+            self._retry_at = now + RETRY_AFTER_SECONDS
+            self.probes += 1
+            return True
+
+    def _latencies(self) -> list[float]:
+        with self._lock:
+            return [seconds for seconds, ok in self._samples if ok]
+
+    def p95(self) -> float | None:
+        """p95 de la latencia de las llamadas exitosas, o None si aún no hay muestras suficientes."""
+        latencies = self._latencies()
+        return percentile(latencies, 95) if len(latencies) >= MIN_SAMPLES else None
+
+    def _error_rate(self) -> float:
+        return sum(not ok for _, ok in self._samples) / len(self._samples) if self._samples else 0.0
+
+    def error_rate(self) -> float:
+        with self._lock:
+            return self._error_rate()
+
+    def to_dict(self) -> dict:
+        latencies = self._latencies()
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "error_rate": round(self.error_rate(), 3),
+            "p50_seconds": round(percentile(latencies, 50), 2) if latencies else None,
+            "p95_seconds": round(percentile(latencies, 95), 2) if latencies else None,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "probes": self.probes,
+            "model_swaps": self.model_swaps,
+        }
+
+
+class LLMClient:
+    """
+    Cliente de chat con conmutación por error y peticiones de respaldo entre proveedores.
+
+    `chat` y `achat` aceptan los mismos argumentos que `chat.completions.create` y devuelven
+    la misma respuesta. El `model` indicado se usa con el proveedor preferido (el primero de
+    LLM_PROVIDERS); los demás proveedores usan su modelo por defecto. Cada sustitución se
+    avisa por consola, se cuenta en `model_swaps` y queda en el registro de consumo con el
+    modelo que respondió de verdad.
+
+    Atributos:
+        endpoints (list[Endpoint]): Proveedores disponibles, en orden de preferencia.
+        stats (dict[str, EndpointStats]): Estadísticas por proveedor.
+        failovers (int): Veces que una llamada pasó al siguiente proveedor por un error.
+    """
+
+    def __init__(self, providers: list[str] | None = None, hedge: bool = HEDGE_ENABLED):
+        names = providers or [name.strip() for name in os.getenv("LLM_PROVIDERS", DEFAULT_PROVIDERS).split(",") if name.strip()]
+        self.endpoints = [ENDPOINTS[name] for name in names if name in ENDPOINTS and ENDPOINTS[name].api_key]
+        if not self.endpoints:
+            raise RuntimeError("No hay ningún proveedor LLM disponible: revisa LLM_PROVIDERS y las API keys.")
+        self.stats = {endpoint.name: EndpointStats() for endpoint in self.endpoints}
+        self.hedge = hedge
+        self.failovers = 0
+        self._clients: dict[str, OpenAI] = {}
+        # Un diccionario por event loop; se libera solo cuando el loop deja de existir
+        self._async_clients: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, dict[str, AsyncOpenAI]] = \
+            weakref.WeakKeyDictionary()
+        self._clients_lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="llm")
+
+    def _client(self, endpoint: Endpoint) -> OpenAI:
+        with self._clients_lock:
+            if endpoint.name not in self._clients:
+                # Sin reintentos internos: de los errores se encarga la conmutación entre proveedores
+                self._clients[endpoint.name] = OpenAI(base_url=endpoint.base_url, api_key=endpoint.api_key,
+                                                      timeout=TIMEOUT_SECONDS, max_retries=0)
+            return self._clients[endpoint.name]
+
+    def _async_client(self, endpoint: Endpoint) -> AsyncOpenAI:
+        # Un cliente asíncrono por event loop: sus conexiones no se pueden compartir entre loops
+        loop = asyncio.get_running_loop()
+        with self._clients_lock:
+            clients = self._async_clients.setdefault(loop, {})
+            if endpoint.name not in clients:
+                clients[endpoint.name] = AsyncOpenAI(base_url=endpoint.base_url, api_key=endpoint.api_key,
+                                                     timeout=TIMEOUT_SECONDS, max_retries=0)
+            return clients[endpoint.name]
+
+    def ranked(self, exclude: set[str] = frozenset()) -> list[Endpoint]:
+        """
+        Proveedores en orden de preferencia; los que superan MAX_ERROR_RATE pasan al final,
+        salvo cuando les toca una llamada de prueba (ver `EndpointStats.available`).
+        """
+        candidates = [endpoint for endpoint in self.endpoints if endpoint.name not in exclude]
+        healthy = [endpoint for endpoint in candidates if self.stats[endpoint.name].available()]
+        return healthy + [endpoint for endpoint in candidates if endpoint not in healthy]
+
+    def _model(self, endpoint: Endpoint, model: str | None) -> str:
+        """Modelo con el que se llama a `endpoint`; avisa si no es el pedido."""
+        if not model or endpoint is self.endpoints[0] or model == endpoint.default_model:
+            return model or endpoint.default_model
+        self.stats[endpoint.name].model_swaps += 1
+        print(f"[llm] {endpoint.name} no sirve {model}: se usa su modelo por defecto {endpoint.default_model}")
+        return endpoint.default_model
+
+    def _hedge_delay(self, primary: Endpoint, backup: Endpoint | None) -> float | None:
+        return self.stats[primary.name].p95() if self.hedge and backup else None
+
+    # --- Versión síncrona ---
+
+    def _call(self, endpoint: Endpoint, model: str | None, messages: list, kwargs: dict, call_site: str):
+        model = self._model(endpoint, model)
+        start = time.perf_counter()
+        try:
+            response = self._client(endpoint).chat.completions.create(model=model, messages=messages, **kwargs)
+        except Exception:
+            self.stats[endpoint.name].record(time.perf_counter() - start, ok=False)
+            raise
+        seconds = time.perf_counter() - start
+        self.stats[endpoint.name].record(seconds, ok=True)
+        get_usage_ledger().record(call_site, model, response.usage, seconds, endpoint.name)
+        return response
+
+    def _submit(self, *args):
+        # Los hilos del pool no heredan el contexto: se copia para conservar el `usage_scope` activo
+        return self._pool.submit(contextvars.copy_context().run, self._call, *args)
+
+    def _hedged(self, primary: Endpoint, backup: Endpoint | None, model, messages, kwargs, failed: set, call_site: str):
+        first = self._submit(primary, model, messages, kwargs, call_site)
+        delay = self._hedge_delay(primary, backup)
+        if delay is None or wait([first], timeout=delay).done:
+            return first.result()
+
+        print(f"[llm] {primary.name} superó su p95 ({delay:.1f}s): petición de respaldo a {backup.name}")
+        self.stats[primary.name].hedges += 1
+        second = self._submit(backup, model, messages, kwargs, call_site)
+        pending = {first: primary, second: backup}
+        error = None
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                endpoint = pending.pop(future)
+                if future.exception() is None:
+                    # La petición perdedora termina en segundo plano y su latencia igual se registra
+                    if future is second:
+                        self.stats[backup.name].hedge_wins += 1
+                    return future.result()
+                failed.add(endpoint.name)
+                error = future.exception()
+        raise error
+
+    def chat(self, messages: list, model: str | None = None, call_site: str = "llm_client", **kwargs):
+        """
+        Envía una conversación al mejor proveedor disponible.
+
+        Args:
+            messages (list): Mensajes en el formato de la API de OpenAI.
+            model (str | None): Modelo del proveedor preferido (los demás usan el suyo).
+            call_site (str): Punto de llamada con el que se registra el consumo.
+            **kwargs: Resto de argumentos de `chat.completions.create` (tools, temperature...).
+
+        Returns:
+            ChatCompletion: La respuesta del primer proveedor que contestó.
+        """
+        failed: set[str] = set()
+        errors = []
+        while candidates := self.ranked(exclude=failed):
+            primary, backup = candidates[0], (candidates[1] if len(candidates) > 1 else None)
+            try:
+                return self._hedged(primary, backup, model, messages, kwargs, failed, call_site)
+            except Exception as e:
+                failed.add(primary.name)
+                errors.append(f"{primary.name}: {e}")
+                self.failovers += 1
+                print(f"[llm] {primary.name} falló ({type(e).__name__}); se prueba con el siguiente proveedor")
+        raise RuntimeError("Todos los proveedores LLM fallaron: " + " | ".join(errors))
+
+    # --- Versión asíncrona ---
+
+    async def _acall(self, endpoint: Endpoint, model: str | None, messages: list, kwargs: dict, call_site: str):
+        model = self._model(endpoint, model)
+        start = time.perf_counter()
+        try:
+            response = await self._async_client(endpoint).chat.completions.create(
+                model=model, messages=messages, **kwargs)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            self.stats[endpoint.name].record(time.perf_counter() - start, ok=False)
+            raise
+        seconds = time.perf_counter() - start
+        self.stats[endpoint.name].record(seconds, ok=True)
+        get_usage_ledger().record(call_site, model, response.usage, seconds, endpoint.name)
+        return response
+
+    async def _ahedged(self, primary: Endpoint, backup: Endpoint | None, model, messages, kwargs, failed: set,
+                       call_site: str):
+        first = asyncio.ensure_future(self._acall(primary, model, messages, kwargs, call_site))
+        delay = self._hedge_delay(primary, backup)
+        if delay is None:
+            return await first
+        done, _ = await asyncio.wait({first}, timeout=delay)
+        if done:
+            return first.result()
+
+        print(f"[llm] {primary.name} superó su p95 ({delay:.1f}s): petición de respaldo a {backup.name}")
+        self.stats[primary.name].hedges += 1
+        second = asyncio.ensure_future(self._acall(backup, model, messages, kwargs, call_site))
+        pending = {first: primary, second: backup}
+        error = None
+        try:
+            while pending:
+                done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    endpoint = pending.pop(task)
+                    if task.exception() is None:
+                        if task is second:
+                            self.stats[backup.name].hedge_wins += 1
+                        return task.result()
+                    failed.add(endpoint.name)
+                    error = task.exception()
+            raise error
+        finally:
+            # Cancelar la petición perdedora
+            for task in pending:
+                task.cancel()
+
+    async def achat(self, messages: list, model: str | None = None, call_site: str = "llm_client", **kwargs):
+        """Versión asíncrona de `chat` (las peticiones perdedoras se cancelan)."""
+        failed: set[str] = set()
+        errors = []
+        while candidates := self.ranked(exclude=failed):
+            primary, backup = candidates[0], (candidates[1] if len(candidates) > 1 else None)
+            try:
+                return await self._ahedged(primary, backup, model, messages, kwargs, failed, call_site)
+            except Exception as e:
+                failed.add(primary.name)
+                errors.append(f"{primary.name}: {e}")
+                self.failovers += 1
+                print(f"[llm] {primary.name} falló ({type(e).__name__}); se prueba con el siguiente proveedor")
+        raise RuntimeError("Todos los proveedores LLM fallaron: " + " | ".join(errors))
+
+    def report(self) -> str:
+        """Tabla con la latencia, los errores y el hedging de cada proveedor."""
+        lines = [f"{'proveedor':<10}{'llamadas':>9}{'errores':>9}{'p50 (s)':>9}{'p95 (s)':>9}{'respaldos':>11}"
+                 f"{'ganados':>9}{'pruebas':>9}{'otro modelo':>13}"]
+        for name, stats in self.stats.items():
+            s = stats.to_dict()
+            lines.append(f"{name:<10}{s['calls']:>9}{s['errors']:>9}{s['p50_seconds'] or 0:>9.2f}"
+                         f"{s['p95_seconds'] or 0:>9.2f}{s['hedges']:>11}{s['hedge_wins']:>9}"
+                         f"{s['probes']:>9}{s['model_swaps']:>13}")
+        lines.append(f"Conmutaciones por error: {self.failovers}")
+        return "\n".join(lines)
+
+
+_client: LLMClient | None = None
+_client_lock = threading.Lock()
+
+
+def get_llm_client() -> LLMClient:
+    """Devuelve el cliente compartido del proceso (las estadísticas se acumulan entre llamadas)."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = LLMClient()
+        return _client
@@ -0,0 +1,166 @@
+"""
+Módulo de la Caché de Búsquedas de Serper.
+
+Guarda los resultados de Serper en SQLite con TTL, une las búsquedas iguales que están en
+curso y limita la concurrencia hacia la API. No depende de crewAI: lo usan tanto
+`CachedSerperDevTool` (ver `cached_search.py`), la herramienta de las crews de `Clase 10/codigo`,
+como `search_news`, que consulta la API directamente desde procesos que no cargan crewAI
+(el planificador de financial_researcher).
+"""
+
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+import urllib.request
+
+CACHE_PATH = os.getenv("SERPER_CACHE_PATH", os.path.expanduser("~/.cache/curso_agentes/serper.sqlite"))
+CACHE_TTL_SECONDS = float(os.getenv("SERPER_CACHE_TTL_HOURS", "12")) * 3600
+MAX_CONCURRENT = int(os.getenv("SERPER_MAX_CONCURRENT", "4"))
+MIN_INTERVAL_SECONDS = float(os.getenv("SERPER_MIN_INTERVAL_SECONDS", "0.2"))
+
+
+def normalize_query(query: str) -> str:
+    """
+    Minúsculas, sin acentos ni puntuación y con los espacios colapsados: "¿Qué es NVIDIA?" == "que es nvidia".
+    Es la clave de todas las cachés de búsqueda del curso (también las de Clase 08/deep_research).
+    """
+    query = unicodedata.normalize("NFKD", (query or "").lower())
+    query = "".join(c for c in query if not unicodedata.combining(c))
+    query = re.sub(r"[^\w\s]", " ", query)
+    return " ".join(query.split())
+
+
+class SearchCache:
+    """
+    Caché de resultados de Serper en SQLite con TTL, coalescencia de búsquedas en vuelo
+    y límite de concurrencia hacia la API.
+    """
+
+    def __init__(self, path: str = CACHE_PATH, ttl_seconds: float = CACHE_TTL_SECONDS):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self._lock = threading.Lock()
+        # Búsquedas en curso: clave -> (evento de fin, [resultado])
+        self._in_flight: dict[str, tuple[threading.Event, list]] = {}
+        self._api_slots = threading.BoundedSemaphore(MAX_CONCURRENT)
+        self._last_call = 0.0
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS searches (key TEXT PRIMARY KEY, result TEXT, fetched_at REAL)")
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=30)
+
+    def _read(self, key: str):
+        with self._connect() as conn:
+            row = conn.execute("SELECT result, fetched_at FROM searches WHERE key = ?", (key,)).fetchone()
+        if row and time.time() - row[1] < self.ttl_seconds:
+            return json.loads(row[0])
+        return None
+
+    def _write(self, key: str, result) -> None:
+        with self._connect() as conn:
+            conn.execute("INSERT OR REPLACE INTO searches (key, result, fetched_at) VALUES (?, ?, ?)",
+                         (key, json.dumps(result, ensure_ascii=False), time.time()))
+
+    def _call_api(self, producer):
+        """Ejecuta la búsqueda real respetando la concurrencia máxima y el intervalo mínimo entre llamadas"""
+        with self._api_slots:
+            with self._lock:
+                wait = self._last_call + MIN_INTERVAL_SECONDS - time.monotonic()
+                self._last_call = max(time.monotonic(), self._last_call + MIN_INTERVAL_SECONDS)
+            if wait > 0:
+                time.sleep(wait)
+            return producer()
+
+    def get_or_run(self, key: str, producer):
+        cached = self._read(key)
+        if cached is not None:
+            with self._lock:
+                self.hits += 1
+            self._log("acierto", key)
+            return cached
+
+        with self._lock:
+            entry = self._in_flight.get(key)
+            owner = entry is None
+            if owner:
+                entry = self._in_flight[key] = (threading.Event(), [])
+                self.misses += 1
+            else:
+                self.coalesced += 1
+        event, holder = entry
+
+        if not owner:
+            # Otra tarea ya está haciendo la misma búsqueda: esperar su resultado
+            event.wait()
+            self._log("coalescida", key)
+            # Si la búsqueda original falló, se reintenta por cuenta propia
+            return holder[0] if holder else self._call_api(producer)
+
+        try:
+            result = self._call_api(producer)
+            if result:
+                self._write(key, result)
+                holder.append(result)
+            self._log("sin caché", key)
+            return result
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+            event.set()
+
+    def _log(self, status: str, key: str) -> None:
+        with self._lock:
+            hits, misses, coalesced = self.hits, self.misses, self.coalesced
+        total = hits + misses
+        print(f"[caché serper] {status}: '{key}' "
+              f"(aciertos {hits}/{total}, {hits / total if total else 0:.0%}; coalescidas {coalesced})")
+
+
+_cache: SearchCache | None = None
+_cache_lock = threading.Lock()
+
+
+def get_search_cache() -> SearchCache:
+    """Devuelve la caché compartida del proceso, creándola la primera vez"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = SearchCache()
+        return _cache
+
+
+SERPER_URL = "https://google.serper.dev"
+
+
+def search_news(query: str, n_results: int = 10) -> dict:
+    """
+    Busca noticias en Serper sin pasar por crewai_tools, con la misma caché compartida.
+
+    Args:
+        query (str): La consulta.
+        n_results (int): Cantidad de noticias.
+
+    Returns:
+        dict: La respuesta de la API (la lista de noticias está en "news").
+    """
+    def fetch():
+        request = urllib.request.Request(
+            f"{SERPER_URL}/news",
+            data=json.dumps({"q": query, "num": n_results}).encode("utf-8"),
+            headers={"X-API-KEY": os.environ["SERPER_API_KEY"], "Content-Type": "application/json"},
+        )
+        with urllib.request.urlopen(request, timeout=30) as response:
+            return json.loads(response.read().decode("utf-8"))
+
+    # Prefijo propio: la herramienta de crewAI guarda sus resultados ya formateados
+    key = f"api|news|{normalize_query(query)}|{n_results}"
+    return get_search_cache().get_or_run(key, fetch)
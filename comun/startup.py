@@ -0,0 +1,175 @@
+"""
+Módulo de Perfilado del Arranque.
+
+El arranque en frío de los contenedores lo dominan las importaciones (gradio, el SDK de
+agentes, crewAI...). Este módulo importa los módulos de un punto de entrada en un proceso
+nuevo con `python -X importtime` y resume el resultado: el tiempo total y cuánto aporta
+cada dependencia.
+
+Uso desde un punto de entrada (ver `app.py`, `deep_research.py` o los `main.py` de crewAI):
+
+    python app.py --profile-startup
+
+Uso como benchmark (lo ejecuta la CI): mide cada punto de entrada de `startup_budgets.json`
+y termina con error si alguno supera su presupuesto de importación. Los presupuestos son
+relativos a una importación de referencia medida en la misma máquina (`REFERENCE_MODULES`),
+así que no dependen de lo rápido que sea el runner.
+
+    python -m comun.startup
+    python -m comun.startup --profile app --cwd "Clase 06/codigo_bot"
+"""
+
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+
+PROFILE_FLAG = "--profile-startup"
+REPO_ROOT = Path(__file__).resolve().parents[1]
+BUDGETS_PATH = Path(__file__).with_name("startup_budgets.json")
+# Vara de medir de la máquina: un paquete que todos los entornos del curso tienen instalado
+# (es la dependencia de comun/) y cuya importación es de un tamaño parecido al de los puntos de entrada
+REFERENCE_MODULES = ["openai"]
+IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|( *)(\S+)")
+
+
+@dataclass
+class ImportTime:
+    """
+    Una línea de `-X importtime`.
+
+    Atributos:
+        module (str): Módulo importado.
+        self_us (int): Microsegundos del propio módulo.
+        cumulative_us (int): Microsegundos del módulo y todo lo que importó.
+        depth (int): Nivel de anidamiento (0 = importado directamente).
+    """
+    module: str
+    self_us: int
+    cumulative_us: int
+    depth: int
+
+
+def wants_profile() -> bool:
+    """Indica si el punto de entrada se lanzó con --profile-startup."""
+    return PROFILE_FLAG in sys.argv
+
+
+def measure_imports(modules: list[str], cwd: str | Path | None = None) -> list[ImportTime]:
+    """
+    Importa `modules` en un intérprete nuevo con `-X importtime`.
+
+    Args:
+        modules (list[str]): Módulos a importar, en orden.
+        cwd (str | Path | None): Directorio de trabajo (el del punto de entrada).
+
+    Returns:
+        list[ImportTime]: Las líneas de importtime, en el orden en que terminaron.
+    """
+    code = "; ".join(f"import {module}" for module in modules)
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join(filter(None, [str(REPO_ROOT), os.getenv("PYTHONPATH")]))}
+    completed = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=cwd, env=env,
+                               capture_output=True, text=True)
+    if completed.returncode != 0:
+        raise RuntimeError(f"No se pudo importar {', '.join(modules)}:\n{completed.stderr[-2000:]}")
+    times = []
+    for line in completed.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            times.append(ImportTime(match.group(4), int(match.group(1)), int(match.group(2)),
+                                    (len(match.group(3)) - 1) // 2))
+    return times
+
+
+def total_ms(times: list[ImportTime], modules: list[str]) -> float:
+    """Milisegundos que tardaron en importarse los módulos pedidos (con sus dependencias)."""
+    return sum(t.cumulative_us for t in times if t.depth == 0 and t.module in modules) / 1000
+
+
+def breakdown(times: list[ImportTime], top: int = 15) -> list[tuple[str, float]]:
+    """
+    Costo por dependencia: el acumulado de cada paquete de primer nivel, la primera vez
+    que se importó (quien lo importa primero paga su costo).
+    """
+    costs: dict[str, float] = {}
+    for t in times:
+        package = t.module.split(".")[0]
+        # El acumulado de la primera aparición más externa del paquete ya incluye sus submódulos
+        if "." not in t.module or package not in costs:
+            costs[package] = max(costs.get(package, 0.0), t.cumulative_us / 1000)
+    return sorted(costs.items(), key=lambda item: item[1], reverse=True)[:top]
+
+
+def print_profile(modules: list[str], cwd: str | Path | None = None, top: int = 15) -> float:
+    """Muestra el desglose del arranque de `modules` y devuelve el total en milisegundos."""
+    times = measure_imports(modules, cwd)
+    total = total_ms(times, modules)
+    slowest = sorted(times, key=lambda t: t.self_us, reverse=True)[:top]
+    print(f"\nArranque de {', '.join(modules)}: {total:.0f} ms de importaciones\n")
+    print(f"{'paquete':<32}{'acumulado (ms)':>16}{'%':>7}")
+    for package, ms in breakdown(times, top):
+        print(f"{package:<32}{ms:>16.1f}{100 * ms / total if total else 0:>7.0f}")
+    print(f"\n{'módulo más lento (tiempo propio)':<40}{'ms':>8}")
+    for t in slowest:
+        print(f"{t.module:<40}{t.self_us / 1000:>8.1f}")
+    return total
+
+
+def profile_startup(modules: list[str], cwd: str | Path | None = None) -> None:
+    """Atiende --profile-startup: muestra el desglose y termina el proceso sin arrancar el servicio."""
+    # Por defecto, la carpeta del script lanzado, que es desde donde se importan sus módulos
+    print_profile(modules, cwd or Path(sys.argv[0]).resolve().parent)
+    sys.exit(0)
+
+
+def check_budgets(budgets_path: Path = BUDGETS_PATH, runs: int = 3) -> bool:
+    """
+    Mide cada punto de entrada del archivo de presupuestos y lo compara con la importación
+    de referencia (`REFERENCE_MODULES`), medida justo antes en cada arranque: el presupuesto
+    (`budget_x`) es la mediana de esas proporciones, de modo que un runner lento o cargado
+    encarece por igual la referencia y el punto de entrada.
+
+    Returns:
+        bool: True si todos quedaron dentro de su presupuesto.
+    """
+    with open(budgets_path, "r", encoding="utf-8") as f:
+        entries = json.load(f)
+    ok = True
+    print(f"{'punto de entrada':<36}{'mediana (ms)':>14}{'referencia (ms)':>17}{'x ref.':>8}{'presupuesto':>13}  estado")
+    for name, entry in entries.items():
+        cwd = REPO_ROOT / entry["cwd"]
+        samples, references = [], []
+        for _ in range(runs):
+            references.append(total_ms(measure_imports(REFERENCE_MODULES, cwd), REFERENCE_MODULES))
+            samples.append(total_ms(measure_imports(entry["modules"], cwd), entry["modules"]))
+        ratio = statistics.median(sample / reference for sample, reference in zip(samples, references))
+        within = ratio <= entry["budget_x"]
+        ok = ok and within
+        print(f"{name:<36}{statistics.median(samples):>14.0f}{statistics.median(references):>17.0f}"
+              f"{ratio:>8.2f}{entry['budget_x']:>13}  {'ok' if within else 'EXCEDIDO'}")
+    return ok
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark del tiempo de importación de los puntos de entrada")
+    parser.add_argument("--profile", nargs="+", metavar="MODULO", help="Muestra el desglose de estos módulos")
+    parser.add_argument("--cwd", default=".", help="Directorio del punto de entrada (con --profile)")
+    parser.add_argument("--budgets", type=Path, default=BUDGETS_PATH, help="Archivo de presupuestos")
+    parser.add_argument("--runs", type=int, default=3, help="Arranques por punto de entrada")
+    args = parser.parse_args()
+    if args.profile:
+        print_profile(args.profile, args.cwd)
+        return
+    if not check_budgets(args.budgets, args.runs):
+        print("\nEl tiempo de importación superó el presupuesto: revisa las importaciones nuevas "
+              f"(python <punto de entrada> {PROFILE_FLAG}).")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
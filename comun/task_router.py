@@ -0,0 +1,302 @@
+"""
+Módulo del Enrutador por Clase de Tarea.
+
+Las tareas pequeñas y deterministas (extraer un país de una frase, generar consultas de
+búsqueda, detectar un nombre propio) no necesitan un modelo en la nube. Este módulo las
+envía a un modelo local servido por Ollama cuando el servidor está disponible y vuelve a
+la nube si la respuesta local no pasa el control de calidad de la tarea o tarda más que
+su timeout. Para cada clase de tarea mide el costo ahorrado y estima la latencia ahorrada.
+"""
+
+import asyncio
+import contextvars
+import os
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable
+
+from openai import AsyncOpenAI, OpenAI
+
+from comun.usage import get_usage_ledger
+
+OLLAMA_BASE_URL = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434/v1")
+LOCAL_MODEL = os.getenv("ROUTER_LOCAL_MODEL", "llama3.1")
+ROUTER_ENABLED = os.getenv("ROUTER_ENABLED", "1") == "1"
+# Segundos durante los que se recuerda si el servidor local está disponible
+PROBE_TTL_SECONDS = 30
+
+
+@dataclass
+class TaskClass:
+    """
+    Una clase de tarea enrutable.
+
+    Atributos:
+        name (str): Nombre de la clase de tarea.
+        cloud_model (str): Modelo en la nube que se usa como respaldo.
+        timeout_seconds (float): Tiempo máximo de espera del modelo local.
+        local_model (str): Modelo local.
+    """
+    name: str
+    cloud_model: str = "gpt-4o-mini"
+    timeout_seconds: float = 10.0
+    local_model: str = LOCAL_MODEL
+
+
+TASK_CLASSES: dict[str, TaskClass] = {
+    "extraer_pais": TaskClass("extraer_pais", timeout_seconds=10),
+    "planificar_busquedas": TaskClass("planificar_busquedas", timeout_seconds=30),
+    "verificar_nombre": TaskClass("verificar_nombre", timeout_seconds=10),
+}
+
+
+class TaskClassStats:
+    """Resultados de las llamadas de una clase de tarea."""
+
+    def __init__(self):
+        self.local_ok = 0
+        self.fallbacks: dict[str, int] = {"timeout": 0, "calidad": 0, "error": 0}
+        self.cloud_only = 0
+        self.local_seconds: list[float] = []
+        self.cloud_seconds: list[float] = []
+        self.cost_saved_usd = 0.0
+
+    def to_dict(self) -> dict:
+        local = sum(self.local_seconds) / len(self.local_seconds) if self.local_seconds else None
+        cloud = sum(self.cloud_seconds) / len(self.cloud_seconds) if self.cloud_seconds else None
+        return {
+            "local_ok": self.local_ok,
+            "fallbacks": dict(self.fallbacks),
+            "cloud_only": self.cloud_only,
+            "avg_local_seconds": round(local, 2) if local is not None else None,
+            "avg_cloud_seconds": round(cloud, 2) if cloud is not None else None,
+            # Estimación, no medición: cada respuesta local aceptada se compara con la latencia media
+            # de la nube (la llamada a la nube que se evitó no llega a ocurrir). Sin mediciones de
+            # los dos lados no se puede estimar
+            "est_latency_saved_seconds": round(self.local_ok * (cloud - local), 2) if local is not None and cloud is not None else None,
+            "cost_saved_usd": round(self.cost_saved_usd, 6),
+        }
+
+
+class TaskRouter:
+    """
+    Decide, para cada llamada de una clase de tarea, si se resuelve en local o en la nube.
+
+    Atributos:
+        stats (dict[str, TaskClassStats]): Estadísticas por clase de tarea.
+    """
+
+    def __init__(self, enabled: bool = ROUTER_ENABLED):
+        self.enabled = enabled
+        self.stats: dict[str, TaskClassStats] = {name: TaskClassStats() for name in TASK_CLASSES}
+        self._lock = threading.Lock()
+        self._probe: tuple[float, bool] = (0.0, False)
+        self._local_client: OpenAI | None = None
+        # Un cliente asíncrono por endpoint, compartido por todos los agentes locales (ver `agents_model`)
+        self._agents_clients: dict[str, AsyncOpenAI] = {}
+        # Hilos para aplicar el timeout local en `run` (la versión síncrona)
+        self._pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="router")
+
+    def local_available(self) -> bool:
+        """Indica si el servidor local responde (el resultado se recuerda PROBE_TTL_SECONDS)."""
+        if not self.enabled:
+            return False
+        checked_at, available = self._probe
+        if time.monotonic() - checked_at < PROBE_TTL_SECONDS:
+            return available
+        try:
+            with urllib.request.urlopen(f"{OLLAMA_BASE_URL.rstrip('/')}/models", timeout=1):
+                available = True
+        except Exception:
+            available = False
+        self._probe = (time.monotonic(), available)
+        return available
+
+    def task_class(self, name: str) -> TaskClass:
+        if name not in TASK_CLASSES:
+            TASK_CLASSES[name] = TaskClass(name)
+        with self._lock:
+            self.stats.setdefault(name, TaskClassStats())
+        return TASK_CLASSES[name]
+
+    def _record_saving(self, task: TaskClass, input_tokens: int, output_tokens: int) -> None:
+        # Lo que habría costado la respuesta en la nube, con la tabla de precios del registro de consumo
+        cost = get_usage_ledger().cost(task.cloud_model, input_tokens, output_tokens, 0)
+        self.stats[task.name].cost_saved_usd += cost or 0.0
+
+    def _accept_local(self, task: TaskClass, result: Any, seconds: float, check: Callable[[Any], bool],
+                      tokens: Callable[[Any], tuple[int, int]] | None) -> bool:
+        """Aplica el control de calidad a un resultado local y, si pasa, registra el ahorro."""
+        if not check(result):
+            return False
+        stats = self.stats[task.name]
+        stats.local_ok += 1
+        stats.local_seconds.append(seconds)
+        if tokens:
+            self._record_saving(task, *tokens(result))
+        return True
+
+    def _discard_local(self, task: TaskClass, reason: str) -> None:
+        self.stats[task.name].fallbacks[reason] += 1
+        print(f"[router] {task.name}: respuesta local descartada ({reason}), se usa {task.cloud_model}")
+
+    async def arun(self, name: str, local: Callable[[], Awaitable[Any]], cloud: Callable[[], Awaitable[Any]],
+                   check: Callable[[Any], bool], tokens: Callable[[Any], tuple[int, int]] | None = None) -> Any:
+        """
+        Ejecuta una tarea en local y, si hace falta, en la nube.
+
+        Args:
+            name (str): Clase de tarea.
+            local (Callable): Corrutina que resuelve la tarea con el modelo local.
+            cloud (Callable): Corrutina que resuelve la tarea con el modelo en la nube.
+            check (Callable): Control de calidad del resultado local (True si es aceptable).
+            tokens (Callable | None): Devuelve los tokens (entrada, salida) de un resultado,
+                para estimar el costo ahorrado.
+
+        Returns:
+            Any: El resultado local si pasó el control de calidad, o el de la nube.
+        """
+        task = self.task_class(name)
+        stats = self.stats[name]
+        # El sondeo usa urllib (bloqueante): en un hilo, para no detener el event loop
+        if await asyncio.to_thread(self.local_available):
+            start = time.perf_counter()
+            try:
+                result = await asyncio.wait_for(local(), timeout=task.timeout_seconds)
+                if self._accept_local(task, result, time.perf_counter() - start, check, tokens):
+                    return result
+                reason = "calidad"
+            except asyncio.TimeoutError:
+                reason = "timeout"
+            except Exception as e:
+                print(f"[router] {name}: error del modelo local ({e})")
+                reason = "error"
+            self._discard_local(task, reason)
+        else:
+            stats.cloud_only += 1
+
+        start = time.perf_counter()
+        result = await cloud()
+        stats.cloud_seconds.append(time.perf_counter() - start)
+        return result
+
+    def run(self, name: str, local: Callable[[], Any], cloud: Callable[[], Any],
+            check: Callable[[Any], bool], tokens: Callable[[Any], tuple[int, int]] | None = None) -> Any:
+        """
+        Versión síncrona de `arun` (las funciones `local` y `cloud` son bloqueantes).
+
+        No crea un event loop, así que se puede llamar también desde código que ya corre dentro
+        de uno (por ejemplo, un guardrail síncrono en un notebook). El timeout local se aplica
+        ejecutando `local` en un hilo del enrutador.
+        """
+        task = self.task_class(name)
+        stats = self.stats[name]
+        if self.local_available():
+            start = time.perf_counter()
+            # Se copia el contexto para conservar el `usage_scope` activo en el hilo
+            future = self._pool.submit(contextvars.copy_context().run, local)
+            try:
+                result = future.result(timeout=task.timeout_seconds)
+                if self._accept_local(task, result, time.perf_counter() - start, check, tokens):
+                    return result
+                reason = "calidad"
+            except FutureTimeoutError:
+                reason = "timeout"
+            except Exception as e:
+                print(f"[router] {name}: error del modelo local ({e})")
+                reason = "error"
+            self._discard_local(task, reason)
+        else:
+            stats.cloud_only += 1
+
+        start = time.perf_counter()
+        result = cloud()
+        stats.cloud_seconds.append(time.perf_counter() - start)
+        return result
+
+    def chat(self, name: str, messages: list, check: Callable[[str], bool], **kwargs):
+        """
+        Llamada de chat enrutada: modelo local o, como respaldo, el cliente compartido en la nube.
+
+        Args:
+            name (str): Clase de tarea.
+            messages (list): Mensajes en el formato de la API de OpenAI.
+            check (Callable): Control de calidad sobre el texto de la respuesta local.
+            **kwargs: Resto de argumentos de `chat.completions.create`.
+
+        Returns:
+            ChatCompletion: La respuesta aceptada.
+        """
+        from comun.llm_client import get_llm_client
+
+        task = self.task_class(name)
+        with self._lock:
+            if self._local_client is None:
+                self._local_client = OpenAI(base_url=OLLAMA_BASE_URL, api_key="ollama", max_retries=0)
+
+        def usage(response) -> tuple[int, int]:
+            return (response.usage.prompt_tokens, response.usage.completion_tokens) if response.usage else (0, 0)
+
+        def local():
+            start = time.perf_counter()
+            response = self._local_client.chat.completions.create(
+                model=task.local_model, messages=messages, timeout=task.timeout_seconds, **kwargs)
+            # También las respuestas locales descartadas: su latencia se suma a la del respaldo
+            get_usage_ledger().record(name, task.local_model, response.usage, time.perf_counter() - start, "ollama")
+            return response
+
+        return self.run(
+            name,
+            local=local,
+            cloud=lambda: get_llm_client().chat(model=task.cloud_model, messages=messages, call_site=name, **kwargs),
+            check=lambda response: check(response.choices[0].message.content or ""),
+            tokens=usage,
+        )
+
+    def agents_model(self, name: str):
+        """Modelo local para un Agent del SDK de agentes de OpenAI (ver `arun`)."""
+        from agents import OpenAIChatCompletionsModel
+
+        task = self.task_class(name)
+        with self._lock:
+            client = self._agents_clients.get(OLLAMA_BASE_URL)
+            if client is None:
+                client = self._agents_clients[OLLAMA_BASE_URL] = AsyncOpenAI(base_url=OLLAMA_BASE_URL, api_key="ollama")
+        return OpenAIChatCompletionsModel(model=task.local_model, openai_client=client)
+
+    def report(self) -> str:
+        """
+        Tabla con el resultado del enrutamiento y el ahorro de cada clase de tarea ("" si no hubo llamadas).
+
+        El costo ahorrado sale de los tokens de cada respuesta local aceptada; la latencia
+        ahorrada es una estimación a partir de los promedios de cada lado.
+        """
+        lines = [f"{'clase de tarea':<22}{'local':>7}{'respaldo':>10}{'solo nube':>11}{'lat. local':>12}"
+                 f"{'lat. nube':>11}{'ahorro est. (s)':>17}{'ahorro ($)':>12}"]
+        for name, stats in self.stats.items():
+            s = stats.to_dict()
+            if not (s["local_ok"] or s["cloud_only"] or sum(s["fallbacks"].values())):
+                continue
+            fmt = lambda value, spec: "-" if value is None else format(value, spec)
+            lines.append(f"{name:<22}{s['local_ok']:>7}{sum(s['fallbacks'].values()):>10}{s['cloud_only']:>11}"
+                         f"{fmt(s['avg_local_seconds'], '.2f'):>12}{fmt(s['avg_cloud_seconds'], '.2f'):>11}"
+                         f"{fmt(s['est_latency_saved_seconds'], '.1f'):>17}{s['cost_saved_usd']:>12.6f}")
+        if len(lines) == 1:
+            return ""
+        lines.append("ahorro est. (s): respuestas locales aceptadas x (latencia media en la nube - latencia media local)")
+        return "\n".join(lines)
+
+
+_router: TaskRouter | None = None
+
+
+def get_task_router() -> TaskRouter:
+    """Devuelve el enrutador compartido del proceso."""
+    global _router
+    if _router is None:
+        _router = TaskRouter()
+    return _router
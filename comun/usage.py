@@ -0,0 +1,419 @@
+"""
+Módulo de Contabilidad de Tokens y Costo.
+
+Registra cada llamada a un LLM del curso (cliente multiproveedor, enrutador local,
+ejecuciones del SDK de agentes y kickoffs de crewAI) con sus tokens de entrada, de salida
+y cacheados, la latencia y el costo según una tabla de precios configurable.
+
+Cada registro lleva el punto de llamada (`call_site`), el modelo y los identificadores de
+sesión (uno por proceso), de petición y de ejecución, así que se puede agregar a cualquiera
+de esos niveles. Los registros se añaden a un archivo JSONL y `report()` imprime un resumen
+compacto ordenado por costo, para optimizar primero los puntos de llamada que más gastan.
+
+    python -m comun.usage usage.jsonl --by call_site,model
+    python -m comun.usage usage.jsonl --by run
+"""
+
+import argparse
+import contextvars
+import json
+import math
+import os
+import threading
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+
+USAGE_LOG_PATH = os.getenv("USAGE_LOG_PATH", "usage.jsonl")
+# JSON con precios que reemplazan o amplían la tabla por defecto
+USAGE_PRICES_PATH = os.getenv("USAGE_PRICES_PATH", "")
+# Registros recordados en memoria para los informes del proceso (el JSONL guarda todos)
+USAGE_WINDOW = int(os.getenv("USAGE_WINDOW", "10000"))
+
+# Precios en USD por millón de tokens: entrada, entrada cacheada y salida
+DEFAULT_PRICES_PER_MILLION = {
+    "gpt-4o-mini": {"input": 0.15, "cached_input": 0.075, "output": 0.60},
+    "gpt-4o": {"input": 2.50, "cached_input": 1.25, "output": 10.00},
+    "gpt-4.1-mini": {"input": 0.40, "cached_input": 0.10, "output": 1.60},
+    "gpt-4.1": {"input": 2.00, "cached_input": 0.50, "output": 8.00},
+    "text-embedding-3-small": {"input": 0.02, "cached_input": 0.02, "output": 0.0},
+    "llama-3.3-70b-versatile": {"input": 0.59, "cached_input": 0.59, "output": 0.79},
+    "gemini-2.5-flash": {"input": 0.30, "cached_input": 0.075, "output": 2.50},
+    "deepseek-chat": {"input": 0.27, "cached_input": 0.07, "output": 1.10},
+    "claude-3-7-sonnet-latest": {"input": 3.00, "cached_input": 0.30, "output": 15.00},
+    # Modelos locales servidos por Ollama
+    "llama3.1": {"input": 0.0, "cached_input": 0.0, "output": 0.0},
+}
+
+SESSION_ID = uuid.uuid4().hex[:12]
+_scope: contextvars.ContextVar[dict] = contextvars.ContextVar("usage_scope", default={})
+
+
+def load_prices(path: str = USAGE_PRICES_PATH) -> dict[str, dict[str, float]]:
+    """
+    Tabla de precios: la tabla por defecto más la del archivo `path`, si existe.
+
+    Args:
+        path (str): JSON con el formato {"modelo": {"input": ..., "cached_input": ..., "output": ...}}.
+
+    Returns:
+        dict: Precios en USD por millón de tokens, por modelo.
+    """
+    prices = {model: dict(values) for model, values in DEFAULT_PRICES_PER_MILLION.items()}
+    if path and os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            prices.update(json.load(f))
+    return prices
+
+
+def price_for(model: str, prices: dict[str, dict[str, float]]) -> dict[str, float] | None:
+    """
+    Precio de un modelo. Acepta prefijos de proveedor ("openai/gpt-4o-mini") y versiones
+    con fecha ("gpt-4o-mini-2024-07-18"); devuelve None si el modelo no tiene precio.
+    """
+    name = model.split("/")[-1]
+    if name in prices:
+        return prices[name]
+    candidates = [known for known in prices if name.startswith(known)]
+    return prices[max(candidates, key=len)] if candidates else None
+
+
+def percentile(values: list[float], q: float) -> float:
+    """
+    Calcula el percentil `q` (0-100) por el método del rango más cercano.
+
+    Es la única implementación del curso: la usan el cliente LLM, el bot, las métricas de
+    deep_research y el lote de debates.
+
+    Args:
+        values (list[float]): Los valores.
+        q (float): El percentil deseado.
+
+    Returns:
+        float: El valor del percentil, o 0.0 si la lista está vacía.
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[max(0, min(len(ordered) - 1, math.ceil(q / 100 * len(ordered)) - 1))]
+
+
+def token_counts(usage) -> tuple[int, int, int, int]:
+    """
+    Tokens de cualquiera de los objetos de uso del curso.
+
+    Acepta el `usage` de la API de OpenAI (chat y embeddings), el `Usage` del SDK de agentes
+    y el `UsageMetrics` de crewAI.
+
+    Returns:
+        tuple[int, int, int, int]: (entrada, salida, entrada cacheada, peticiones).
+    """
+    if usage is None:
+        return 0, 0, 0, 0
+    prompt = getattr(usage, "prompt_tokens", None)
+    if prompt is None:
+        prompt = getattr(usage, "input_tokens", 0)
+    completion = getattr(usage, "completion_tokens", None)
+    if completion is None:
+        completion = getattr(usage, "output_tokens", 0)
+    details = getattr(usage, "prompt_tokens_details", None) or getattr(usage, "input_tokens_details", None)
+    cached = getattr(details, "cached_tokens", None) or getattr(usage, "cached_prompt_tokens", 0)
+    requests = getattr(usage, "requests", None) or getattr(usage, "successful_requests", None) or 1
+    return prompt or 0, completion or 0, cached or 0, requests
+
+
+@contextmanager
+def usage_scope(**ids):
+    """
+    Asocia las llamadas de este bloque a una petición o ejecución.
+
+    Ejemplo:
+        with usage_scope(request=uuid.uuid4().hex):
+            ...
+
+    Se propaga a las tareas de asyncio creadas dentro del bloque, pero no a los hilos de un
+    ThreadPoolExecutor: en ese caso hay que pasar los identificadores a `record`.
+    """
+    token = _scope.set({**_scope.get(), **ids})
+    try:
+        yield
+    finally:
+        _scope.reset(token)
+
+
+@dataclass
+class UsageRecord:
+    """
+    Una llamada (o un grupo de llamadas del mismo modelo) a un LLM.
+
+    Atributos:
+        call_site (str): Punto de llamada (ej. "Me.chat", "research_manager.search").
+        model (str): Modelo usado.
+        provider (str | None): Proveedor, si se conoce.
+        prompt_tokens (int): Tokens de entrada (incluye los cacheados).
+        completion_tokens (int): Tokens de salida.
+        cached_tokens (int): Tokens de entrada servidos desde la caché del proveedor.
+        requests (int): Peticiones al modelo agrupadas en el registro.
+        seconds (float): Latencia.
+        cost_usd (float | None): Costo estimado; None si el modelo no tiene precio.
+        session (str): Proceso que hizo la llamada.
+        request (str | None): Petición (turno de chat, moción, consulta...).
+        run (str | None): Ejecución (investigación, kickoff de una crew...).
+        timestamp (str): Momento del registro.
+    """
+    call_site: str
+    model: str
+    provider: str | None
+    prompt_tokens: int
+    completion_tokens: int
+    cached_tokens: int
+    requests: int
+    seconds: float
+    cost_usd: float | None
+    session: str = SESSION_ID
+    request: str | None = None
+    run: str | None = None
+    timestamp: str = field(default_factory=lambda: datetime.now().isoformat(timespec="seconds"))
+
+
+def _agent_model(agent) -> str:
+    """Nombre del modelo de un agente del SDK (los agentes con un modelo local tienen un objeto Model)."""
+    model = agent.model if isinstance(agent.model, str) else getattr(agent.model, "model", None)
+    return model or "predeterminado"
+
+
+class UsageLedger:
+    """
+    Registro de consumo de un proceso.
+
+    Atributos:
+        path (str): Archivo JSONL donde se añaden los registros ("" para no escribir).
+        prices (dict): Tabla de precios en USD por millón de tokens.
+        records (deque[UsageRecord]): Últimos registros, para los informes del proceso.
+    """
+
+    def __init__(self, path: str = USAGE_LOG_PATH, prices: dict | None = None, window: int = USAGE_WINDOW):
+        self.path = path
+        self.prices = prices or load_prices()
+        self.records: deque[UsageRecord] = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def cost(self, model: str, prompt: int, completion: int, cached: int) -> float | None:
+        prices = price_for(model, self.prices)
+        if prices is None:
+            return None
+        return ((prompt - cached) * prices["input"] + cached * prices.get("cached_input", prices["input"])
+                + completion * prices["output"]) / 1_000_000
+
+    def record(self, call_site: str, model: str, usage, seconds: float, provider: str | None = None,
+               **ids) -> UsageRecord:
+        """
+        Registra el consumo de una llamada.
+
+        Args:
+            call_site (str): Punto de llamada.
+            model (str): Modelo usado.
+            usage: Objeto de uso de la respuesta (ver `token_counts`).
+            seconds (float): Latencia de la llamada.
+            provider (str | None): Proveedor, si se conoce.
+            **ids: `request` y/o `run`, si no vienen del `usage_scope` activo.
+
+        Returns:
+            UsageRecord: El registro añadido.
+        """
+        prompt, completion, cached, requests = token_counts(usage)
+        scope = {**_scope.get(), **ids}
+        entry = UsageRecord(call_site, model, provider, prompt, completion, cached, requests, round(seconds, 3),
+                            self.cost(model, prompt, completion, cached),
+                            request=scope.get("request"), run=scope.get("run"))
+        with self._lock:
+            self.records.append(entry)
+            if self.path:
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(asdict(entry), ensure_ascii=False) + "\n")
+        return entry
+
+    def record_agent_run(self, call_site: str, agent, result, seconds: float, **ids) -> UsageRecord:
+        """
+        Registra una ejecución del SDK de agentes (`Runner.run`), con el uso acumulado de todos sus turnos.
+
+        El uso se registra por agente, con el modelo del agente: las respuestas del SDK
+        (`result.raw_responses`) no indican qué modelo las generó. Si la ejecución hizo handoffs
+        a agentes con otro modelo, no se puede repartir el consumo entre ellos y el registro
+        queda con el modelo "mixto(...)", sin precio, en lugar de cobrarlo todo al primero.
+
+        Args:
+            call_site (str): Punto de llamada.
+            agent (Agent): El agente ejecutado (se usa su modelo).
+            result (RunResult): El resultado de `Runner.run`.
+            seconds (float): Duración de la ejecución.
+        """
+        agents = [agent] + [item.target_agent for item in result.new_items
+                            if getattr(item, "target_agent", None) is not None]
+        models = sorted({_agent_model(a) for a in agents})
+        model = models[0] if len(models) == 1 else f"mixto({'+'.join(models)})"
+        if len(models) > 1:
+            print(f"{call_site}: la ejecución usó varios modelos ({', '.join(models)}); se registra sin costo")
+        return self.record(call_site, model, result.context_wrapper.usage, seconds, **ids)
+
+    def record_crew(self, call_site: str, crew, seconds: float, **ids) -> list[UsageRecord]:
+        """
+        Registra un kickoff de crewAI, con un registro por modelo de sus agentes.
+
+        crewAI solo mide la duración de la crew completa: la latencia se reparte entre los
+        modelos en proporción a sus tokens.
+
+        Args:
+            call_site (str): Punto de llamada.
+            crew (Crew): La crew después del kickoff.
+            seconds (float): Duración del kickoff.
+
+        Returns:
+            list[UsageRecord]: Los registros añadidos.
+        """
+        by_model: dict[str, list[int]] = {}
+        agents = list(crew.agents) + ([crew.manager_agent] if getattr(crew, "manager_agent", None) else [])
+        for agent in agents:
+            llm = getattr(agent, "llm", None)
+            summary = getattr(llm, "get_token_usage_summary", None)
+            if summary is None:
+                # Versión de crewAI sin uso por LLM: un único registro con el total de la crew
+                return [self.record(call_site, "crew", crew.usage_metrics, seconds, **ids)]
+            prompt, completion, cached, requests = token_counts(summary())
+            totals = by_model.setdefault(getattr(llm, "model", "desconocido"), [0, 0, 0, 0])
+            for i, value in enumerate((prompt, completion, cached, requests)):
+                totals[i] += value
+        tokens = sum(t[0] + t[1] for t in by_model.values()) or 1
+        return [self.record(call_site, model, _Counts(*totals), seconds * (totals[0] + totals[1]) / tokens, **ids)
+                for model, totals in by_model.items() if totals[3] or totals[0]]
+
+    def select(self, **filters) -> list[UsageRecord]:
+        """Registros en memoria que coinciden con los filtros (ej. `run="..."`, `call_site="Me.chat"`)."""
+        with self._lock:
+            records = list(self.records)
+        return [r for r in records if all(getattr(r, key) == value for key, value in filters.items())]
+
+    def totals(self, **filters) -> dict:
+        """Totales de los registros filtrados (ej. el consumo de una petición o de una ejecución)."""
+        return summarize(self.select(**filters), by=())[0]
+
+    def report(self, by: tuple[str, ...] = ("call_site", "model"), **filters) -> str:
+        """Resumen compacto de los registros en memoria, ordenado por costo."""
+        return format_summary(summarize(self.select(**filters), by))
+
+
+class _Counts:
+    """Tokens sumados de varios LLM de una crew, con la forma que entiende `token_counts`."""
+
+    def __init__(self, prompt_tokens: int, completion_tokens: int, cached_prompt_tokens: int, requests: int):
+        self.prompt_tokens = prompt_tokens
+        self.completion_tokens = completion_tokens
+        self.cached_prompt_tokens = cached_prompt_tokens
+        self.requests = requests
+
+
+def summarize(records: list[UsageRecord], by: tuple[str, ...] = ("call_site", "model")) -> list[dict]:
+    """
+    Agrega registros por las claves indicadas.
+
+    Args:
+        records (list[UsageRecord]): Registros a agregar.
+        by (tuple[str, ...]): Claves de agrupación (call_site, model, provider, session, request, run).
+
+    Returns:
+        list[dict]: Una fila por grupo con llamadas, tokens, costo y latencias, ordenadas por costo.
+    """
+    groups: dict[tuple, list[UsageRecord]] = {}
+    for r in records:
+        groups.setdefault(tuple(getattr(r, key) for key in by), []).append(r)
+    if not groups:
+        groups[tuple(None for _ in by)] = []
+    rows = []
+    for key, items in groups.items():
+        latencies = [r.seconds for r in items]
+        unpriced = [r for r in items if r.cost_usd is None]
+        rows.append({
+            **dict(zip(by, key)),
+            "calls": len(items),
+            "requests": sum(r.requests for r in items),
+            "prompt_tokens": sum(r.prompt_tokens for r in items),
+            "cached_tokens": sum(r.cached_tokens for r in items),
+            "completion_tokens": sum(r.completion_tokens for r in items),
+            "cost_usd": round(sum(r.cost_usd or 0.0 for r in items), 6),
+            "unpriced_calls": len(unpriced),
+            "p50_seconds": round(percentile(latencies, 50), 3) if latencies else None,
+            "p95_seconds": round(percentile(latencies, 95), 3) if latencies else None,
+        })
+    return sorted(rows, key=lambda row: row["cost_usd"], reverse=True)
+
+
+def format_summary(rows: list[dict]) -> str:
+    """Tabla compacta de `summarize`, con la parte del costo total de cada fila."""
+    rows = [row for row in rows if row["calls"]]
+    if not rows:
+        return "Consumo de LLM: sin llamadas registradas"
+    keys = [key for key in rows[0] if key not in {"calls", "requests", "prompt_tokens", "cached_tokens",
+                                                   "completion_tokens", "cost_usd", "unpriced_calls",
+                                                   "p50_seconds", "p95_seconds"}]
+    total_cost = sum(row["cost_usd"] for row in rows)
+    label = " / ".join(keys) or "total"
+    names = [" / ".join("-" if row[key] is None else str(row[key]) for key in keys) or "total" for row in rows]
+    width = max([len(label)] + [len(name) for name in names]) + 2
+    lines = [f"{label:<{width}}{'llamadas':>9}{'entrada':>10}{'cacheados':>11}{'salida':>9}"
+             f"{'costo ($)':>11}{'%':>5}{'p50 (s)':>9}{'p95 (s)':>9}"]
+    for name, row in zip(names, rows):
+        # Los modelos sin precio se marcan con "*": su costo no suma al total
+        cost = f"{row['cost_usd']:.4f}{'*' if row['unpriced_calls'] else ''}"
+        lines.append(f"{name:<{width}}{row['calls']:>9}{row['prompt_tokens']:>10}{row['cached_tokens']:>11}"
+                     f"{row['completion_tokens']:>9}{cost:>11}{100 * row['cost_usd'] / total_cost if total_cost else 0:>5.0f}"
+                     f"{row['p50_seconds']:>9.2f}{row['p95_seconds']:>9.2f}")
+    lines.append(f"Costo total: ${total_cost:.4f}"
+                 + (" (* sin precio en la tabla)" if any(row["unpriced_calls"] for row in rows) else ""))
+    return "\n".join(lines)
+
+
+def read_jsonl(path: str = USAGE_LOG_PATH) -> list[UsageRecord]:
+    """Lee los registros de un archivo JSONL (ignora las líneas corruptas)."""
+    records = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                records.append(UsageRecord(**json.loads(line)))
+            except (json.JSONDecodeError, TypeError):
+                continue
+    return records
+
+
+_ledger: UsageLedger | None = None
+_ledger_lock = threading.Lock()
+
+
+def get_usage_ledger() -> UsageLedger:
+    """Devuelve el registro compartido del proceso."""
+    global _ledger
+    with _ledger_lock:
+        if _ledger is None:
+            _ledger = UsageLedger()
+        return _ledger
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Resumen del consumo de tokens y costo de un archivo JSONL")
+    parser.add_argument("path", nargs="?", default=USAGE_LOG_PATH, help="Archivo JSONL de consumo")
+    parser.add_argument("--by", default="call_site,model",
+                        help="Claves de agrupación: call_site, model, provider, session, request, run")
+    parser.add_argument("--session", help="Solo esta sesión")
+    parser.add_argument("--run", help="Solo esta ejecución")
+    parser.add_argument("--since", help="Solo desde esta fecha (ISO, ej. 2025-06-01)")
+    args = parser.parse_args()
+    records = read_jsonl(args.path)
+    records = [r for r in records if (not args.session or r.session == args.session)
+               and (not args.run or r.run == args.run) and (not args.since or r.timestamp >= args.since)]
+    by = tuple(key.strip() for key in args.by.split(",") if key.strip())
+    print(format_summary(summarize(records, by)))
+
+
+if __name__ == "__main__":
+    main()